@@ -15,6 +15,14 @@ def get_db(request: Request):
     return request.app.state.db
 
 
+def get_schema_cache(request: Request):
+    return request.app.state.schema_cache
+
+
+def get_query_cache(request: Request):
+    return request.app.state.query_cache
+
+
 def get_vectorstore(request: Request):
     return request.app.state.vectorstore
 
@@ -23,6 +31,38 @@ def get_settings(request: Request):
     return request.app.state.settings
 
 
+def get_checkpointer(request: Request):
+    return request.app.state.checkpointer
+
+
+def get_summarizer(request: Request):
+    return request.app.state.summarizer
+
+
+def get_embedding_cache(request: Request):
+    return request.app.state.embedding_cache
+
+
+def get_lexical_index(request: Request):
+    return request.app.state.lexical_index
+
+
+def get_collection_version(request: Request):
+    return request.app.state.collection_version
+
+
+def get_retrieval_cache(request: Request):
+    return request.app.state.retrieval_cache
+
+
+def get_embedder(request: Request):
+    return request.app.state.embedder
+
+
+def get_ingestion_queue(request: Request):
+    return request.app.state.ingestion_queue
+
+
 def get_thread_store(request: Request):
     return request.app.state.thread_store
 
@@ -34,3 +74,7 @@ def get_document_store(request: Request):
 def get_model(request: Request):
     """Return the LLM model for classification."""
     return request.app.state.model
+
+
+def get_intent_cache(request: Request):
+    return request.app.state.intent_cache
@@ -1,11 +1,20 @@
 import logging
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
 
-from models.schemas import ChatRequest
-from core.agent import stream_agent_events, get_agent_for_mode
-from core.intent_classifier import classify_intent
-from api.dependencies import get_agents, get_model
+from models.schemas import ChatRequest, RetrievalFilter
+from core.agent import astream_agent_events, get_agent_for_mode
+from core.intent_classifier import aclassify_intent
+from services.retrieval import scope_documents
+from api.dependencies import (
+    get_agents,
+    get_document_store,
+    get_intent_cache,
+    get_model,
+    get_settings,
+    get_summarizer,
+    get_thread_store,
+)
 
 router = APIRouter(prefix="/chat", tags=["chat"])
 logger = logging.getLogger("chat")
@@ -14,29 +23,72 @@ logger = logging.getLogger("chat")
 @router.post("/stream")
 async def chat_stream(
     request: ChatRequest,
+    http_request: Request,
     agents=Depends(get_agents),
-    model=Depends(get_model)
+    model=Depends(get_model),
+    settings=Depends(get_settings),
+    intent_cache=Depends(get_intent_cache),
+    summarizer=Depends(get_summarizer),
+    thread_store=Depends(get_thread_store),
+    document_store=Depends(get_document_store),
 ):
     """Stream agent response as Server-Sent Events.
 
     Routes to the correct agent based on request.mode (sql, rag, hybrid).
-    If mode is not specified, uses LLM-based intent classification.
+    If mode is not specified, uses intent classification: the shared
+    classification cache, then a local keyword router, escalating to the
+    LLM (awaited, off the hot path) only when neither can answer.
+
+    Document retrieval is limited by ``request.filters`` (document ids,
+    file types, upload dates); without explicit document ids, the documents
+    pinned to the thread are used.
+
+    The agent runs asynchronously on the event loop and is cancelled when
+    the client disconnects.
 
     Event types:
-        step   - intermediate steps (thinking, sql_query, sql_result, source)
-        answer - final agent answer
-        done   - stream complete
+        step         - intermediate steps (thinking, sql_query, sql_result,
+                       sql_result_chunk, source)
+        answer_delta - answer tokens as they are generated
+        answer_reset - discard the streamed tokens; they preceded a tool call
+        answer       - final agent answer
+        done         - stream complete
     """
     # Auto-classify if mode not specified
     mode = request.mode
     if mode is None:
-        mode = classify_intent(request.question, model)
+        mode = await aclassify_intent(
+            request.question,
+            model,
+            settings.intent_local_threshold,
+            cache=intent_cache,
+        )
         logger.info(f"Auto-classified as '{mode}' for question: '{request.question[:50]}...'")
     
     agent = get_agent_for_mode(mode, agents)
 
+    filters = request.filters or RetrievalFilter()
+    document_ids = filters.document_ids
+    if document_ids is None:
+        thread = thread_store.get(request.thread_id) or {}
+        document_ids = thread.get("document_ids") or None
+    scope = scope_documents(
+        document_store.list_all(),
+        document_ids=document_ids,
+        file_types=filters.file_types,
+        uploaded_from=filters.uploaded_from,
+        uploaded_to=filters.uploaded_to,
+    )
+
     return StreamingResponse(
-        stream_agent_events(agent, request.question, request.thread_id, mode),
+        astream_agent_events(
+            agent,
+            request.question,
+            request.thread_id,
+            request=http_request,
+            summarizer=summarizer,
+            document_ids=scope,
+        ),
         media_type="text/event-stream",
         headers={
             "Cache-Control": "no-cache",
@@ -44,3 +96,9 @@ async def chat_stream(
             "X-Accel-Buffering": "no",
         },
     )
+
+
+@router.get("/intent-cache")
+async def intent_cache_stats(intent_cache=Depends(get_intent_cache)):
+    """Return hit/miss counters of the intent classification cache."""
+    return intent_cache.stats()
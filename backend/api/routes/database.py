@@ -1,19 +1,122 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
 
-from models.schemas import DatabaseSchemaResponse, TablePreviewResponse
-from api.dependencies import get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from starlette.concurrency import run_in_threadpool
+
+from models.schemas import (
+    DatabaseSchemaResponse,
+    TablePreviewResponse,
+    TableSchemaResponse,
+    QueryCacheInvalidateRequest,
+)
+from api.dependencies import get_db, get_schema_cache, get_query_cache
+from services.db import get_pool_stats
 
 router = APIRouter(prefix="/database", tags=["database"])
 
 
+def _schema_etag(schema_cache, name: str | None, offset: int, limit: int) -> str:
+    page = hashlib.sha1(f"{name}|{offset}|{limit}".encode()).hexdigest()[:12]
+    return f'W/"schema-{schema_cache.version}-{page}"'
+
+
 @router.get("/schema", response_model=DatabaseSchemaResponse)
-async def get_schema(db=Depends(get_db)):
-    """Return all table names and their schema information."""
-    tables = []
-    for table_name in db.get_usable_table_names():
-        table_info = db.get_table_info([table_name])
-        tables.append({"name": table_name, "info": table_info})
-    return DatabaseSchemaResponse(tables=tables)
+async def get_schema(
+    request: Request,
+    response: Response,
+    name: str | None = None,
+    offset: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
+    include_samples: bool = False,
+    schema_cache=Depends(get_schema_cache),
+):
+    """Return table names and column metadata from the schema cache.
+
+    Supports substring filtering on table name and offset/limit pagination.
+    Sample rows are only fetched when ``include_samples`` is set. Responses
+    without samples carry an ETag tied to the cache version and the query
+    parameters; a matching ``If-None-Match`` gets a 304. Sample rows are
+    table data that can change without a catalog change, so responses that
+    include them are never conditional.
+    """
+    names = schema_cache.table_names()
+    etag = None if include_samples else _schema_etag(schema_cache, name, offset, limit)
+    if etag is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    if name:
+        needle = name.lower()
+        names = [table_name for table_name in names if needle in table_name.lower()]
+    page = names[offset : offset + limit]
+
+    tables = [
+        {"name": table_name, "columns": schema_cache.columns(table_name)}
+        for table_name in page
+    ]
+    if include_samples:
+        for table in tables:
+            table["sample_rows"] = await run_in_threadpool(
+                schema_cache.get_sample_rows, table["name"]
+            )
+
+    if etag is not None:
+        response.headers["ETag"] = etag
+    return DatabaseSchemaResponse(
+        tables=tables,
+        total=len(names),
+        offset=offset,
+        limit=limit,
+        version=schema_cache.version,
+    )
+
+
+@router.get("/schema/{table_name}", response_model=TableSchemaResponse)
+async def get_table_schema(
+    table_name: str,
+    schema_cache=Depends(get_schema_cache),
+):
+    """Return keys and the agent-facing schema text for one table."""
+    try:
+        described = await run_in_threadpool(schema_cache.describe, table_name)
+        info = await run_in_threadpool(schema_cache.get_table_info, [table_name])
+    except ValueError:
+        raise HTTPException(
+            status_code=404, detail=f"Table '{table_name}' not found"
+        )
+    return TableSchemaResponse(**described, info=info)
+
+
+@router.post("/schema/refresh")
+async def refresh_schema(schema_cache=Depends(get_schema_cache)):
+    """Invalidate the schema cache and re-introspect the database."""
+    await run_in_threadpool(schema_cache.invalidate)
+    return {
+        "status": "refreshed",
+        "version": schema_cache.version,
+        "table_count": len(schema_cache.table_names()),
+    }
+
+
+@router.get("/pool")
+async def pool_stats(db=Depends(get_db)):
+    """Return connection pool occupancy and checkout wait times."""
+    return get_pool_stats(db)
+
+
+@router.get("/query-cache")
+async def query_cache_stats(query_cache=Depends(get_query_cache)):
+    """Return hit/miss and size counters of the SQL result cache."""
+    return query_cache.stats()
+
+
+@router.post("/query-cache/invalidate")
+async def invalidate_query_cache(
+    body: QueryCacheInvalidateRequest,
+    query_cache=Depends(get_query_cache),
+):
+    """Drop cached results for the given tables, or all results."""
+    removed = query_cache.invalidate(body.tables)
+    return {"status": "invalidated", "removed": removed}
 
 
 @router.get("/tables/{table_name}", response_model=TablePreviewResponse)
@@ -1,93 +1,176 @@
+import asyncio
+import logging
 import os
-from pathlib import Path
+from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
-from models.schemas import DocumentResponse
-from services.ingestion import ingest_document
+from models.schemas import BulkUploadResponse, DocumentResponse
+from core.agent import sse_event
+from services.ingestion_queue import TERMINAL_STATUSES
 from services.vectorstore import delete_document_chunks
-from api.dependencies import get_document_store, get_vectorstore, get_settings
-
-router = APIRouter(prefix="/documents", tags=["documents"])
+from api.uploads import multipart_body, receive_files
+from api.dependencies import (
+    get_collection_version,
+    get_document_store,
+    get_embedder,
+    get_embedding_cache,
+    get_ingestion_queue,
+    get_lexical_index,
+    get_retrieval_cache,
+    get_vectorstore,
+    get_settings,
+)
 
+logger = logging.getLogger(__name__)
 
-@router.get("", response_model=list[DocumentResponse])
-async def list_documents(store=Depends(get_document_store)):
-    """List all uploaded documents."""
-    return store.list_all()
-
+router = APIRouter(prefix="/documents", tags=["documents"])
 
-@router.post("", response_model=DocumentResponse, status_code=201)
-async def upload_document(
-    file: UploadFile = File(...),
-    store=Depends(get_document_store),
-    vectorstore=Depends(get_vectorstore),
-    settings=Depends(get_settings),
-):
-    """Upload and process a document.
 
-    1. Validates file type and size.
-    2. Saves raw file to uploads/ directory.
-    3. Runs ingestion pipeline (load, split, embed, store in ChromaDB).
-    4. Returns document metadata with processing status.
-    """
-    # Validate file type
-    filename = file.filename or "unknown"
+def _validate_file_type(filename: str, settings) -> str:
+    """Return the file extension, or raise 400 if the type is not allowed."""
     file_ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
     if file_ext not in settings.allowed_file_types:
         raise HTTPException(
             status_code=400,
             detail=f"File type '{file_ext}' not allowed. Allowed: {settings.allowed_file_types}",
         )
+    return file_ext
 
-    # Read file content
-    content = await file.read()
-    file_size = len(content)
 
-    # Validate file size
-    max_bytes = settings.max_file_size_mb * 1024 * 1024
-    if file_size > max_bytes:
-        raise HTTPException(
-            status_code=400,
-            detail=f"File too large ({file_size} bytes). Max: {max_bytes} bytes.",
-        )
+def _accept_upload(upload: dict, store, queue) -> dict:
+    """Store and queue one file received by ``receive_files``; returns its document.
 
-    # Save file to uploads directory
-    upload_dir = Path(settings.upload_dir)
-    upload_dir.mkdir(parents=True, exist_ok=True)
+    If a document with identical content already exists (and did not fail
+    ingestion), the upload is discarded and that document is returned with
+    ``duplicate`` set, so re-uploading a file costs a hash instead of an
+    embedding run and its chunks are not stored twice.
+    """
+    filename, part_path = upload["filename"], upload["path"]
+    existing = store.find_by_hash(upload["content_hash"])
+    if existing:
+        part_path.unlink(missing_ok=True)
+        logger.info(
+            "[upload] '%s' duplicates document %s, skipping ingestion",
+            filename,
+            existing["id"],
+        )
+        return {**existing, "duplicate": True}
 
     # Create document record first to get the ID
     doc = store.create(
         filename=filename,
-        file_type=file_ext,
-        file_size=file_size,
+        file_type=upload["file_ext"],
+        file_size=upload["size"],
         file_path="",  # Will be updated after save
+        content_hash=upload["content_hash"],
     )
 
     # Save with document_id prefix to avoid collisions
-    safe_filename = f"{doc['id']}_{filename}"
-    file_path = upload_dir / safe_filename
-    file_path.write_bytes(content)
-
-    # Update file path
+    file_path = part_path.with_name(f"{doc['id']}_{filename}")
+    os.replace(part_path, file_path)
     store.update(doc["id"], file_path=str(file_path))
 
-    # Run ingestion pipeline
-    try:
-        chunk_count = ingest_document(
-            file_path=str(file_path),
-            document_id=doc["id"],
-            filename=filename,
-            file_type=file_ext,
-            vectorstore=vectorstore,
-        )
-        store.update(doc["id"], status="ready", chunk_count=chunk_count)
-    except Exception as e:
-        store.update(doc["id"], status="error", error_message=str(e))
+    # Ingest in the background worker pool
+    queue.submit(doc["id"])
 
     return store.get(doc["id"])
 
 
+@router.get("", response_model=list[DocumentResponse])
+async def list_documents(store=Depends(get_document_store)):
+    """List all uploaded documents."""
+    return store.list_all()
+
+
+@router.get("/embedding-cache")
+async def embedding_cache_stats(
+    cache=Depends(get_embedding_cache),
+    embedder=Depends(get_embedder),
+):
+    """Embedding cache hit rate and ingestion embedding throughput."""
+    return {
+        "cache": cache.stats() if cache else None,
+        "embedder": embedder.stats(),
+    }
+
+
+@router.get("/retrieval-cache")
+async def retrieval_cache_stats(cache=Depends(get_retrieval_cache)):
+    """Hit rate of the retrieval result cache and the collection version."""
+    return cache.stats() if cache else None
+
+
+@router.post(
+    "",
+    response_model=DocumentResponse,
+    status_code=202,
+    openapi_extra=multipart_body("file"),
+)
+async def upload_document(
+    request: Request,
+    response: Response,
+    store=Depends(get_document_store),
+    queue=Depends(get_ingestion_queue),
+    settings=Depends(get_settings),
+):
+    """Upload a document and queue it for processing.
+
+    1. Validates file type.
+    2. Streams the ``file`` form field to uploads/, rejecting an oversized
+       upload from its Content-Length or as soon as it crosses the limit.
+    3. Queues the ingestion pipeline (load, split, embed, store in ChromaDB).
+    4. Returns document metadata with ``processing`` status (202 Accepted);
+       follow progress via ``GET /documents/{id}/events``.
+
+    Uploading a file whose content matches an existing document returns
+    that document with ``duplicate: true`` (200 OK) instead.
+    """
+    [upload] = await receive_files(
+        request, "file", settings, lambda name: _validate_file_type(name, settings), single=True
+    )
+    doc = _accept_upload(upload, store, queue)
+    if doc.get("duplicate"):
+        response.status_code = 200
+    return doc
+
+
+@router.post(
+    "/bulk",
+    response_model=BulkUploadResponse,
+    status_code=202,
+    openapi_extra=multipart_body("files", many=True),
+)
+async def upload_documents(
+    request: Request,
+    store=Depends(get_document_store),
+    queue=Depends(get_ingestion_queue),
+    settings=Depends(get_settings),
+):
+    """Upload several documents in one request.
+
+    Each file of the ``files`` form field is validated and saved
+    independently: rejected files are reported in ``errors`` and do not
+    affect the others, which are queued for ingestion as with
+    ``POST /documents``. The bytes of a rejected file are read past but
+    never stored. Files matching an existing document are returned as that
+    document with ``duplicate`` set.
+    """
+    uploads = await receive_files(
+        request, "files", settings, lambda name: _validate_file_type(name, settings)
+    )
+    documents, errors = [], []
+    for upload in uploads:
+        if "error" in upload:
+            errors.append(
+                {"filename": upload["filename"] or "unknown", "detail": upload["error"].detail}
+            )
+        else:
+            documents.append(_accept_upload(upload, store, queue))
+    return {"documents": documents, "errors": errors}
+
+
 @router.get("/{document_id}", response_model=DocumentResponse)
 async def get_document(document_id: str, store=Depends(get_document_store)):
     """Get document metadata by ID."""
@@ -97,11 +180,120 @@ async def get_document(document_id: str, store=Depends(get_document_store)):
     return doc
 
 
+@router.put(
+    "/{document_id}",
+    response_model=DocumentResponse,
+    status_code=202,
+    openapi_extra=multipart_body("file"),
+)
+async def replace_document(
+    document_id: str,
+    request: Request,
+    response: Response,
+    store=Depends(get_document_store),
+    queue=Depends(get_ingestion_queue),
+    settings=Depends(get_settings),
+):
+    """Upload a new version of a document and re-ingest it incrementally.
+
+    Chunks whose text is unchanged keep their vectors; only new chunks are
+    embedded and chunks missing from the new version are deleted. Returns
+    202 Accepted; follow progress via ``GET /documents/{id}/events``. A
+    file identical to the current version is discarded and the document is
+    returned unchanged with ``duplicate`` set (200 OK).
+    """
+    doc = store.get(document_id)
+    if not doc:
+        raise HTTPException(status_code=404, detail="Document not found")
+    if doc["status"] == "processing":
+        raise HTTPException(
+            status_code=409, detail="Document is still being processed"
+        )
+
+    [upload] = await receive_files(
+        request, "file", settings, lambda name: _validate_file_type(name, settings), single=True
+    )
+    filename, part_path = upload["filename"], upload["path"]
+    content_hash = upload["content_hash"]
+
+    if content_hash == doc.get("content_hash") and doc["status"] == "ready":
+        part_path.unlink(missing_ok=True)
+        response.status_code = 200
+        return {**doc, "duplicate": True}
+
+    version = doc.get("version", 1) + 1
+    file_path = part_path.with_name(f"{document_id}_v{version}_{filename}")
+    os.replace(part_path, file_path)
+
+    # The previous file is no longer needed: unchanged chunks live in ChromaDB
+    old_path = doc.get("file_path", "")
+    if old_path and old_path != str(file_path) and os.path.exists(old_path):
+        os.remove(old_path)
+
+    store.update(
+        document_id,
+        filename=filename,
+        file_type=upload["file_ext"],
+        file_size=upload["size"],
+        file_path=str(file_path),
+        content_hash=content_hash,
+        version=version,
+        error_message="",
+        updated_at=datetime.now(timezone.utc).isoformat(),
+    )
+    queue.submit(document_id)
+
+    return store.get(document_id)
+
+
+@router.get("/{document_id}/events")
+async def document_events(
+    document_id: str,
+    store=Depends(get_document_store),
+    queue=Depends(get_ingestion_queue),
+):
+    """Stream ingestion progress as Server-Sent Events.
+
+    Event types:
+        progress - document metadata including ``progress`` (stage,
+                   pages_loaded, chunks_total, chunks_embedded)
+        done     - ingestion finished (status ready or error)
+    """
+    if not store.get(document_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    async def events():
+        updates = queue.subscribe(document_id)
+        try:
+            doc = store.get(document_id)
+            while doc:
+                yield sse_event("progress", DocumentResponse(**doc).model_dump())
+                if doc["status"] in TERMINAL_STATUSES:
+                    break
+                try:
+                    doc = await asyncio.wait_for(updates.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Heartbeat: resend the current state
+                    doc = store.get(document_id)
+            status = doc["status"] if doc else "deleted"
+            yield sse_event("done", {"id": document_id, "status": status})
+        finally:
+            queue.unsubscribe(document_id, updates)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "Connection": "keep-alive"},
+    )
+
+
 @router.delete("/{document_id}", status_code=204)
 async def delete_document(
     document_id: str,
     store=Depends(get_document_store),
     vectorstore=Depends(get_vectorstore),
+    lexical_index=Depends(get_lexical_index),
+    collection_version=Depends(get_collection_version),
 ):
     """Delete a document and all its vector chunks from ChromaDB."""
     doc = store.get(document_id)
@@ -110,7 +302,9 @@ async def delete_document(
 
     # Delete vector chunks from ChromaDB
     try:
-        delete_document_chunks(vectorstore, document_id)
+        delete_document_chunks(
+            vectorstore, document_id, lexical_index, collection_version
+        )
     except Exception:
         pass  # Continue even if ChromaDB deletion fails
 
@@ -7,7 +7,7 @@ from models.schemas import (
     ThreadDetailResponse,
     MessageResponse,
 )
-from api.dependencies import get_agent, get_thread_store
+from api.dependencies import get_agent, get_checkpointer, get_thread_store
 from core.agent import _extract_text
 
 router = APIRouter(prefix="/threads", tags=["threads"])
@@ -20,7 +20,9 @@ async def list_threads(store=Depends(get_thread_store)):
 
 @router.post("", response_model=ThreadResponse, status_code=201)
 async def create_thread(body: ThreadCreate, store=Depends(get_thread_store)):
-    return store.create(title=body.title, mode=body.mode)
+    return store.create(
+        title=body.title, mode=body.mode, document_ids=body.document_ids
+    )
 
 
 @router.get("/{thread_id}", response_model=ThreadDetailResponse)
@@ -36,7 +38,7 @@ async def get_thread(
     # Retrieve messages from LangGraph checkpoint
     messages = []
     try:
-        state = agent.get_state(
+        state = await agent.aget_state(
             config={"configurable": {"thread_id": thread_id}}
         )
         if state and state.values:
@@ -81,13 +83,21 @@ async def update_thread(
     body: ThreadUpdate,
     store=Depends(get_thread_store),
 ):
-    thread = store.update(thread_id, title=body.title)
+    thread = store.update(
+        thread_id, title=body.title, document_ids=body.document_ids
+    )
     if not thread:
         raise HTTPException(status_code=404, detail="Thread not found")
     return thread
 
 
 @router.delete("/{thread_id}", status_code=204)
-async def delete_thread(thread_id: str, store=Depends(get_thread_store)):
+async def delete_thread(
+    thread_id: str,
+    store=Depends(get_thread_store),
+    checkpointer=Depends(get_checkpointer),
+):
     if not store.delete(thread_id):
         raise HTTPException(status_code=404, detail="Thread not found")
+    # Drop the conversation history too, not just the thread metadata
+    await checkpointer.adelete_thread(thread_id)
@@ -0,0 +1,192 @@
+"""Streaming multipart reader for the document upload routes.
+
+FastAPI parses ``UploadFile`` parameters before the route runs, spooling
+the whole request body to a temporary file first, so a size limit checked
+in the route only applies after a multi-GB upload has been received. The
+upload routes read ``request.stream()`` through :func:`receive_files`
+instead: file bytes go straight to a ``.part`` file in the uploads
+directory while the size limit and SHA-256 are checked as they arrive.
+"""
+
+import hashlib
+import uuid
+from pathlib import Path
+
+from fastapi import HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from python_multipart.multipart import MultipartParser, parse_options_header
+
+# Allowance for boundaries and part headers when checking Content-Length
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def multipart_body(field: str, many: bool = False) -> dict:
+    """OpenAPI ``requestBody`` for a route that reads ``field`` itself."""
+    schema = {"type": "string", "format": "binary"}
+    if many:
+        schema = {"type": "array", "items": schema}
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "required": [field],
+                        "properties": {field: schema},
+                    }
+                }
+            },
+        }
+    }
+
+
+class _Receiver:
+    """Collects parser callbacks; file data is written after each feed."""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.events: list[tuple[str, object]] = []
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    def on_part_begin(self) -> None:
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int) -> None:
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int) -> None:
+        self._header_value += data[start:end]
+
+    def on_header_end(self) -> None:
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self) -> None:
+        _, options = parse_options_header(self._disposition)
+        is_file = options.get(b"name") == self.field.encode() and b"filename" in options
+        filename = options[b"filename"].decode("utf-8", "replace") if is_file else None
+        self.events.append(("part", filename))
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        self.events.append(("data", data[start:end]))
+
+    def on_part_end(self) -> None:
+        self.events.append(("end", None))
+
+    def callbacks(self) -> dict:
+        return {
+            name: getattr(self, name)
+            for name in (
+                "on_part_begin", "on_header_field", "on_header_value", "on_header_end",
+                "on_headers_finished", "on_part_data", "on_part_end",
+            )
+        }
+
+
+async def receive_files(
+    request: Request,
+    field: str,
+    settings,
+    validate=None,
+    single: bool = False,
+) -> list[dict]:
+    """Stream the ``field`` files of a multipart request into the uploads directory.
+
+    Each file is written to a temporary ``.part`` file while its size and
+    SHA-256 are computed incrementally. A file over ``MAX_FILE_SIZE_MB``
+    stops being written as soon as it crosses the limit and its partial
+    file is removed; a file rejected by ``validate`` is never written.
+
+    With ``single`` set, only the first ``field`` file is read, a
+    ``Content-Length`` that cannot fit the size limit is rejected before
+    any of the body is read, and a rejected file raises at once instead of
+    reading the rest of the request.
+
+    Args:
+        request: The incoming multipart/form-data request.
+        field: Form field holding the file(s).
+        settings: Application settings (upload dir and size limit).
+        validate: Optional ``validate(filename) -> file_ext`` raising
+            ``HTTPException`` for files that must not be stored.
+        single: Read a single file and fail fast, as described above.
+
+    Returns:
+        One dict per file with ``filename`` and either ``file_ext``,
+        ``path``, ``size`` and ``content_hash`` or an ``error``
+        (``HTTPException``).
+
+    Raises:
+        HTTPException: 400 for a body that is not multipart, 422 when no
+            file was sent and, with ``single``, the file's own error.
+    """
+    max_bytes = settings.max_file_size_mb * 1024 * 1024
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise HTTPException(status_code=400, detail="Expected a multipart/form-data upload.")
+    too_large = HTTPException(status_code=413, detail=f"File too large. Max: {max_bytes} bytes.")
+    length = request.headers.get("content-length", "")
+    if single and length.isdigit() and int(length) > max_bytes + _MULTIPART_OVERHEAD_BYTES:
+        raise too_large
+
+    upload_dir = Path(settings.upload_dir)
+    upload_dir.mkdir(parents=True, exist_ok=True)
+    receiver = _Receiver(field)
+    parser = MultipartParser(params[b"boundary"], receiver.callbacks())
+    files: list[dict] = []
+    current, out, digest = None, None, None
+    try:
+        async for chunk in request.stream():
+            parser.write(chunk)
+            events, receiver.events = receiver.events, []
+            for kind, value in events:
+                if kind == "part":
+                    current = None
+                    if value is None or (single and files):
+                        continue
+                    current = {"filename": Path(value).name}
+                    files.append(current)
+                    try:
+                        if validate is not None:
+                            current["file_ext"] = validate(current["filename"])
+                    except HTTPException as e:
+                        current["error"] = e
+                        current = None
+                        continue
+                    current["path"] = upload_dir / f".{uuid.uuid4().hex}.part"
+                    current["size"] = 0
+                    out, digest = open(current["path"], "wb"), hashlib.sha256()
+                elif kind == "data" and out is not None:
+                    current["size"] += len(value)
+                    if current["size"] > max_bytes:
+                        out.close()
+                        out = None
+                        current.pop("path").unlink(missing_ok=True)
+                        current["error"] = too_large
+                        continue
+                    digest.update(value)
+                    await run_in_threadpool(out.write, value)
+                elif kind == "end" and out is not None:
+                    out.close()
+                    out = None
+                    current["content_hash"] = digest.hexdigest()
+            if single and files and "error" in files[0]:
+                raise files[0]["error"]
+        parser.finalize()
+        if out is not None:
+            raise HTTPException(status_code=400, detail="Upload ended before the file did.")
+    except BaseException:
+        if out is not None:
+            out.close()
+        for upload in files:
+            if "path" in upload:
+                upload["path"].unlink(missing_ok=True)
+        raise
+
+    if not files:
+        raise HTTPException(status_code=422, detail=f"Missing file field '{field}'.")
+    return files
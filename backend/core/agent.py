@@ -1,11 +1,16 @@
+import asyncio
 import json
 import logging
 
 from langchain.agents import create_agent
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain.tools import tool
+from langgraph.config import get_config, get_stream_writer
 
 from core.prompts import build_system_prompt
+from services.retrieval import HybridRetriever
+from services.sql_guard import SQLGuardError
+from services.sql_results import run_streaming_query
 from core.token_tracker import TokenTracker
 
 logger = logging.getLogger("token_tracker")
@@ -16,16 +21,158 @@ logger = logging.getLogger("token_tracker")
 # ---------------------------------------------------------------------------
 
 
-def create_sql_agent(model, db, top_k: int = 5, checkpointer=None):
+def _build_schema_tools(schema_cache, descriptions: dict[str, str]):
+    """Build cached replacements for sql_db_list_tables and sql_db_schema."""
+
+    @tool("sql_db_list_tables", description=descriptions["sql_db_list_tables"])
+    def list_tables(tool_input: str = "") -> str:
+        return ", ".join(schema_cache.table_names())
+
+    @tool("sql_db_schema", description=descriptions["sql_db_schema"])
+    def table_schema(table_names: str) -> str:
+        names = [name.strip() for name in table_names.split(",") if name.strip()]
+        try:
+            return schema_cache.get_table_info(names)
+        except ValueError as e:
+            return f"Error: {e}"
+
+    return [list_tables, table_schema]
+
+
+def _chunk_writer():
+    """Return the graph's custom stream writer, or a no-op outside a graph run."""
+    try:
+        writer = get_stream_writer()
+    except (RuntimeError, KeyError):
+        return lambda _: None
+    return lambda batch: writer({"type": "sql_result_chunk", **batch})
+
+
+def _build_query_tool(
+    db, description: str, query_cache=None, sql_guard=None, streaming=None
+):
+    """Build a sql_db_query replacement with guard, cache and streaming stages.
+
+    The statement is validated and row-limited by the SQLGuard, answered
+    from the QueryResultCache if possible, and otherwise cost-checked and
+    executed. With ``streaming`` (``{"batch_size", "preview_rows"}``) rows
+    are read from a server-side cursor and pushed to the client as
+    ``sql_result_chunk`` custom stream events while the agent only gets a
+    bounded summary. The ToolMessage artifact carries the executed query
+    and whether it came from cache, for the SSE stream.
+    """
+
+    @tool("sql_db_query", description=description, response_format="content_and_artifact")
+    def sql_db_query(query: str):
+        artifact = {"cached": False, "query": query, "streamed": streaming is not None}
+        try:
+            if sql_guard is not None:
+                query = sql_guard.check(query)
+                artifact["query"] = query
+            if query_cache is not None:
+                cached = query_cache.get(query)
+                if cached is not None:
+                    result, table = cached
+                    if streaming is not None and table:
+                        _replay_rows(table, streaming["batch_size"])
+                    return result, {**artifact, "cached": True}
+            if sql_guard is not None:
+                sql_guard.enforce_cost(query)
+        except SQLGuardError as e:
+            return f"Error: {e}", artifact
+
+        table = None
+        if streaming is None:
+            result = db.run_no_throw(query)
+        else:
+            result, table = run_streaming_query(
+                db,
+                query,
+                _chunk_writer(),
+                batch_size=streaming["batch_size"],
+                preview_rows=streaming["preview_rows"],
+                keep_rows=query_cache is not None,
+            )
+        if query_cache is not None:
+            query_cache.set(query, result, table)
+        return result, artifact
+
+    return sql_db_query
+
+
+def _replay_rows(table: dict, batch_size: int) -> None:
+    """Re-emit a cached result table as sql_result_chunk events."""
+    write = _chunk_writer()
+    rows = table["rows"]
+    for offset in range(0, len(rows), batch_size):
+        write(
+            {
+                "columns": table["columns"],
+                "rows": rows[offset : offset + batch_size],
+                "offset": offset,
+            }
+        )
+
+
+def _build_sql_tools(
+    model, db, schema_cache=None, query_cache=None, sql_guard=None, streaming=None
+):
+    """Return the SQL toolkit tools.
+
+    When a SchemaCache is given, the catalog tools (list tables, table
+    schema) are served from it instead of querying the database each call.
+    When a QueryResultCache, SQLGuard or streaming config is given,
+    sql_db_query runs through them.
+    """
+    tools = SQLDatabaseToolkit(db=db, llm=model).get_tools()
+    descriptions = {t.name: t.description for t in tools}
+
+    replacements = []
+    if schema_cache is not None:
+        replacements += _build_schema_tools(schema_cache, descriptions)
+    if query_cache is not None or sql_guard is not None or streaming is not None:
+        replacements.append(
+            _build_query_tool(
+                db, descriptions["sql_db_query"], query_cache, sql_guard, streaming
+            )
+        )
+
+    replaced = {t.name: t for t in replacements}
+    return [replaced.get(t.name, t) for t in tools]
+
+
+def _middleware(summarizer, context_window) -> list:
+    """Agent middleware, outermost first.
+
+    The summarizer swaps already-summarized turns for the summary before the
+    context window fits what is left into the token budget.
+    """
+    return [m for m in (summarizer, context_window) if m is not None]
+
+
+def create_sql_agent(
+    model,
+    db,
+    top_k: int = 5,
+    checkpointer=None,
+    schema_cache=None,
+    query_cache=None,
+    sql_guard=None,
+    streaming=None,
+    context_window=None,
+    summarizer=None,
+):
     """Create a LangGraph SQL agent with optional thread memory."""
-    toolkit = SQLDatabaseToolkit(db=db, llm=model)
-    tools = toolkit.get_tools()
+    tools = _build_sql_tools(
+        model, db, schema_cache, query_cache, sql_guard, streaming
+    )
     system_prompt = build_system_prompt(db.dialect, top_k)
     return create_agent(
         model,
         tools,
         system_prompt=system_prompt,
         checkpointer=checkpointer,
+        middleware=_middleware(summarizer, context_window),
     )
 
 
@@ -34,18 +181,34 @@ def create_sql_agent(model, db, top_k: int = 5, checkpointer=None):
 # ---------------------------------------------------------------------------
 
 
-def _build_retriever_tool(vectorstore):
-    """Build a retriever tool that searches the ChromaDB vectorstore."""
+def _retrieval_scope() -> list[str] | None:
+    """Document ids the current run may retrieve from (None = all)."""
+    try:
+        return get_config()["configurable"].get("document_ids")
+    except (RuntimeError, KeyError):
+        return None
+
+
+def _build_retriever_tool(retriever: HybridRetriever):
+    """Build a retriever tool searching uploaded documents via ``retriever``.
+
+    Searches are limited to the run's document scope (request filters or
+    the documents pinned to the thread), passed as ``document_ids`` in the
+    run config.
+    """
 
     @tool(response_format="content_and_artifact")
-    def retrieve_context(query: str):
+    def retrieve_context(query: str, filename: str | None = None):
         """Retrieve relevant document chunks to help answer a question.
 
         Use this tool whenever the user asks about uploaded documents.
         The tool returns text excerpts from documents that were uploaded
-        to the system.
+        to the system. Pass ``filename`` (the exact uploaded file name) to
+        search a single document the user refers to by name.
         """
-        retrieved_docs = vectorstore.similarity_search(query, k=3)
+        retrieved_docs = retriever.search(
+            query, document_ids=_retrieval_scope(), filename=filename
+        )
         serialized = "\n\n".join(
             f"Source: {doc.metadata.get('filename', 'unknown')} "
             f"(page {doc.metadata.get('page', '?')}, "
@@ -71,14 +234,25 @@ When answering:
 """
 
 
-def create_rag_agent(model, vectorstore, checkpointer=None):
-    """Create a RAG agent that retrieves from uploaded documents."""
-    retriever_tool = _build_retriever_tool(vectorstore)
+def create_rag_agent(
+    model,
+    vectorstore,
+    checkpointer=None,
+    context_window=None,
+    summarizer=None,
+    retriever=None,
+):
+    """Create a RAG agent that retrieves from uploaded documents.
+
+    ``retriever`` defaults to plain similarity search over ``vectorstore``.
+    """
+    retriever_tool = _build_retriever_tool(retriever or HybridRetriever(vectorstore))
     return create_agent(
         model,
         [retriever_tool],
         system_prompt=RAG_SYSTEM_PROMPT,
         checkpointer=checkpointer,
+        middleware=_middleware(summarizer, context_window),
     )
 
 
@@ -104,11 +278,25 @@ When citing document sources, mention the filename and page/section.
 """
 
 
-def create_hybrid_agent(model, db, vectorstore, top_k: int = 5, checkpointer=None):
+def create_hybrid_agent(
+    model,
+    db,
+    vectorstore,
+    top_k: int = 5,
+    checkpointer=None,
+    schema_cache=None,
+    query_cache=None,
+    sql_guard=None,
+    streaming=None,
+    context_window=None,
+    summarizer=None,
+    retriever=None,
+):
     """Create a hybrid agent with both SQL and RAG tools."""
-    sql_toolkit = SQLDatabaseToolkit(db=db, llm=model)
-    sql_tools = sql_toolkit.get_tools()
-    retriever_tool = _build_retriever_tool(vectorstore)
+    sql_tools = _build_sql_tools(
+        model, db, schema_cache, query_cache, sql_guard, streaming
+    )
+    retriever_tool = _build_retriever_tool(retriever or HybridRetriever(vectorstore))
 
     all_tools = sql_tools + [retriever_tool]
 
@@ -117,6 +305,7 @@ def create_hybrid_agent(model, db, vectorstore, top_k: int = 5, checkpointer=Non
         all_tools,
         system_prompt=HYBRID_SYSTEM_PROMPT,
         checkpointer=checkpointer,
+        middleware=_middleware(summarizer, context_window),
     )
 
 
@@ -172,134 +361,221 @@ def run_agent(agent, question: str, thread_id: str | None = None) -> str:
     if thread_id:
         config = {"configurable": {"thread_id": thread_id}}
     response = None
-    for step in agent.stream(
+    for update in agent.stream(
         {"messages": [{"role": "user", "content": question}]},
         config=config,
-        stream_mode="values",
+        stream_mode="updates",
     ):
-        response = step["messages"][-1]
+        for messages in _update_messages(update):
+            response = messages[-1]
     return _extract_text(response)
 
 
-def stream_agent_events(agent, question: str, thread_id: str, mode: str):
-    """Generator that yields SSE-formatted events from agent execution.
+def _update_messages(update: dict):
+    """Yield the new-message lists contained in one ``updates`` chunk."""
+    for node_update in update.values():
+        if isinstance(node_update, dict) and node_update.get("messages"):
+            yield node_update["messages"]
 
-    Event types:
-        step   - intermediate reasoning (thinking, sql_query, sql_result, source)
-        answer - final agent response
-        done   - stream complete signal
-    
-    Args:
-        agent: The agent to run
-        question: User's question
-        thread_id: Thread ID for conversation history
-        mode: Agent mode ("sql", "rag", "hybrid") - history is limited only for "rag"
-    """
-    tracker = TokenTracker()
-    config = {
-        "configurable": {"thread_id": thread_id},
-        "callbacks": [tracker],
-    }
-
-    # Get the number of messages already in the checkpoint so we skip them.
-    # Without this, stream_mode="values" re-emits the full history on the
-    # first step, causing previous answers to appear before the new one.
-    existing_state = agent.get_state(config)
-    
-    # Limit conversation history to last 5 messages ONLY for RAG agent (token optimization)
-    # SQL and hybrid agents need complete history for context
-    if mode == "rag" and existing_state.values and "messages" in existing_state.values:
-        messages = existing_state.values["messages"]
-        if len(messages) > 5:
-            # Keep only the last 5 messages
-            trimmed_messages = messages[-5:]
-            # Update the state with trimmed messages
-            agent.update_state(config, {"messages": trimmed_messages})
-            prev_count = len(trimmed_messages)
-        else:
-            prev_count = len(messages)
-    else:
-        prev_count = len(existing_state.values.get("messages", [])) if existing_state.values else 0
 
-    for step in agent.stream(
-        {"messages": [{"role": "user", "content": question}]},
-        config=config,
-        stream_mode="values",
-    ):
-        messages = step["messages"]
-        new_messages = messages[prev_count:]
-        prev_count = len(messages)
-
-        for msg in new_messages:
-            msg_type = type(msg).__name__
-
-            if msg_type == "HumanMessage":
-                continue
-
-            if msg_type == "AIMessage":
-                tracker.track_from_metadata(msg)
-                tool_calls = getattr(msg, "tool_calls", None)
-                if tool_calls:
-                    for tc in tool_calls:
-                        tool_name = tc.get("name", "")
-                        tool_args = tc.get("args", {})
-
-                        if tool_name == "sql_db_query":
-                            query = tool_args.get("query", "")
-                            yield _sse_event(
-                                "step",
-                                {"type": "sql_query", "content": query},
-                            )
-                        elif tool_name == "retrieve_context":
-                            yield _sse_event(
-                                "step",
-                                {
-                                    "type": "thinking",
-                                    "content": "Searching uploaded documents...",
-                                },
-                            )
-                        else:
-                            yield _sse_event(
-                                "step",
-                                {
-                                    "type": "thinking",
-                                    "content": f"Using tool: {tool_name}",
-                                },
-                            )
-                else:
-                    content = _extract_text(msg)
-                    if content:
-                        yield _sse_event(
-                            "answer",
-                            {"type": "final", "content": content},
-                        )
+def _token_text(chunk) -> str:
+    """Text of a streamed message chunk, whitespace preserved."""
+    content = chunk.content
+    if isinstance(content, str):
+        return content
+    return "".join(
+        part.get("text", "") if isinstance(part, dict) else str(part)
+        for part in content
+    )
+
+
+def _is_answer_token(chunk, metadata: dict) -> bool:
+    """True for text tokens of the agent's own model call (not tool-internal LLMs)."""
+    return (
+        metadata.get("langgraph_node") == "model"
+        and type(chunk).__name__ == "AIMessageChunk"
+        and not getattr(chunk, "tool_call_chunks", None)
+    )
+
 
-            elif msg_type == "ToolMessage":
-                tool_name = getattr(msg, "name", "")
-                content = _extract_text(msg)
+def _message_events(msg, tracker: TokenTracker):
+    """Yield the SSE events for one new graph message."""
+    msg_type = type(msg).__name__
+
+    if msg_type == "AIMessage":
+        tracker.track_from_metadata(msg)
+        tool_calls = getattr(msg, "tool_calls", None)
+        if tool_calls:
+            # Text streamed before the tool call went out as answer_delta
+            if _extract_text(msg):
+                yield sse_event("answer_reset", {"type": "reset"})
+            for tc in tool_calls:
+                tool_name = tc.get("name", "")
+                tool_args = tc.get("args", {})
 
                 if tool_name == "sql_db_query":
-                    yield _sse_event(
+                    query = tool_args.get("query", "")
+                    yield sse_event(
                         "step",
-                        {"type": "sql_result", "content": content},
+                        {"type": "sql_query", "content": query},
                     )
                 elif tool_name == "retrieve_context":
-                    # Emit source event with retrieved context
-                    yield _sse_event(
+                    yield sse_event(
                         "step",
-                        {"type": "source", "content": content},
+                        {
+                            "type": "thinking",
+                            "content": "Searching uploaded documents...",
+                        },
                     )
                 else:
-                    yield _sse_event(
+                    yield sse_event(
                         "step",
-                        {"type": "thinking", "content": content},
+                        {
+                            "type": "thinking",
+                            "content": f"Using tool: {tool_name}",
+                        },
                     )
+        else:
+            content = _extract_text(msg)
+            if content:
+                yield sse_event(
+                    "answer",
+                    {"type": "final", "content": content},
+                )
+
+    elif msg_type == "ToolMessage":
+        tool_name = getattr(msg, "name", "")
+        content = _extract_text(msg)
+
+        if tool_name == "sql_db_query":
+            artifact = getattr(msg, "artifact", None) or {}
+            yield sse_event(
+                "step",
+                {
+                    "type": "sql_result",
+                    "content": content,
+                    "cached": artifact.get("cached", False),
+                    "query": artifact.get("query"),
+                    "streamed": artifact.get("streamed", False),
+                },
+            )
+        elif tool_name == "retrieve_context":
+            # Emit source event with retrieved context
+            yield sse_event(
+                "step",
+                {"type": "source", "content": content},
+            )
+        else:
+            yield sse_event(
+                "step",
+                {"type": "thinking", "content": content},
+            )
+
+
+def _chunk_events(stream_mode: str, chunk, tracker: TokenTracker):
+    """Yield the SSE events for one ``(stream_mode, chunk)`` pair of the graph stream."""
+    if stream_mode == "messages":
+        token, metadata = chunk
+        content = _token_text(token) if _is_answer_token(token, metadata) else ""
+        if content:
+            yield sse_event("answer_delta", {"type": "delta", "content": content})
+        return
+
+    # Row batches pushed by the streaming sql_db_query tool
+    if stream_mode == "custom":
+        yield sse_event("step", chunk)
+        return
+
+    for messages in _update_messages(chunk):
+        for msg in messages:
+            yield from _message_events(msg, tracker)
+
+
+_STREAM_MODES = ["updates", "messages", "custom"]
+
+
+def _run_config(
+    thread_id: str, tracker: TokenTracker, document_ids: list[str] | None = None
+) -> dict:
+    configurable = {"thread_id": thread_id}
+    if document_ids is not None:
+        configurable["document_ids"] = document_ids
+    return {"configurable": configurable, "callbacks": [tracker]}
+
+
+async def astream_agent_events(
+    agent,
+    question: str,
+    thread_id: str,
+    request=None,
+    summarizer=None,
+    document_ids: list[str] | None = None,
+):
+    """Async generator that yields SSE-formatted events from agent execution.
+
+    The graph is streamed with ``agent.astream`` in ``updates`` mode, so each
+    step only carries the messages it added rather than the whole thread
+    history, plus ``messages`` mode for token-level output of the final
+    answer and ``custom`` mode for SQL row batches.
+
+    When ``request`` (a Starlette ``Request``) is given, the client
+    connection is checked between stream chunks; once it is gone, or the
+    response task is cancelled, the graph run is closed so no further model
+    or tool steps are scheduled, and the run is logged as cancelled in the
+    token summary. A tool call that is already executing in a worker thread
+    runs to completion, but its result is discarded.
+
+    Event types:
+        step         - intermediate reasoning (thinking, sql_query, sql_result,
+                       sql_result_chunk, source)
+        answer_delta - incremental answer text as tokens arrive
+        answer_reset - the streamed text was preamble to a tool call, not
+                       the answer; clients clear it
+        answer       - final agent response (full text)
+        done         - stream complete signal
+
+    Args:
+        agent: The agent to run
+        question: User's question
+        thread_id: Thread ID for conversation history
+        request: Optional request used to detect client disconnects
+        summarizer: Optional ConversationSummarizer, run in the background
+            once the stream completes
+        document_ids: Documents retrieve_context may search (None = all)
+    """
+    tracker = TokenTracker()
+    config = _run_config(thread_id, tracker, document_ids)
+
+    stream = agent.astream(
+        {"messages": [{"role": "user", "content": question}]},
+        config=config,
+        stream_mode=_STREAM_MODES,
+    )
+    try:
+        async for stream_mode, chunk in stream:
+            if request is not None and await request.is_disconnected():
+                tracker.mark_cancelled("client disconnected")
+                break
+            for event in _chunk_events(stream_mode, chunk, tracker):
+                yield event
+    except (asyncio.CancelledError, GeneratorExit):
+        tracker.mark_cancelled("response cancelled")
+        raise
+    finally:
+        await stream.aclose()
+        if tracker.cancelled:
+            logger.info("[tokens] Request cancelled — %s", tracker.summary())
+
+    if tracker.cancelled:
+        return
 
     summary = tracker.summary()
     logger.info("[tokens] Request complete — %s", summary)
-    yield _sse_event("done", {"status": "complete", **summary})
+    yield sse_event("done", {"status": "complete", **summary})
+    if summarizer is not None:
+        summarizer.schedule(agent, thread_id)
 
 
-def _sse_event(event: str, data: dict) -> str:
+def sse_event(event: str, data: dict) -> str:
     """Format a Server-Sent Event string."""
-    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
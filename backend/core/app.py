@@ -4,9 +4,25 @@ from dotenv import load_dotenv
 from langchain.chat_models import init_chat_model
 
 from core.agent import create_sql_agent, create_rag_agent, create_hybrid_agent
+from core.context_window import ContextWindowMiddleware
+from core.summarizer import ConversationSummarizer
+from core.intent_classifier import IntentCache
 from services.db import get_database
+from services.embedding import BatchEmbedder
+from services.embedding_cache import EmbeddingCache
+from services.lexical_index import LexicalIndex
+from services.query_cache import QueryResultCache
+from services.schema_cache import SchemaCache
+from services.sql_guard import SQLGuard
 from services.memory import create_memory
-from services.vectorstore import create_vectorstore
+from services.reranker import CrossEncoderReranker
+from services.retrieval import HybridRetriever
+from services.retrieval_cache import RetrievalCache
+from services.vectorstore import (
+    CollectionVersion,
+    backfill_lexical_index,
+    create_vectorstore,
+)
 from core.settings import Settings
 
 
@@ -14,7 +30,10 @@ def build_app(settings: Settings | None = None):
     """Initialize all application components.
 
     Returns:
-        dict with keys: agents, db, vectorstore, settings
+        dict with keys: agents, db, vectorstore, settings, model, intent_cache,
+        schema_cache, query_cache, checkpointer, summarizer, embedder,
+        embedding_cache, lexical_index, reranker, collection_version,
+        retrieval_cache
     """
     # Search for .env in current dir or parent
     env_path = Path(".env")
@@ -26,23 +45,172 @@ def build_app(settings: Settings | None = None):
 
     # Core components
     # db = get_database(settings.db_url, settings.db_path)
-    db = get_database(settings.db_url)
+    db = get_database(
+        settings.db_url,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_recycle=settings.db_pool_recycle,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_timeout=settings.db_pool_timeout,
+        statement_timeout=settings.db_statement_timeout,
+    )
     model = init_chat_model(settings.model_name)
-    memory = create_memory()
+    memory = create_memory(
+        settings.checkpoint_url,
+        max_checkpoints=settings.checkpoint_max_per_thread,
+        retention_days=settings.checkpoint_retention_days,
+        compact_interval_seconds=settings.checkpoint_compact_interval_seconds,
+        keep_recent_turns=settings.checkpoint_compact_keep_turns,
+        compact_max_chars=settings.checkpoint_compact_max_chars,
+    )
+
+    # Introspect the catalog once; SQL tools and /database/schema read from it
+    schema_cache = SchemaCache(
+        db, refresh_interval_seconds=settings.schema_refresh_seconds
+    )
+    schema_cache.refresh()
+
+    # sql_db_query result cache; schema changes invalidate the affected tables
+    query_cache = QueryResultCache(
+        schema_cache.table_names,
+        max_bytes=settings.query_cache_max_mb * 1024 * 1024,
+        default_ttl_seconds=settings.query_cache_ttl_seconds,
+        table_ttls=settings.query_cache_table_ttls,
+    )
+    schema_cache.add_listener(query_cache.invalidate)
 
-    # ChromaDB vectorstore
+    # Read-only / row-limit / plan-cost checks in front of sql_db_query
+    sql_guard = SQLGuard(
+        db, max_rows=settings.sql_max_rows, max_cost=settings.sql_max_cost
+    )
+
+    # Vectorstore (Chroma server, embedded Chroma or flat index); chunk and
+    # query embeddings go through the cache
+    embedding_cache = None
+    if settings.embedding_cache_max_entries > 0:
+        embedding_cache = EmbeddingCache(
+            settings.embedding_cache_path,
+            max_entries=settings.embedding_cache_max_entries,
+        )
     vectorstore = create_vectorstore(
         host=settings.chroma_host,
         port=settings.chroma_port,
         embedding_model=settings.embedding_model,
+        embedding_cache=embedding_cache,
+        backend=settings.vectorstore_backend,
+        path=settings.vectorstore_path,
+    )
+
+    # BM25 keyword index over the same chunks, fused with vector search
+    lexical_index = None
+    if settings.retrieval_lexical_k > 0:
+        lexical_index = LexicalIndex(settings.lexical_index_path)
+        if lexical_index.count() == 0:
+            backfill_lexical_index(vectorstore, lexical_index)
+
+    # Cross-encoder reranking of retrieved candidates; the model loads in the
+    # background and retrieval order is used until it is ready
+    reranker = None
+    if settings.rerank_model:
+        reranker = CrossEncoderReranker(
+            settings.rerank_model,
+            batch_size=settings.rerank_batch_size,
+            timeout_seconds=settings.rerank_timeout_ms / 1000,
+        )
+        reranker.warm_up()
+
+    # Retrieval results cached until the next write to the collection
+    collection_version = CollectionVersion()
+    retrieval_cache = None
+    if settings.retrieval_cache_size > 0:
+        retrieval_cache = RetrievalCache(
+            collection_version,
+            max_size=settings.retrieval_cache_size,
+            ttl_seconds=settings.retrieval_cache_ttl_seconds,
+            similarity_threshold=settings.retrieval_cache_similarity,
+        )
+    retriever = HybridRetriever(
+        vectorstore,
+        lexical_index,
+        top_k=settings.retrieval_top_k,
+        vector_k=settings.retrieval_vector_k,
+        lexical_k=settings.retrieval_lexical_k,
+        reranker=reranker,
+        rerank_k=settings.rerank_candidates,
+        cache=retrieval_cache,
+    )
+
+    # Shared embedding pool for document ingestion
+    embedder = BatchEmbedder(
+        vectorstore.embeddings,
+        batch_size=settings.embedding_batch_size,
+        concurrency=settings.embedding_concurrency,
+    )
+
+    # Intent classification cache (reuses the vectorstore's embedding model)
+    intent_cache = IntentCache(
+        embeddings=vectorstore.embeddings if settings.intent_cache_similarity > 0 else None,
+        max_size=settings.intent_cache_size,
+        ttl_seconds=settings.intent_cache_ttl_seconds,
+        similarity_threshold=settings.intent_cache_similarity,
+    )
+
+    streaming = None
+    if settings.sql_stream_results:
+        streaming = {
+            "batch_size": settings.sql_stream_batch_size,
+            "preview_rows": settings.sql_summary_rows,
+        }
+
+    # Token-budgeted history per model call, shared by all agents
+    context_window = ContextWindowMiddleware(
+        max_tokens=settings.context_max_tokens,
+        tool_max_tokens=settings.context_tool_max_tokens,
+    )
+
+    # Running summary of older turns, refreshed in the background after each response
+    summarizer = ConversationSummarizer(
+        model,
+        trigger_tokens=settings.summary_trigger_tokens,
+        keep_recent_turns=settings.summary_keep_turns,
+        max_words=settings.summary_max_words,
     )
 
     # Create all three agents sharing the same memory
     agents = {
-        "sql": create_sql_agent(model, db, top_k=settings.top_k, checkpointer=memory),
-        "rag": create_rag_agent(model, vectorstore, checkpointer=memory),
+        "sql": create_sql_agent(
+            model,
+            db,
+            top_k=settings.top_k,
+            checkpointer=memory,
+            schema_cache=schema_cache,
+            query_cache=query_cache,
+            sql_guard=sql_guard,
+            streaming=streaming,
+            context_window=context_window,
+            summarizer=summarizer,
+        ),
+        "rag": create_rag_agent(
+            model,
+            vectorstore,
+            checkpointer=memory,
+            context_window=context_window,
+            summarizer=summarizer,
+            retriever=retriever,
+        ),
         "hybrid": create_hybrid_agent(
-            model, db, vectorstore, top_k=settings.top_k, checkpointer=memory
+            model,
+            db,
+            vectorstore,
+            top_k=settings.top_k,
+            checkpointer=memory,
+            schema_cache=schema_cache,
+            query_cache=query_cache,
+            sql_guard=sql_guard,
+            streaming=streaming,
+            context_window=context_window,
+            summarizer=summarizer,
+            retriever=retriever,
         ),
     }
 
@@ -55,4 +223,15 @@ def build_app(settings: Settings | None = None):
         "vectorstore": vectorstore,
         "settings": settings,
         "model": model,
+        "intent_cache": intent_cache,
+        "schema_cache": schema_cache,
+        "query_cache": query_cache,
+        "checkpointer": memory,
+        "summarizer": summarizer,
+        "embedder": embedder,
+        "embedding_cache": embedding_cache,
+        "lexical_index": lexical_index,
+        "reranker": reranker,
+        "collection_version": collection_version,
+        "retrieval_cache": retrieval_cache,
     }
@@ -0,0 +1,145 @@
+"""Small in-process caches shared by the request pipeline."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+_DEFAULT_TTL = object()
+
+
+class TTLCache:
+    """Thread-safe LRU cache with a per-entry time-to-live.
+
+    Entries are evicted least-recently-used first once ``max_size`` entries
+    (or, when a ``weigher`` is given, ``max_weight`` total weight) is
+    exceeded, and lazily dropped on access once older than their TTL
+    (``None`` disables expiry). Hit/miss counters are kept for ``stats()``.
+    """
+
+    def __init__(
+        self,
+        max_size: int | None = 1024,
+        ttl_seconds: float | None = 3600,
+        max_weight: int | None = None,
+        weigher: Callable[[object], int] | None = None,
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_weight = max_weight
+        self._weigher = weigher
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _expired(expires_at: float | None, now: float) -> bool:
+        return expires_at is not None and now > expires_at
+
+    def _remove(self, key) -> tuple:
+        entry = self._data.pop(key)
+        self.weight -= entry[2]
+        return entry
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[1], now):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl_seconds=_DEFAULT_TTL) -> bool:
+        """Store ``value``; ``ttl_seconds`` overrides the cache default.
+
+        Returns False (and stores nothing) if the value alone would exceed
+        ``max_weight``.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is _DEFAULT_TTL else ttl_seconds
+        weight = self._weigher(value) if self._weigher else 0
+        if self.max_weight is not None and weight > self.max_weight:
+            return False
+
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            self._data[key] = (value, expires_at, weight)
+            self.weight += weight
+            while self._data and (
+                (self.max_size is not None and len(self._data) > self.max_size)
+                or (self.max_weight is not None and self.weight > self.max_weight)
+            ):
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def pop(self, key, default=None):
+        with self._lock:
+            if key not in self._data:
+                return default
+            return self._remove(key)[0]
+
+    def items(self) -> list[tuple]:
+        """Snapshot of live ``(key, value)`` pairs; does not touch LRU order."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, value)
+                for key, (value, expires_at, _) in self._data.items()
+                if not self._expired(expires_at, now)
+            ]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.max_weight is not None:
+            stats["weight"] = self.weight
+            stats["max_weight"] = self.max_weight
+        return stats
+
+
+def most_similar(candidates: list[tuple], vector, threshold: float):
+    """Value of the ``(value, vector)`` candidate closest to ``vector``.
+
+    Similarity is cosine; candidates without a vector are skipped. Returns
+    None when ``vector`` is None, nothing is left to compare against, or
+    the best match is below ``threshold``.
+    """
+    candidates = [(value, cached) for value, cached in candidates if cached is not None]
+    if vector is None or not candidates:
+        return None
+
+    matrix = np.asarray([cached for _, cached in candidates], dtype=np.float32)
+    query = np.asarray(vector, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    similarities = matrix @ query / np.where(norms == 0, 1.0, norms)
+    best = int(np.argmax(similarities))
+    if similarities[best] < threshold:
+        return None
+    return candidates[best][0]
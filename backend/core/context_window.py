@@ -0,0 +1,148 @@
+"""Token-budgeted windowing of the conversation sent to the model."""
+
+import logging
+
+from langchain.agents.middleware import AgentMiddleware
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.messages.utils import count_tokens_approximately
+
+logger = logging.getLogger(__name__)
+
+# count_tokens_approximately assumes ~4 characters per token
+_CHARS_PER_TOKEN = 4
+
+
+def _tokens(messages) -> int:
+    return count_tokens_approximately(messages) if messages else 0
+
+
+def _split_turns(messages: list) -> tuple[list, list[list]]:
+    """Split history into leading messages and turns starting at each HumanMessage.
+
+    A turn holds the user message and every AIMessage/ToolMessage that
+    followed it, so dropping whole turns never separates tool calls from
+    their results.
+    """
+    preamble, turns = [], []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            turns.append([msg])
+        elif turns:
+            turns[-1].append(msg)
+        else:
+            preamble.append(msg)
+    return preamble, turns
+
+
+def _shrink_tool_message(msg: ToolMessage, max_tokens: int) -> ToolMessage:
+    content = msg.content if isinstance(msg.content, str) else str(msg.content)
+    limit = max_tokens * _CHARS_PER_TOKEN
+    if len(content) <= limit:
+        return msg
+    omitted = (len(content) - limit) // _CHARS_PER_TOKEN
+    return msg.model_copy(
+        update={
+            "content": f"{content[:limit]}\n[... ~{omitted} tokens of earlier tool output omitted]",
+            "artifact": None,
+        }
+    )
+
+
+def fit_to_budget(
+    messages: list,
+    max_tokens: int,
+    tool_max_tokens: int = 500,
+    reserved_tokens: int = 0,
+) -> list:
+    """Return the messages that fit within ``max_tokens``.
+
+    The current (last) turn and any messages before the first user turn
+    (e.g. a conversation summary) are always kept. When over budget, bulky
+    ``ToolMessage`` outputs are shortened to ``tool_max_tokens``, oldest
+    first: those of earlier turns, then those of the current turn that the
+    model has already answered with a later ``AIMessage``. Only then are the
+    oldest whole turns dropped.
+
+    Args:
+        messages: Conversation history from the agent state.
+        max_tokens: Token budget for the whole prompt.
+        tool_max_tokens: Size earlier tool outputs are shortened to.
+        reserved_tokens: Tokens already used elsewhere, e.g. the system prompt.
+    """
+    budget = max_tokens - reserved_tokens
+    if _tokens(messages) <= budget:
+        return messages
+
+    preamble, turns = _split_turns(messages)
+    if not turns:
+        return messages
+
+    history, current = turns[:-1], list(turns[-1])
+    sizes = [_tokens(turn) for turn in history]
+    fixed = _tokens(preamble) + _tokens(current)
+
+    # 1. Shorten earlier tool outputs, oldest turn first
+    for i, turn in enumerate(history):
+        if fixed + sum(sizes) <= budget:
+            break
+        history[i] = [
+            _shrink_tool_message(msg, tool_max_tokens) if isinstance(msg, ToolMessage) else msg
+            for msg in turn
+        ]
+        sizes[i] = _tokens(history[i])
+
+    # 2. Shorten tool outputs of the current turn that precede its latest
+    #    AIMessage; the results the model is about to read stay intact
+    answered = max(
+        (i for i, msg in enumerate(current) if isinstance(msg, AIMessage)), default=0
+    )
+    for i in range(answered):
+        if fixed + sum(sizes) <= budget:
+            break
+        if isinstance(current[i], ToolMessage):
+            current[i] = _shrink_tool_message(current[i], tool_max_tokens)
+            fixed = _tokens(preamble) + _tokens(current)
+
+    # 3. Drop the oldest turns until the rest fits
+    while history and fixed + sum(sizes) > budget:
+        history.pop(0)
+        sizes.pop(0)
+
+    return preamble + [msg for turn in history for msg in turn] + current
+
+
+class ContextWindowMiddleware(AgentMiddleware):
+    """Fit the messages of every model call into a token budget.
+
+    Only the request sent to the model is windowed; the checkpointed thread
+    history is left intact so it can still be displayed in full.
+    """
+
+    def __init__(self, max_tokens: int = 8000, tool_max_tokens: int = 500):
+        super().__init__()
+        self.max_tokens = max_tokens
+        self.tool_max_tokens = tool_max_tokens
+
+    def _window(self, request):
+        if not self.max_tokens:
+            return request
+        reserved = _tokens([request.system_message]) if request.system_message else 0
+        messages = fit_to_budget(
+            request.messages, self.max_tokens, self.tool_max_tokens, reserved
+        )
+        if messages is request.messages:
+            return request
+        logger.info(
+            "[context] Windowed %d messages (~%d tokens) to %d (~%d tokens)",
+            len(request.messages),
+            _tokens(request.messages),
+            len(messages),
+            _tokens(messages),
+        )
+        return request.override(messages=messages)
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._window(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._window(request))
@@ -1,6 +1,9 @@
 import logging
+import re
 from typing import Literal
 
+from core.cache import TTLCache, most_similar
+
 logger = logging.getLogger("intent_classifier")
 
 CLASSIFICATION_PROMPT = """You are a router. Classify the user question into ONE category:
@@ -21,55 +24,301 @@ Question: {question}
 Respond with ONLY one word: sql, rag, or hybrid"""
 
 
+# ---------------------------------------------------------------------------
+# Local first-stage router
+# ---------------------------------------------------------------------------
+
+# Curated vocabulary per label. Kept to words that point at one source on
+# their own; anything ambiguous is left to the LLM.
+_KEYWORDS: dict[str, frozenset[str]] = {
+    "sql": frozenset(
+        {
+            "many", "count", "counts", "number", "total", "sum", "average",
+            "avg", "mean", "max", "maximum", "min", "minimum", "top",
+            "highest", "lowest", "most", "least", "database", "table",
+            "tables", "column", "columns", "row", "rows", "record", "records",
+            "query", "sql", "sales", "revenue", "orders", "invoice",
+            "invoices", "customers", "employees", "tracks", "albums",
+            "artists", "per", "group", "grouped", "list", "sorted", "rank",
+            "ranking", "distinct", "breakdown",
+        }
+    ),
+    "rag": frozenset(
+        {
+            "document", "documents", "doc", "docs", "pdf", "pdfs", "file",
+            "files", "uploaded", "upload", "policy", "policies", "procedure",
+            "procedures", "handbook", "manual", "guide", "guidelines",
+            "report", "reports", "memo", "contract", "contracts", "clause",
+            "section", "sections", "page", "pages", "summarize", "summarise",
+            "summary", "explain", "according", "says", "mention", "mentions",
+        }
+    ),
+    # Cue words that ask to relate the two sources
+    "hybrid": frozenset(
+        {
+            "compare", "comparison", "versus", "vs", "match", "matches",
+            "reconcile", "consistent", "against", "both", "discrepancy",
+            "discrepancies", "differ", "differs",
+        }
+    ),
+}
+
+
+def _tokenize(text: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class LocalIntentRouter:
+    """Keyword-overlap classifier in front of the LLM router.
+
+    A question is scored by how many of its tokens hit the database and the
+    document vocabularies. Hits on only one of them pick that label, with
+    a confidence that grows with the number of hits up to ``min_evidence``.
+    Hits on both are ``hybrid`` when a cue word (compare, match, ...) asks
+    to relate the sources, and are otherwise left to the LLM (confidence 0).
+    """
+
+    def __init__(
+        self,
+        keywords: dict[str, frozenset[str]] = _KEYWORDS,
+        min_evidence: int = 2,
+    ):
+        self.min_evidence = min_evidence
+        self.vocabulary = {label: set(words) for label, words in keywords.items()}
+
+    def score(self, question: str) -> tuple[str, float]:
+        """Return ``(label, confidence)`` with confidence in ``[0, 1]``."""
+        tokens = _tokenize(question)
+        sql = len(tokens & self.vocabulary["sql"])
+        rag = len(tokens & self.vocabulary["rag"])
+        cues = len(tokens & self.vocabulary["hybrid"])
+
+        if sql and rag:
+            if not cues:
+                return ("sql" if sql >= rag else "rag"), 0.0
+            return "hybrid", min(1.0, (cues + min(sql, rag)) / self.min_evidence)
+        if not sql and not rag:
+            return "sql", 0.0
+        label, hits = ("sql", sql) if sql else ("rag", rag)
+        return label, min(1.0, hits / self.min_evidence)
+
+
+_local_router = LocalIntentRouter()
+
+
+# ---------------------------------------------------------------------------
+# Classification cache
+# ---------------------------------------------------------------------------
+
+
+def _normalize_question(question: str) -> str:
+    return " ".join(re.findall(r"[a-z0-9']+", question.lower()))
+
+
+class IntentCache:
+    """Cache of classification results for rephrased and repeated questions.
+
+    Lookups first match the normalized question text exactly. When an
+    ``embeddings`` instance is given, a miss falls back to the most similar
+    cached question by cosine similarity, accepted above
+    ``similarity_threshold``.
+    """
+
+    def __init__(
+        self,
+        embeddings=None,
+        max_size: int = 1024,
+        ttl_seconds: float | None = 3600,
+        similarity_threshold: float = 0.92,
+    ):
+        self.embeddings = embeddings
+        self.similarity_threshold = similarity_threshold
+        self._entries = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.semantic_hits = 0
+
+    def get(self, question: str) -> str | None:
+        """Exact lookup on the normalized question."""
+        entry = self._entries.get(_normalize_question(question))
+        return entry[0] if entry else None
+
+    def nearest(self, vector) -> str | None:
+        """Return the label of the most similar cached question, if close enough."""
+        label = most_similar(
+            [entry for _, entry in self._entries.items()], vector, self.similarity_threshold
+        )
+        if label is not None:
+            self.semantic_hits += 1
+        return label
+
+    def set(self, question: str, label: str, vector=None) -> None:
+        self._entries.set(_normalize_question(question), (label, vector))
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "semantic_hits": self.semantic_hits,
+            "semantic": self.embeddings is not None,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Classification
+# ---------------------------------------------------------------------------
+
+
+def _parse_classification(response, question: str) -> Literal["sql", "rag", "hybrid"]:
+    """Normalize the raw LLM router response into a mode."""
+    if hasattr(response, 'content'):
+        classification = response.content.strip().lower()
+    else:
+        classification = str(response).strip().lower()
+
+    if "sql" in classification:
+        return "sql"
+    if "rag" in classification:
+        return "rag"
+    if "hybrid" in classification:
+        return "hybrid"
+
+    # Default to sql if unclear
+    logger.warning(
+        f"Unclear classification '{classification}' for question: '{question[:50]}...'. "
+        "Defaulting to 'sql'"
+    )
+    return "sql"
+
+
+def _classify_locally(question: str, threshold: float) -> str | None:
+    """Return the local router's answer, or None if it should escalate."""
+    label, confidence = _local_router.score(question)
+    if confidence >= threshold:
+        logger.info(
+            f"Intent classified locally as '{label}' (confidence {confidence:.2f}) "
+            f"for question: '{question[:50]}...'"
+        )
+        return label
+    return None
+
+
+def _classify_without_llm(question: str, threshold: float, cache: IntentCache | None):
+    """Cheap stages shared by the sync and async paths: exact cache, local router."""
+    if cache:
+        cached = cache.get(question)
+        if cached:
+            logger.info(f"Intent cache hit '{cached}' for question: '{question[:50]}...'")
+            return cached
+
+    local = _classify_locally(question, threshold)
+    if local and cache:
+        cache.set(question, local)
+    return local
+
+
+def _classify_from_similar(question: str, vector, cache: IntentCache) -> str | None:
+    """Label of an embedding-nearest cached question, cached for this one too."""
+    similar = cache.nearest(vector)
+    if similar:
+        cache.set(question, similar, vector)
+    return similar
+
+
+def _embedding_failed(question: str, error: Exception) -> None:
+    logger.warning(
+        f"Intent embedding lookup failed for question '{question[:50]}...': {error}. "
+        "Asking the LLM"
+    )
+
+
+def _classify_from_response(
+    question: str, response, cache: IntentCache | None, vector=None
+) -> Literal["sql", "rag", "hybrid"]:
+    """Parse the LLM router's response, log it and cache it."""
+    result = _parse_classification(response, question)
+    logger.info(f"Intent classified as '{result}' for question: '{question[:50]}...'")
+    if cache:
+        cache.set(question, result, vector)
+    return result
+
+
+def _llm_failed(question: str, error: Exception) -> Literal["sql"]:
+    logger.error(
+        f"Error classifying intent for question '{question[:50]}...': {error}. "
+        "Defaulting to 'sql'"
+    )
+    return "sql"
+
+
 def classify_intent(
-    question: str, 
-    model
+    question: str,
+    model,
+    threshold: float = 0.6,
+    cache: IntentCache | None = None,
 ) -> Literal["sql", "rag", "hybrid"]:
     """Classify user question intent to route to appropriate agent.
-    
+
+    Stages, cheapest first: the classification cache (exact, then
+    embedding-nearest when enabled), the local keyword router, and finally
+    the LLM when the router's confidence is below ``threshold``.
+
     Args:
         question: The user's question
         model: The LangChain chat model instance
-        
+        threshold: Minimum local-router confidence to skip the LLM
+        cache: Optional IntentCache shared across requests
+
     Returns:
         One of: "sql", "rag", "hybrid"
     """
-    try:
-        # Format the prompt with the question
-        prompt = CLASSIFICATION_PROMPT.format(question=question)
-        
-        # Invoke the model
-        response = model.invoke(prompt)
-        
-        # Extract the classification from response
-        if hasattr(response, 'content'):
-            classification = response.content.strip().lower()
-        else:
-            classification = str(response).strip().lower()
-        
-        # Validate and normalize the response
-        if "sql" in classification:
-            result = "sql"
-        elif "rag" in classification:
-            result = "rag"
-        elif "hybrid" in classification:
-            result = "hybrid"
+    result = _classify_without_llm(question, threshold, cache)
+    if result:
+        return result
+
+    vector = None
+    if cache and cache.embeddings is not None:
+        try:
+            vector = cache.embeddings.embed_query(question)
+        except Exception as e:
+            _embedding_failed(question, e)
         else:
-            # Default to sql if unclear
-            logger.warning(
-                f"Unclear classification '{classification}' for question: '{question[:50]}...'. "
-                "Defaulting to 'sql'"
-            )
-            result = "sql"
-        
-        logger.info(
-            f"Intent classified as '{result}' for question: '{question[:50]}...'"
-        )
+            similar = _classify_from_similar(question, vector, cache)
+            if similar:
+                return similar
+
+    try:
+        response = model.invoke(CLASSIFICATION_PROMPT.format(question=question))
+    except Exception as e:
+        return _llm_failed(question, e)
+    return _classify_from_response(question, response, cache, vector)
+
+
+async def aclassify_intent(
+    question: str,
+    model,
+    threshold: float = 0.6,
+    cache: IntentCache | None = None,
+) -> Literal["sql", "rag", "hybrid"]:
+    """Async variant of :func:`classify_intent` using ``model.ainvoke``.
+
+    Safe to await from request handlers: the embedding lookup and the LLM
+    round-trip do not block the event loop.
+    """
+    result = _classify_without_llm(question, threshold, cache)
+    if result:
         return result
-        
+
+    vector = None
+    if cache and cache.embeddings is not None:
+        try:
+            vector = await cache.embeddings.aembed_query(question)
+        except Exception as e:
+            _embedding_failed(question, e)
+        else:
+            similar = _classify_from_similar(question, vector, cache)
+            if similar:
+                return similar
+
+    try:
+        response = await model.ainvoke(CLASSIFICATION_PROMPT.format(question=question))
     except Exception as e:
-        logger.error(
-            f"Error classifying intent for question '{question[:50]}...': {e}. "
-            "Defaulting to 'sql'"
-        )
-        return "sql"
+        return _llm_failed(question, e)
+    return _classify_from_response(question, response, cache, vector)
@@ -8,6 +8,17 @@ def _cors_origins() -> tuple[str, ...]:
     return tuple(o.strip() for o in raw.split(",") if o.strip())
 
 
+def _query_cache_table_ttls() -> dict[str, int]:
+    """Parse ``QUERY_CACHE_TABLE_TTLS``, e.g. ``Invoice=60,Genre=86400``."""
+    raw = os.getenv("QUERY_CACHE_TABLE_TTLS", "")
+    ttls = {}
+    for pair in raw.split(","):
+        if "=" in pair:
+            table, ttl = pair.split("=", 1)
+            ttls[table.strip()] = int(ttl)
+    return ttls
+
+
 @dataclass(frozen=True)
 class Settings:
     # LLM
@@ -36,6 +47,125 @@ class Settings:
     )
     top_k: int = field(default_factory=lambda: int(os.getenv("TOP_K", "5")))
 
+    # Connection pool
+    db_pool_size: int = field(
+        default_factory=lambda: int(os.getenv("DB_POOL_SIZE", "5"))
+    )
+    db_max_overflow: int = field(
+        default_factory=lambda: int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    )
+    db_pool_recycle: int = field(
+        default_factory=lambda: int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    )
+    db_pool_pre_ping: bool = field(
+        default_factory=lambda: os.getenv("DB_POOL_PRE_PING", "true").lower()
+        in ("1", "true", "yes")
+    )
+    db_pool_timeout: int = field(
+        default_factory=lambda: int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    )
+    db_statement_timeout: int = field(
+        default_factory=lambda: int(os.getenv("DB_STATEMENT_TIMEOUT", "30"))
+    )
+
+    # Schema cache: seconds between catalog refreshes (0 = only on demand)
+    schema_refresh_seconds: int = field(
+        default_factory=lambda: int(os.getenv("SCHEMA_REFRESH_SECONDS", "900"))
+    )
+
+    # SQL guard: row cap injected into queries, max optimizer cost (0 = off)
+    sql_max_rows: int = field(
+        default_factory=lambda: int(os.getenv("SQL_MAX_ROWS", "200"))
+    )
+    sql_max_cost: float = field(
+        default_factory=lambda: float(os.getenv("SQL_MAX_COST", "0"))
+    )
+
+    # Streamed SQL results: rows go to the client in batches, the agent
+    # only sees a summary with the first SQL_SUMMARY_ROWS rows. SQL_MAX_ROWS
+    # still caps the whole result, so the batch size must be below it for
+    # rows to arrive in more than one batch
+    sql_stream_results: bool = field(
+        default_factory=lambda: os.getenv("SQL_STREAM_RESULTS", "false").lower()
+        in ("1", "true", "yes")
+    )
+    sql_stream_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("SQL_STREAM_BATCH_SIZE", "50"))
+    )
+    sql_summary_rows: int = field(
+        default_factory=lambda: int(os.getenv("SQL_SUMMARY_ROWS", "20"))
+    )
+
+    # SQL query result cache (TTL 0 disables caching)
+    query_cache_max_mb: int = field(
+        default_factory=lambda: int(os.getenv("QUERY_CACHE_MAX_MB", "64"))
+    )
+    query_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("QUERY_CACHE_TTL_SECONDS", "300"))
+    )
+    query_cache_table_ttls: dict[str, int] = field(
+        default_factory=_query_cache_table_ttls
+    )
+
+    # Intent routing: local keyword router confidence needed to skip the LLM
+    intent_local_threshold: float = field(
+        default_factory=lambda: float(os.getenv("INTENT_LOCAL_THRESHOLD", "0.6"))
+    )
+    intent_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("INTENT_CACHE_SIZE", "1024"))
+    )
+    intent_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("INTENT_CACHE_TTL_SECONDS", "3600"))
+    )
+    # Set to 0 to disable the embedding-nearest-neighbour lookup
+    intent_cache_similarity: float = field(
+        default_factory=lambda: float(os.getenv("INTENT_CACHE_SIMILARITY", "0.92"))
+    )
+
+    # Conversation checkpoints: SQLAlchemy URL ("memory" = in-process),
+    # retention and compaction of old tool outputs
+    checkpoint_url: str = field(
+        default_factory=lambda: os.getenv("CHECKPOINT_URL", "sqlite:///checkpoints.db")
+    )
+    checkpoint_max_per_thread: int = field(
+        default_factory=lambda: int(os.getenv("CHECKPOINT_MAX_PER_THREAD", "20"))
+    )
+    checkpoint_retention_days: float = field(
+        default_factory=lambda: float(os.getenv("CHECKPOINT_RETENTION_DAYS", "0"))
+    )
+    checkpoint_compact_interval_seconds: int = field(
+        default_factory=lambda: int(
+            os.getenv("CHECKPOINT_COMPACT_INTERVAL_SECONDS", "600")
+        )
+    )
+    checkpoint_compact_keep_turns: int = field(
+        default_factory=lambda: int(os.getenv("CHECKPOINT_COMPACT_KEEP_TURNS", "2"))
+    )
+    checkpoint_compact_max_chars: int = field(
+        default_factory=lambda: int(os.getenv("CHECKPOINT_COMPACT_MAX_CHARS", "2000"))
+    )
+
+    # Context window: token budget per model call (0 = full history) and the
+    # size earlier tool outputs are cut to before whole turns are dropped
+    context_max_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CONTEXT_MAX_TOKENS", "8000"))
+    )
+    context_tool_max_tokens: int = field(
+        default_factory=lambda: int(os.getenv("CONTEXT_TOOL_MAX_TOKENS", "500"))
+    )
+
+    # Rolling summary: generated after a response once the unsummarized
+    # history exceeds SUMMARY_TRIGGER_TOKENS (0 = off)
+    summary_trigger_tokens: int = field(
+        default_factory=lambda: int(os.getenv("SUMMARY_TRIGGER_TOKENS", "4000"))
+    )
+    summary_keep_turns: int = field(
+        default_factory=lambda: int(os.getenv("SUMMARY_KEEP_TURNS", "2"))
+    )
+    summary_max_words: int = field(
+        default_factory=lambda: int(os.getenv("SUMMARY_MAX_WORDS", "200"))
+    )
+
     # CORS
     cors_origins: tuple[str, ...] = field(default_factory=_cors_origins)
 
@@ -46,6 +176,56 @@ class Settings:
     chroma_port: int = field(
         default_factory=lambda: int(os.getenv("CHROMA_PORT", "8100"))
     )
+    # "http" = ChromaDB server above; "persistent" = embedded Chroma in
+    # VECTORSTORE_PATH; "flat" = in-process NumPy index in VECTORSTORE_PATH
+    vectorstore_backend: str = field(
+        default_factory=lambda: os.getenv("VECTORSTORE_BACKEND", "http")
+    )
+    vectorstore_path: str = field(
+        default_factory=lambda: os.getenv("VECTORSTORE_PATH", "vectorstore")
+    )
+
+    # Retrieval: chunks handed to the agent, candidates per source fused by
+    # reciprocal rank fusion (lexical k 0 = similarity search only)
+    retrieval_top_k: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_TOP_K", "3"))
+    )
+    retrieval_vector_k: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_VECTOR_K", "10"))
+    )
+    retrieval_lexical_k: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_LEXICAL_K", "10"))
+    )
+    lexical_index_path: str = field(
+        default_factory=lambda: os.getenv("LEXICAL_INDEX_PATH", "lexical_index.db")
+    )
+    # Cross-encoder rescoring of the best RERANK_CANDIDATES retrieved chunks
+    # (empty model = off); over the time budget the retrieval order is kept
+    rerank_model: str = field(
+        default_factory=lambda: os.getenv(
+            "RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+        )
+    )
+    rerank_candidates: int = field(
+        default_factory=lambda: int(os.getenv("RERANK_CANDIDATES", "20"))
+    )
+    rerank_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("RERANK_BATCH_SIZE", "32"))
+    )
+    rerank_timeout_ms: int = field(
+        default_factory=lambda: int(os.getenv("RERANK_TIMEOUT_MS", "500"))
+    )
+    # Retrieval result cache, cleared whenever the collection changes (size
+    # 0 = off); similarity > 0 also serves near-identical queries from it
+    retrieval_cache_size: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_CACHE_SIZE", "1024"))
+    )
+    retrieval_cache_ttl_seconds: int = field(
+        default_factory=lambda: int(os.getenv("RETRIEVAL_CACHE_TTL_SECONDS", "600"))
+    )
+    retrieval_cache_similarity: float = field(
+        default_factory=lambda: float(os.getenv("RETRIEVAL_CACHE_SIMILARITY", "0"))
+    )
 
     # Document upload
     upload_dir: str = field(
@@ -56,6 +236,41 @@ class Settings:
     )
     allowed_file_types: tuple[str, ...] = ("pdf", "csv", "txt", "docx")
 
+    # Background ingestion: worker threads and retries of failed embedding batches
+    ingestion_workers: int = field(
+        default_factory=lambda: int(os.getenv("INGESTION_WORKERS", "2"))
+    )
+    ingestion_max_retries: int = field(
+        default_factory=lambda: int(os.getenv("INGESTION_MAX_RETRIES", "3"))
+    )
+    ingestion_retry_backoff_seconds: float = field(
+        default_factory=lambda: float(os.getenv("INGESTION_RETRY_BACKOFF_SECONDS", "2"))
+    )
+    # Pages (CSV rows) streamed through load/split/embed at a time, and worker
+    # processes parsing page ranges of long PDFs in parallel (0 = parse inline)
+    ingestion_page_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("INGESTION_PAGE_BATCH_SIZE", "32"))
+    )
+    ingestion_parse_workers: int = field(
+        default_factory=lambda: int(os.getenv("INGESTION_PARSE_WORKERS", "0"))
+    )
+    # Chunks per embedding call; concurrent calls for remote providers
+    # (local HuggingFace models always use one dedicated thread)
+    embedding_batch_size: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+    )
+    embedding_concurrency: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_CONCURRENCY", "4"))
+    )
+
+    # Persistent embedding cache keyed by model + content hash (0 = off)
+    embedding_cache_path: str = field(
+        default_factory=lambda: os.getenv("EMBEDDING_CACHE_PATH", "embedding_cache.db")
+    )
+    embedding_cache_max_entries: int = field(
+        default_factory=lambda: int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000"))
+    )
+
     # Embeddings
     embedding_model: str = field(
         default_factory=lambda: os.getenv(
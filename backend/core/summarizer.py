@@ -0,0 +1,194 @@
+"""Rolling conversation summaries, generated in the background between turns."""
+
+import asyncio
+import logging
+import threading
+
+from langchain.agents.middleware import AgentMiddleware, AgentState
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from typing_extensions import NotRequired
+
+from core.context_window import _shrink_tool_message, _split_turns, _tokens
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a data assistant that answers questions with SQL queries and uploaded documents.
+
+Update the summary with the new part of the conversation below. Keep facts the user may refer back to: the questions asked, tables, columns, filters and SQL used, key numbers and answers, document names, and the user's stated preferences. Drop pleasantries and raw result rows. Write at most {max_words} words of plain text.
+
+Current summary:
+{summary}
+
+New conversation:
+{transcript}
+
+Updated summary:"""
+
+
+class SummaryState(AgentState):
+    """Agent state extended with the running conversation summary."""
+
+    summary: NotRequired[str]
+    # Id of the last message folded into ``summary``
+    summary_through: NotRequired[str]
+
+
+def _render_transcript(messages: list, tool_max_tokens: int = 200) -> str:
+    lines = []
+    for msg in messages:
+        if isinstance(msg, HumanMessage):
+            lines.append(f"User: {msg.text}")
+        elif isinstance(msg, AIMessage):
+            for call in msg.tool_calls:
+                lines.append(f"Assistant called {call['name']}({call['args']})")
+            if msg.text:
+                lines.append(f"Assistant: {msg.text}")
+        elif isinstance(msg, ToolMessage):
+            lines.append(f"Tool result: {_shrink_tool_message(msg, tool_max_tokens).text}")
+    return "\n".join(lines)
+
+
+class ConversationSummarizer(AgentMiddleware):
+    """Fold older turns of a thread into a running summary.
+
+    After a response has been streamed, ``schedule()`` checks the thread in
+    the background: once the messages not yet summarized exceed
+    ``trigger_tokens``, every turn except the last ``keep_recent_turns`` is
+    condensed (together with the previous summary) by the model and stored
+    in the checkpoint as ``summary`` / ``summary_through``. The raw messages
+    stay in the checkpoint; as middleware, this class replaces the
+    summarized ones with the summary in each model request.
+    """
+
+    state_schema = SummaryState
+
+    def __init__(
+        self,
+        model,
+        trigger_tokens: int = 4000,
+        keep_recent_turns: int = 2,
+        max_words: int = 200,
+    ):
+        super().__init__()
+        self.model = model
+        self.trigger_tokens = trigger_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_words = max_words
+        self._running: set[str] = set()
+        self._lock = threading.Lock()
+        self._tasks: set[asyncio.Task] = set()
+
+    # ----- model requests -----
+
+    @staticmethod
+    def _unsummarized(messages: list, state: dict) -> list | None:
+        """Messages after ``summary_through``, or None if there is no summary."""
+        through = state.get("summary_through")
+        if not state.get("summary") or not through:
+            return None
+        for i, msg in enumerate(messages):
+            if msg.id == through:
+                return messages[i + 1 :]
+        return None
+
+    def _condense(self, request):
+        remaining = self._unsummarized(request.messages, request.state)
+        if remaining is None:
+            return request
+        summary = f"Summary of the earlier conversation:\n{request.state['summary']}"
+        if request.system_message is not None:
+            summary = f"{request.system_message.text}\n\n{summary}"
+        return request.override(
+            system_message=SystemMessage(content=summary), messages=remaining
+        )
+
+    def wrap_model_call(self, request, handler):
+        return handler(self._condense(request))
+
+    async def awrap_model_call(self, request, handler):
+        return await handler(self._condense(request))
+
+    # ----- background summarization -----
+
+    def _pending_turns(self, values: dict) -> list[list] | None:
+        """Turns to fold into the summary, or None if the thread is short enough."""
+        messages = values.get("messages", [])
+        remaining = self._unsummarized(messages, values)
+        if remaining is None:
+            remaining = messages
+        if _tokens(remaining) <= self.trigger_tokens:
+            return None
+        _, turns = _split_turns(remaining)
+        if len(turns) <= self.keep_recent_turns:
+            return None
+        return turns[: len(turns) - self.keep_recent_turns]
+
+    def _prompt(self, values: dict, turns: list[list]) -> str:
+        return SUMMARY_PROMPT.format(
+            max_words=self.max_words,
+            summary=values.get("summary") or "(none yet)",
+            transcript=_render_transcript([msg for turn in turns for msg in turn]),
+        )
+
+    async def asummarize(self, agent, thread_id: str) -> bool:
+        """Update the summary of ``thread_id`` if it has grown past the trigger.
+
+        Summaries of one thread are serialized: while one is in flight,
+        further calls return False without reading or writing the thread.
+        """
+        if not self._claim(thread_id):
+            return False
+        try:
+            config = {"configurable": {"thread_id": thread_id}}
+            state = await agent.aget_state(config)
+            values = state.values or {}
+            turns = self._pending_turns(values)
+            if not turns:
+                return False
+            response = await self.model.ainvoke(self._prompt(values, turns))
+            await agent.aupdate_state(
+                config, {"summary": response.text.strip(), "summary_through": turns[-1][-1].id}
+            )
+        finally:
+            self._release(thread_id)
+        logger.info("[summary] Folded %d turns of thread %s into the summary", len(turns), thread_id)
+        return True
+
+    def _claim(self, thread_id: str) -> bool:
+        with self._lock:
+            if thread_id in self._running:
+                return False
+            self._running.add(thread_id)
+            return True
+
+    def _release(self, thread_id: str) -> None:
+        with self._lock:
+            self._running.discard(thread_id)
+
+    async def _run(self, agent, thread_id: str) -> None:
+        try:
+            await self.asummarize(agent, thread_id)
+        except Exception as e:
+            logger.warning("[summary] Summarizing thread %s failed: %s", thread_id, e)
+
+    def schedule(self, agent, thread_id: str) -> None:
+        """Summarize ``thread_id`` in the background without blocking the caller.
+
+        Runs as an asyncio task when called from the event loop, otherwise on
+        a private event loop in a daemon thread.
+        """
+        if not self.trigger_tokens:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            threading.Thread(
+                target=asyncio.run,
+                args=(self._run(agent, thread_id),),
+                name="summarizer",
+                daemon=True,
+            ).start()
+            return
+        task = loop.create_task(self._run(agent, thread_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
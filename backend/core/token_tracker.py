@@ -56,6 +56,13 @@ class TokenTracker(BaseCallbackHandler):
         super().__init__()
         self.total_input = 0
         self.total_output = 0
+        self.cancelled = False
+        self.cancel_reason: str | None = None
+
+    def mark_cancelled(self, reason: str) -> None:
+        """Record that the run was abandoned before completing."""
+        self.cancelled = True
+        self.cancel_reason = reason
 
     # ----- primary: read directly from AIMessage -----
 
@@ -111,8 +118,12 @@ class TokenTracker(BaseCallbackHandler):
     # ----- summary -----
 
     def summary(self) -> dict:
-        return {
+        summary = {
             "total_input_tokens": self.total_input,
             "total_output_tokens": self.total_output,
             "total_tokens": self.total_input + self.total_output,
+            "cancelled": self.cancelled,
         }
+        if self.cancelled:
+            summary["cancel_reason"] = self.cancel_reason
+        return summary
@@ -6,6 +6,7 @@ from core.app import build_app
 from core.settings import Settings
 from services.thread_store import ThreadStore
 from services.document_store import DocumentStore
+from services.ingestion_queue import IngestionQueue
 from api.routes import chat, threads, database, documents
 from pathlib import Path
 from dotenv import load_dotenv
@@ -26,9 +27,45 @@ async def lifespan(app: FastAPI):
     app.state.vectorstore = components["vectorstore"]
     app.state.settings = components["settings"]
     app.state.model = components["model"]
+    app.state.intent_cache = components["intent_cache"]
+    app.state.schema_cache = components["schema_cache"]
+    app.state.query_cache = components["query_cache"]
+    app.state.checkpointer = components["checkpointer"]
+    app.state.summarizer = components["summarizer"]
+    app.state.embedder = components["embedder"]
+    app.state.embedding_cache = components["embedding_cache"]
+    app.state.lexical_index = components["lexical_index"]
+    app.state.reranker = components["reranker"]
+    app.state.collection_version = components["collection_version"]
+    app.state.retrieval_cache = components["retrieval_cache"]
     app.state.thread_store = ThreadStore()
     app.state.document_store = DocumentStore()
+    app.state.ingestion_queue = IngestionQueue(
+        app.state.document_store,
+        app.state.vectorstore,
+        workers=app.state.settings.ingestion_workers,
+        max_retries=app.state.settings.ingestion_max_retries,
+        retry_backoff_seconds=app.state.settings.ingestion_retry_backoff_seconds,
+        embedder=app.state.embedder,
+        page_batch_size=app.state.settings.ingestion_page_batch_size,
+        parse_workers=app.state.settings.ingestion_parse_workers,
+        lexical_index=app.state.lexical_index,
+        collection_version=app.state.collection_version,
+    )
+    app.state.ingestion_queue.resume_pending()
     yield
+    app.state.ingestion_queue.shutdown()
+    app.state.embedder.shutdown()
+    if app.state.reranker is not None:
+        app.state.reranker.shutdown()
+    if hasattr(app.state.vectorstore, "close"):
+        app.state.vectorstore.close()
+    if hasattr(app.state.checkpointer, "close"):
+        app.state.checkpointer.close()
+    if app.state.embedding_cache is not None:
+        app.state.embedding_cache.close()
+    if app.state.lexical_index is not None:
+        app.state.lexical_index.close()
 
 
 # Settings are loaded after dotenv in build_app, but we need them for
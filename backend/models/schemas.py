@@ -1,26 +1,41 @@
+from datetime import date
 from pydantic import BaseModel
 from typing import Literal
 
 
+class RetrievalFilter(BaseModel):
+    """Restricts document retrieval; unset fields do not filter."""
+
+    document_ids: list[str] | None = None
+    file_types: list[str] | None = None
+    uploaded_from: date | None = None
+    uploaded_to: date | None = None
+
+
 class ChatRequest(BaseModel):
     thread_id: str
     question: str
     mode: Literal["sql", "rag", "hybrid"] | None = None
+    filters: RetrievalFilter | None = None
 
 
 class ThreadCreate(BaseModel):
     title: str | None = None
     mode: str = "sql"
+    document_ids: list[str] | None = None
 
 
 class ThreadUpdate(BaseModel):
     title: str | None = None
+    # Pin retrieval to these documents; [] unpins
+    document_ids: list[str] | None = None
 
 
 class ThreadResponse(BaseModel):
     id: str
     title: str
     mode: str
+    document_ids: list[str] = []
     created_at: str
     updated_at: str
 
@@ -40,6 +55,22 @@ class ThreadDetailResponse(ThreadResponse):
 
 class DatabaseSchemaResponse(BaseModel):
     tables: list[dict]
+    total: int = 0
+    offset: int = 0
+    limit: int | None = None
+    version: int = 0
+
+
+class TableSchemaResponse(BaseModel):
+    name: str
+    columns: list[dict]
+    primary_key: list[str] = []
+    foreign_keys: list[dict] = []
+    info: str
+
+
+class QueryCacheInvalidateRequest(BaseModel):
+    tables: list[str] | None = None
 
 
 class TablePreviewResponse(BaseModel):
@@ -57,4 +88,18 @@ class DocumentResponse(BaseModel):
     status: str
     chunk_count: int
     error_message: str | None = None
+    progress: dict | None = None
+    version: int = 1
     created_at: str
+    updated_at: str | None = None
+    duplicate: bool = False
+
+
+class UploadError(BaseModel):
+    filename: str
+    detail: str
+
+
+class BulkUploadResponse(BaseModel):
+    documents: list[DocumentResponse]
+    errors: list[UploadError]
@@ -1,6 +1,12 @@
+import threading
+import time
 from pathlib import Path
 import requests
 from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
 
 
 def ensure_database_file(url: str, path: Path) -> Path:
@@ -18,6 +24,119 @@ def ensure_database_file(url: str, path: Path) -> Path:
 #     return SQLDatabase.from_uri(f"sqlite:///{resolved.as_posix()}")
 
 
-def get_database(connection_string: str, **kwargs) -> SQLDatabase:
-    """Connect to database using the provided SQLAlchemy connection string."""
-    return SQLDatabase.from_uri(connection_string)
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            with self._stats_lock:
+                self.checkouts += 1
+                self.wait_seconds_total += waited
+                self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+
+def _set_statement_timeout(engine, seconds: int) -> None:
+    """Apply a per-connection statement timeout for the engine's dialect."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        dialect = engine.dialect.name
+        if dialect == "mssql":
+            # pyodbc: query timeout in seconds for every cursor on this connection
+            dbapi_connection.timeout = seconds
+            return
+        statement = {
+            "postgresql": f"SET statement_timeout = {seconds * 1000}",
+            "mysql": f"SET SESSION max_execution_time = {seconds * 1000}",
+        }.get(dialect)
+        if statement:
+            cursor = dbapi_connection.cursor()
+            cursor.execute(statement)
+            cursor.close()
+
+
+def get_database(
+    connection_string: str,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_recycle: int = 1800,
+    pool_pre_ping: bool = True,
+    pool_timeout: int = 30,
+    statement_timeout: int = 0,
+    **kwargs,
+) -> SQLDatabase:
+    """Connect to database using the provided SQLAlchemy connection string.
+
+    The engine uses a TimedQueuePool sized by the pool arguments so that
+    pool pressure can be observed via ``get_pool_stats``. In-memory SQLite
+    keeps SQLAlchemy's default single-connection pool.
+
+    Args:
+        connection_string: SQLAlchemy URL.
+        pool_size: Connections kept open in the pool.
+        max_overflow: Extra connections allowed above ``pool_size``.
+        pool_recycle: Seconds after which a connection is replaced.
+        pool_pre_ping: Test connections for liveness on checkout.
+        pool_timeout: Seconds to wait for a free connection before failing.
+        statement_timeout: Per-statement timeout in seconds (0 = none).
+    """
+    url = make_url(connection_string)
+    engine_kwargs = {"pool_pre_ping": pool_pre_ping, "pool_recycle": pool_recycle}
+    if not (url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")):
+        engine_kwargs.update(
+            poolclass=TimedQueuePool,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+        )
+
+    engine = create_engine(url, **engine_kwargs)
+    if statement_timeout:
+        _set_statement_timeout(engine, statement_timeout)
+    return SQLDatabase(engine, **kwargs)
+
+
+def get_pool_stats(db: SQLDatabase) -> dict:
+    """Current pool occupancy and checkout wait statistics."""
+    pool = db._engine.pool
+    stats = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            {
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(pool.overflow(), 0),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            }
+        )
+    if isinstance(pool, TimedQueuePool):
+        stats.update(
+            {
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "wait_seconds_total": round(pool.wait_seconds_total, 4),
+                "wait_seconds_avg": round(pool.wait_seconds_total / pool.checkouts, 4)
+                if pool.checkouts
+                else 0.0,
+                "wait_seconds_max": round(pool.wait_seconds_max, 4),
+            }
+        )
+    return stats
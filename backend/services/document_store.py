@@ -1,4 +1,5 @@
 import json
+import threading
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
@@ -8,12 +9,15 @@ class DocumentStore:
     """Simple JSON-file-backed document metadata store.
 
     Tracks uploaded documents: id, filename, file_type, file_size,
-    file_path, status, chunk_count, error_message, created_at.
+    file_path, status, chunk_count, error_message, created_at, the
+    ingestion progress, and a SHA-256 content hash used to detect duplicate
+    uploads. Safe to update from ingestion worker threads.
     """
 
     def __init__(self, file_path: str = "document_store.json"):
         self._file = Path(file_path)
         self._docs: dict[str, dict] = {}
+        self._lock = threading.RLock()
         self._load()
 
     def _load(self):
@@ -24,10 +28,11 @@ class DocumentStore:
                 self._docs = {}
 
     def _save(self):
-        self._file.write_text(
-            json.dumps(self._docs, indent=2, ensure_ascii=False),
-            encoding="utf-8",
-        )
+        with self._lock:
+            self._file.write_text(
+                json.dumps(self._docs, indent=2, ensure_ascii=False),
+                encoding="utf-8",
+            )
 
     def create(
         self,
@@ -35,6 +40,7 @@ class DocumentStore:
         file_type: str,
         file_size: int,
         file_path: str,
+        content_hash: str | None = None,
     ) -> dict:
         doc_id = str(uuid.uuid4())
         now = datetime.now(timezone.utc).isoformat()
@@ -44,38 +50,60 @@ class DocumentStore:
             "file_type": file_type,
             "file_size": file_size,
             "file_path": file_path,
+            "content_hash": content_hash,
             "status": "processing",
             "chunk_count": 0,
             "error_message": None,
+            "progress": {"stage": "queued"},
+            "version": 1,
             "created_at": now,
+            "updated_at": now,
         }
-        self._docs[doc_id] = doc
-        self._save()
+        with self._lock:
+            self._docs[doc_id] = doc
+            self._save()
         return doc
 
     def list_all(self) -> list[dict]:
-        return sorted(
-            self._docs.values(),
-            key=lambda d: d["created_at"],
-            reverse=True,
-        )
+        with self._lock:
+            return sorted(
+                (dict(d) for d in self._docs.values()),
+                key=lambda d: d["created_at"],
+                reverse=True,
+            )
 
     def get(self, doc_id: str) -> dict | None:
-        return self._docs.get(doc_id)
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            return dict(doc) if doc else None
+
+    def find_by_hash(self, content_hash: str) -> dict | None:
+        """Oldest document with this content that did not fail ingestion."""
+        with self._lock:
+            matches = [
+                d
+                for d in self._docs.values()
+                if d.get("content_hash") == content_hash and d["status"] != "error"
+            ]
+            if not matches:
+                return None
+            return dict(min(matches, key=lambda d: d["created_at"]))
 
     def update(self, doc_id: str, **kwargs) -> dict | None:
-        doc = self._docs.get(doc_id)
-        if not doc:
-            return None
-        for key, value in kwargs.items():
-            if value is not None:
-                doc[key] = value
-        self._save()
-        return doc
+        with self._lock:
+            doc = self._docs.get(doc_id)
+            if not doc:
+                return None
+            for key, value in kwargs.items():
+                if value is not None:
+                    doc[key] = value
+            self._save()
+            return dict(doc)
 
     def delete(self, doc_id: str) -> bool:
-        if doc_id in self._docs:
-            del self._docs[doc_id]
-            self._save()
-            return True
-        return False
+        with self._lock:
+            if doc_id in self._docs:
+                del self._docs[doc_id]
+                self._save()
+                return True
+            return False
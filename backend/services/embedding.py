@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def with_retry(
+    fn: Callable[[], T],
+    max_retries: int = 0,
+    retry_backoff_seconds: float = 1.0,
+    what: str = "call",
+) -> T:
+    """Run ``fn``, retrying failures with exponential backoff."""
+    for attempt in range(max_retries + 1):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt == max_retries:
+                raise
+            delay = retry_backoff_seconds * 2**attempt
+            logger.warning(
+                "[embed] %s failed (attempt %d/%d), retrying in %.1fs: %s",
+                what,
+                attempt + 1,
+                max_retries + 1,
+                delay,
+                e,
+            )
+            time.sleep(delay)
+
+
+def is_local_model(embeddings) -> bool:
+    """True for in-process models (HuggingFace / sentence-transformers)."""
+    embeddings = getattr(embeddings, "underlying", embeddings)  # CachedEmbeddings
+    return type(embeddings).__module__.startswith(
+        ("langchain_huggingface", "langchain_community.embeddings.huggingface")
+    )
+
+
+class BatchEmbedder:
+    """Embeds chunk texts in fixed-size batches on a shared worker pool.
+
+    Remote providers (OpenAI, Google) get up to ``concurrency`` batches in
+    flight at once, shared by all ingestion jobs so the provider's rate
+    limits see one bounded client. Local HuggingFace models run on a single
+    dedicated thread: the model already uses every core and is not safe to
+    call concurrently.
+    """
+
+    def __init__(self, embeddings, batch_size: int = 64, concurrency: int = 4):
+        self.embeddings = embeddings
+        self.batch_size = max(batch_size, 1)
+        self.local = is_local_model(embeddings)
+        self.concurrency = 1 if self.local else max(concurrency, 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="embed-local" if self.local else "embed",
+        )
+        self._lock = threading.Lock()
+        self.batches = 0
+        self.texts = 0
+        self.seconds = 0.0
+
+    def _embed(self, texts: list[str], max_retries: int, retry_backoff_seconds: float):
+        started = time.perf_counter()
+        vectors = with_retry(
+            lambda: self.embeddings.embed_documents(texts),
+            max_retries,
+            retry_backoff_seconds,
+            what="Embedding batch",
+        )
+        with self._lock:
+            self.batches += 1
+            self.texts += len(texts)
+            self.seconds += time.perf_counter() - started
+        return vectors
+
+    def embed_batches(
+        self,
+        texts: list[str],
+        max_retries: int = 0,
+        retry_backoff_seconds: float = 1.0,
+    ) -> Iterator[tuple[int, list[list[float]]]]:
+        """Yield ``(start, vectors)`` for each batch of ``texts``, in order.
+
+        At most ``concurrency`` batches of a call are queued ahead of the
+        consumer, so a caller storing each batch as it arrives overlaps
+        storage with embedding without holding every vector in memory.
+        """
+        pending: deque = deque()
+        for start in range(0, len(texts), self.batch_size):
+            batch = texts[start : start + self.batch_size]
+            pending.append(
+                (start, self._executor.submit(self._embed, batch, max_retries, retry_backoff_seconds))
+            )
+            if len(pending) > self.concurrency:
+                done_start, future = pending.popleft()
+                yield done_start, future.result()
+        while pending:
+            done_start, future = pending.popleft()
+            yield done_start, future.result()
+
+    def stats(self) -> dict:
+        return {
+            "local": self.local,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "batches": self.batches,
+            "texts": self.texts,
+            "texts_per_second": round(self.texts / self.seconds, 2) if self.seconds else 0.0,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
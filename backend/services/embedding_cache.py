@@ -0,0 +1,147 @@
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from array import array
+
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger(__name__)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """Persistent, content-addressed store of embedding vectors.
+
+    Vectors are kept in a SQLite file keyed by a hash of
+    ``(model, kind, text)``, where ``kind`` separates document and query
+    embeddings (several providers embed them differently). Vectors are
+    stored as float32. Once more than ``max_entries`` are stored, the least
+    recently used tenth is evicted.
+    """
+
+    def __init__(self, path: str = "embedding_cache.db", max_entries: int = 100_000):
+        self.max_entries = max_entries
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)"
+        )
+        self._lock = threading.Lock()
+        self._size = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(model: str, kind: str, text: str) -> str:
+        return content_hash(f"{model}\0{kind}\0{text}")
+
+    def get_many(self, keys: list[str]) -> list[list[float] | None]:
+        """Cached vectors for ``keys`` (None where missing)."""
+        if not keys:
+            return []
+        found: dict[str, list[float]] = {}
+        now = time.time()
+        with self._lock:
+            unique = list(dict.fromkeys(keys))
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(part))})",
+                    part,
+                ).fetchall()
+                found.update((key, array("f", blob).tolist()) for key, blob in rows)
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+            vectors = [found.get(key) for key in keys]
+            hits = sum(vector is not None for vector in vectors)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return vectors
+
+    def put_many(self, keys: list[str], vectors: list[list[float]]) -> None:
+        if not keys:
+            return
+        now = time.time()
+        rows = [(key, array("f", vector).tobytes(), now) for key, vector in zip(keys, vectors)]
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._size += self._conn.total_changes - before
+            if self.max_entries and self._size > self.max_entries:
+                self._evict(self._size - int(self.max_entries * 0.9))
+            self._conn.commit()
+
+    def _evict(self, count: int) -> None:
+        self._conn.execute(
+            "DELETE FROM embeddings WHERE key IN "
+            "(SELECT key FROM embeddings ORDER BY last_used LIMIT ?)",
+            (count,),
+        )
+        self._size -= count
+        self.evictions += count
+        logger.info("[embed-cache] Evicted %d least recently used vectors", count)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": self._size,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that only sends uncached texts to the model.
+
+    Used as the vectorstore's embedding function, so chunk embedding during
+    ingestion and query embedding during retrieval both go through
+    ``cache``.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, model_name: str):
+        self.underlying = underlying
+        self.cache = cache
+        self.model_name = model_name
+
+    def _embed(self, texts: list[str], kind: str, embed) -> list[list[float]]:
+        keys = [self.cache.key(self.model_name, kind, text) for text in texts]
+        vectors = self.cache.get_many(keys)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            fresh = embed([texts[i] for i in missing])
+            for i, vector in zip(missing, fresh):
+                vectors[i] = vector
+            self.cache.put_many([keys[i] for i in missing], fresh)
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, "document", self.underlying.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self._embed(
+            [text], "query", lambda texts: [self.underlying.embed_query(texts[0])]
+        )[0]
@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Iterable
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger(__name__)
+
+# Writes are batched into one snapshot at most this often
+_FLUSH_INTERVAL_SECONDS = 2.0
+
+_COMPARISONS = {
+    "$eq": lambda a, b: a == b,
+    "$ne": lambda a, b: a != b,
+    "$gt": lambda a, b: a is not None and a > b,
+    "$gte": lambda a, b: a is not None and a >= b,
+    "$lt": lambda a, b: a is not None and a < b,
+    "$lte": lambda a, b: a is not None and a <= b,
+    "$in": lambda a, b: a in b,
+    "$nin": lambda a, b: a not in b,
+}
+
+
+def matches_where(metadata: dict, where: dict | None) -> bool:
+    """Evaluate a Chroma ``where`` clause against one chunk's metadata."""
+    if not where:
+        return True
+    for key, condition in where.items():
+        if key == "$and":
+            if not all(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_where(metadata, clause) for clause in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = metadata.get(key)
+            if not all(_COMPARISONS[op](value, operand) for op, operand in condition.items()):
+                return False
+        elif metadata.get(key) != condition:
+            return False
+    return True
+
+
+class FlatCollection:
+    """In-process stand-in for the parts of a Chroma collection this app uses.
+
+    Vectors are held in one float32 matrix and searched exhaustively by
+    squared L2 distance (Chroma's default), which is fast enough for corpora
+    up to roughly a hundred thousand chunks. With a ``path``, the matrix and
+    the chunk records are snapshotted there (``vectors.npy`` and
+    ``records.json``) shortly after each write and on ``close()``, and the
+    matrix is memory-mapped copy-on-write when loaded.
+    """
+
+    def __init__(self, path: str | None = None):
+        self._path = Path(path) if path else None
+        self._lock = threading.RLock()
+        self._ids: list[str] = []
+        self._rows: dict[str, int] = {}
+        self._documents: list[str] = []
+        self._metadatas: list[dict] = []
+        self._vectors = np.zeros((0, 0), dtype=np.float32)
+        self._dirty = False
+        self._flush_timer: threading.Timer | None = None
+        if self._path is not None:
+            self._path.mkdir(parents=True, exist_ok=True)
+            self._load()
+
+    # ----- persistence -----
+
+    def _load(self) -> None:
+        records_file = self._path / "records.json"
+        vectors_file = self._path / "vectors.npy"
+        if not records_file.exists() or not vectors_file.exists():
+            return
+        records = json.loads(records_file.read_text(encoding="utf-8"))
+        self._ids = records["ids"]
+        self._documents = records["documents"]
+        self._metadatas = records["metadatas"]
+        self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+        self._vectors = np.load(vectors_file, mmap_mode="c")
+        logger.info("[flat-index] Loaded %d chunks from %s", len(self._ids), self._path)
+
+    def _mark_dirty(self) -> None:
+        if self._path is None:
+            return
+        self._dirty = True
+        if self._flush_timer is None:
+            self._flush_timer = threading.Timer(_FLUSH_INTERVAL_SECONDS, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+
+    def flush(self) -> None:
+        """Write a snapshot now if anything changed since the last one."""
+        with self._lock:
+            self._flush_timer = None
+            if not self._dirty or self._path is None:
+                return
+            vectors_tmp = self._path / "vectors.tmp.npy"
+            records_tmp = self._path / "records.tmp.json"
+            np.save(vectors_tmp, np.asarray(self._vectors))
+            records_tmp.write_text(
+                json.dumps(
+                    {
+                        "ids": self._ids,
+                        "documents": self._documents,
+                        "metadatas": self._metadatas,
+                    },
+                    ensure_ascii=False,
+                ),
+                encoding="utf-8",
+            )
+            os.replace(vectors_tmp, self._path / "vectors.npy")
+            os.replace(records_tmp, self._path / "records.json")
+            self._dirty = False
+
+    def close(self) -> None:
+        timer = self._flush_timer
+        if timer is not None:
+            timer.cancel()
+        self.flush()
+
+    # ----- Chroma collection API -----
+
+    def count(self) -> int:
+        return len(self._ids)
+
+    def upsert(
+        self,
+        ids: list[str],
+        embeddings: list[list[float]],
+        documents: list[str],
+        metadatas: list[dict],
+    ) -> None:
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        with self._lock:
+            if not self._ids:
+                self._vectors = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            new_rows = []
+            for chunk_id, vector, document, metadata in zip(ids, vectors, documents, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is None:
+                    self._rows[chunk_id] = len(self._ids)
+                    self._ids.append(chunk_id)
+                    self._documents.append(document)
+                    self._metadatas.append(dict(metadata))
+                    new_rows.append(vector)
+                else:
+                    self._vectors[row] = vector
+                    self._documents[row] = document
+                    self._metadatas[row] = dict(metadata)
+            if new_rows:
+                self._vectors = np.concatenate([self._vectors, np.stack(new_rows)])
+            self._mark_dirty()
+
+    def update(self, ids: list[str], metadatas: list[dict]) -> None:
+        with self._lock:
+            for chunk_id, metadata in zip(ids, metadatas):
+                row = self._rows.get(chunk_id)
+                if row is not None:
+                    self._metadatas[row] = dict(metadata)
+            self._mark_dirty()
+
+    def _select(self, ids: list[str] | None, where: dict | None) -> list[int]:
+        if ids is not None:
+            rows = [self._rows[i] for i in ids if i in self._rows]
+        else:
+            rows = range(len(self._ids))
+        return [row for row in rows if matches_where(self._metadatas[row], where)]
+
+    def get(
+        self,
+        ids: list[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: Iterable[str] = ("documents", "metadatas"),
+    ) -> dict:
+        with self._lock:
+            rows = self._select(ids, where)
+            start = offset or 0
+            rows = rows[start : start + limit if limit is not None else None]
+            result: dict[str, Any] = {"ids": [self._ids[row] for row in rows]}
+            if "documents" in include:
+                result["documents"] = [self._documents[row] for row in rows]
+            if "metadatas" in include:
+                result["metadatas"] = [dict(self._metadatas[row]) for row in rows]
+            if "embeddings" in include:
+                result["embeddings"] = [self._vectors[row].tolist() for row in rows]
+        return result
+
+    def delete(self, ids: list[str] | None = None, where: dict | None = None) -> None:
+        with self._lock:
+            doomed = set(self._select(ids, where))
+            if not doomed:
+                return
+            keep = [row for row in range(len(self._ids)) if row not in doomed]
+            self._ids = [self._ids[row] for row in keep]
+            self._documents = [self._documents[row] for row in keep]
+            self._metadatas = [self._metadatas[row] for row in keep]
+            self._vectors = np.asarray(self._vectors)[keep]
+            self._rows = {chunk_id: row for row, chunk_id in enumerate(self._ids)}
+            self._mark_dirty()
+
+    def nearest(
+        self, vector: list[float], k: int, where: dict | None = None
+    ) -> list[tuple[int, float]]:
+        """``(row, squared L2 distance)`` of the ``k`` closest chunks."""
+        with self._lock:
+            if not self._ids or k <= 0:
+                return []
+            rows = np.asarray(self._select(None, where) if where else range(len(self._ids)))
+            if rows.size == 0:
+                return []
+            query = np.asarray(vector, dtype=np.float32)
+            distances = ((self._vectors[rows] - query) ** 2).sum(axis=1)
+            k = min(k, rows.size)
+            best = np.argpartition(distances, k - 1)[:k]
+            best = best[np.argsort(distances[best])]
+            return [(int(rows[i]), float(distances[i])) for i in best]
+
+    def document(self, row: int) -> Document:
+        with self._lock:
+            return Document(
+                id=self._ids[row],
+                page_content=self._documents[row],
+                metadata=dict(self._metadatas[row]),
+            )
+
+
+class FlatVectorStore(VectorStore):
+    """LangChain vector store over a :class:`FlatCollection`.
+
+    Mirrors the ``Chroma`` wrapper where the app relies on it: the
+    ``embeddings`` property, ``_collection`` for the write helpers in
+    ``services.vectorstore``, and similarity search with a ``filter``
+    ``where`` clause.
+    """
+
+    def __init__(self, embedding_function: Embeddings, path: str | None = None):
+        self._embedding_function = embedding_function
+        self._collection = FlatCollection(path)
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding_function
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        ids = ids or [f"chunk-{os.urandom(8).hex()}" for _ in texts]
+        self._collection.upsert(
+            ids=ids,
+            embeddings=self._embedding_function.embed_documents(texts),
+            documents=texts,
+            metadatas=metadatas or [{} for _ in texts],
+        )
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> None:
+        self._collection.delete(ids=ids)
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        vector = self._embedding_function.embed_query(query)
+        return [
+            (self._collection.document(row), distance)
+            for row, distance in self._collection.nearest(vector, k, filter)
+        ]
+
+    def similarity_search(
+        self, query: str, k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, filter: dict | None = None, **kwargs: Any
+    ) -> list[Document]:
+        return [
+            self._collection.document(row)
+            for row, _ in self._collection.nearest(embedding, k, filter)
+        ]
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+        path: str | None = None,
+        **kwargs: Any,
+    ) -> "FlatVectorStore":
+        store = cls(embedding, path)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+    def close(self) -> None:
+        """Write pending changes to disk."""
+        self._collection.close()
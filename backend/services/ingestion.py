@@ -1,16 +1,36 @@
-from pathlib import Path
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from itertools import islice
+from typing import Callable, Iterator, TypeVar
 
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_chroma import Chroma
 
+from services.embedding import BatchEmbedder, with_retry
+from services.embedding_cache import content_hash
+from services.lexical_index import LexicalIndex
+from services.pdf_pages import count_pdf_pages, iter_pdf_pages, read_pdf_pages
+from services.vectorstore import (
+    CollectionVersion,
+    delete_chunks,
+    get_document_chunk_ids,
+    update_chunk_metadata,
+    upsert_chunks,
+)
+
+
+_PARSE_AHEAD = 8  # page ranges of one PDF in flight on the parse pool
+
+T = TypeVar("T")
+
 
 def _get_loader(file_path: str, file_type: str):
-    """Return the appropriate LangChain document loader for the file type."""
-    if file_type == "pdf":
-        from langchain_community.document_loaders import PyPDFLoader
+    """Return the LangChain document loader for a non-PDF file type.
 
-        return PyPDFLoader(file_path)
-    elif file_type == "csv":
+    PDFs are read page-wise by ``services.pdf_pages`` instead.
+    """
+    if file_type == "csv":
         from langchain_community.document_loaders import CSVLoader
 
         return CSVLoader(file_path)
@@ -26,54 +46,205 @@ def _get_loader(file_path: str, file_type: str):
         raise ValueError(f"Unsupported file type: {file_type}")
 
 
+def _page_batches(
+    file_path: str,
+    file_type: str,
+    batch_size: int,
+    parse_pool: Executor | None = None,
+) -> Iterator[list[Document]]:
+    """Yield the file's pages (rows for CSV) in batches of ``batch_size``.
+
+    PDFs longer than one batch are parsed as page ranges on ``parse_pool``
+    when given, a few ranges ahead of the consumer; everything else is read
+    lazily in the calling thread.
+    """
+    if file_type != "pdf":
+        pages = _get_loader(file_path, file_type).lazy_load()
+        while batch := list(islice(pages, batch_size)):
+            yield batch
+        return
+
+    total = count_pdf_pages(file_path) if parse_pool is not None else 0
+    if total <= batch_size:
+        yield from iter_pdf_pages(file_path, batch_size)
+        return
+
+    ranges = iter(range(0, total, batch_size))
+    pending: deque = deque()
+    for start in islice(ranges, _PARSE_AHEAD):
+        pending.append(parse_pool.submit(read_pdf_pages, file_path, start, start + batch_size))
+    while pending:
+        batch = pending.popleft().result()
+        for start in islice(ranges, 1):
+            pending.append(parse_pool.submit(read_pdf_pages, file_path, start, start + batch_size))
+        yield batch
+
+
+def _prefetch(items: Iterator[T]) -> Iterator[T]:
+    """Produce ``items`` one ahead on a helper thread.
+
+    Loading the next page batch then overlaps with splitting and embedding
+    the current one.
+    """
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="ingest-load") as loader:
+        future = loader.submit(next, items, None)
+        while (item := future.result()) is not None:
+            future = loader.submit(next, items, None)
+            yield item
+
+
 def ingest_document(
     file_path: str,
     document_id: str,
     filename: str,
     file_type: str,
     vectorstore: Chroma,
+    embedder: BatchEmbedder,
+    progress: Callable[..., None] | None = None,
+    max_retries: int = 0,
+    retry_backoff_seconds: float = 1.0,
+    page_batch_size: int = 32,
+    parse_pool: Executor | None = None,
+    lexical_index: LexicalIndex | None = None,
+    collection_version: CollectionVersion | None = None,
 ) -> int:
     """Load, split, embed, and store a document in ChromaDB.
 
+    The file is streamed through the pipeline in batches of pages: while
+    one batch is split and its chunks embedded, the next is being parsed,
+    so a long PDF starts embedding after its first pages rather than after
+    the whole file has been read.
+
+    Re-ingesting an existing ``document_id`` is incremental: chunks whose
+    text is unchanged keep their vectors (only their ``chunk_index`` and
+    ``total_chunks`` metadata is updated), new chunks are embedded and chunks no longer in the file are
+    deleted.
+
     Args:
         file_path: Path to the saved file on disk.
         document_id: UUID for this document.
         filename: Original filename.
         file_type: File extension (pdf, csv, txt, docx).
         vectorstore: The Chroma vectorstore to add chunks to.
+        embedder: The shared BatchEmbedder over the vectorstore's
+            embedding model.
+        progress: Optional callback receiving ``stage`` plus counters
+            (``pages_loaded``, ``pages_total`` for PDFs, ``chunks_total``,
+            ``chunks_unchanged``, ``chunks_removed``, ``chunks_to_embed``,
+            ``chunks_embedded``). Counters grow as pages stream in.
+        max_retries: Retries per batch on embedding/storage failures.
+        retry_backoff_seconds: Initial delay between retries (doubles each time).
+        page_batch_size: Pages (CSV rows) loaded and split at a time.
+        parse_pool: Optional process pool for parsing page ranges of PDFs
+            longer than one batch in parallel.
+        lexical_index: Optional keyword index kept in step with the
+            vectorstore.
+        collection_version: Optional counter bumped on every write.
 
     Returns:
-        Number of chunks created and stored.
+        Number of chunks the document now has.
     """
-    # 1. Load document
-    loader = _get_loader(file_path, file_type)
-    docs = loader.load()
+    report = progress or (lambda stage, **counts: None)
+    report("loading")
 
-    # 2. Split into chunks
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=700,
         chunk_overlap=200,
         separators=["\n\n", "\n", ". ", " "],
         add_start_index=True,
     )
-    chunks = splitter.split_documents(docs)
-
-    # 3. Add metadata to each chunk
-    for i, chunk in enumerate(chunks):
-        chunk.metadata.update(
-            {
-                "document_id": document_id,
-                "filename": filename,
-                "chunk_index": i,
-                "total_chunks": len(chunks),
-            }
-        )
-        # Preserve page number if present (from PDF loader)
-        if "page" not in chunk.metadata:
-            chunk.metadata["page"] = 0
+    existing = set(get_document_chunk_ids(vectorstore, document_id))
 
-    # 4. Add to vectorstore
-    if chunks:
-        vectorstore.add_documents(chunks)
+    flush_size = embedder.batch_size * embedder.concurrency
+
+    ids: list[str] = []
+    metadatas: list[dict] = []
+    occurrences: dict[str, int] = {}
+    pending: list[tuple[str, Document]] = []  # New chunks awaiting embedding
+    counts = {
+        "pages_loaded": 0,
+        "chunks_total": 0,
+        "chunks_unchanged": 0,
+        "chunks_to_embed": 0,
+        "chunks_embedded": 0,
+    }
+
+    def flush() -> None:
+        # Embed pending chunks in batches (concurrently for remote
+        # providers) and upsert each batch as soon as it is embedded. Ids
+        # are deterministic, so a retried batch overwrites rather than
+        # duplicates.
+        for start, vectors in embedder.embed_batches(
+            [chunk.page_content for _, chunk in pending], max_retries, retry_backoff_seconds
+        ):
+            batch = pending[start : start + len(vectors)]
+            with_retry(
+                lambda: upsert_chunks(
+                    vectorstore,
+                    [chunk_id for chunk_id, _ in batch],
+                    [chunk for _, chunk in batch],
+                    vectors,
+                    lexical_index,
+                    collection_version,
+                ),
+                max_retries,
+                retry_backoff_seconds,
+                what="Vectorstore upsert",
+            )
+            counts["chunks_embedded"] += len(batch)
+            report("embedding", **counts)
+        pending.clear()
+
+    for pages in _prefetch(
+        _page_batches(file_path, file_type, page_batch_size, parse_pool)
+    ):
+        # Ids are content-addressed (document, text hash, occurrence), so
+        # re-ingesting a revised file keeps the vectors of unchanged
+        # chunks. Only new chunks are queued for embedding.
+        for chunk in splitter.split_documents(pages):
+            digest = content_hash(chunk.page_content)
+            occurrence = occurrences.get(digest, 0)
+            occurrences[digest] = occurrence + 1
+            chunk_id = f"{document_id}-{digest[:16]}-{occurrence}"
+            chunk.metadata.update(
+                {
+                    "document_id": document_id,
+                    "filename": filename,
+                    "chunk_index": len(ids),
+                    "content_hash": digest,
+                }
+            )
+            # Preserve page number if present (from PDF loader)
+            chunk.metadata.setdefault("page", 0)
+            ids.append(chunk_id)
+            metadatas.append(chunk.metadata)
+            if chunk_id in existing:
+                counts["chunks_unchanged"] += 1
+            else:
+                pending.append((chunk_id, chunk))
+                counts["chunks_to_embed"] += 1
+
+        counts["pages_loaded"] += len(pages)
+        if "total_pages" in pages[0].metadata:
+            counts["pages_total"] = pages[0].metadata["total_pages"]
+        counts["chunks_total"] = len(ids)
+        report("embedding", **counts)
+        if len(pending) >= flush_size:
+            flush()
+    if pending:
+        flush()
+
+    # The chunk count is only known now: stamp it on every chunk (which also
+    # renumbers unchanged ones), then drop the chunks that vanished
+    if ids:
+        for metadata in metadatas:
+            metadata["total_chunks"] = len(ids)
+        update_chunk_metadata(
+            vectorstore, ids, metadatas, lexical_index, collection_version
+        )
+    removed = sorted(existing - set(ids))
+    if removed:
+        delete_chunks(vectorstore, removed, lexical_index, collection_version)
+    report("embedding", chunks_removed=len(removed), **counts)
 
-    return len(chunks)
+    return len(ids)
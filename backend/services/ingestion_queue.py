@@ -0,0 +1,169 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from services.ingestion import ingest_document
+from services.vectorstore import delete_document_chunks
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("ready", "error")
+
+
+class IngestionQueue:
+    """Background worker pool running the document ingestion pipeline.
+
+    Uploads are queued with ``submit()`` and processed by ``workers``
+    threads, so requests return immediately. Each job records its progress
+    (stage, pages loaded, chunks embedded) on the document in the
+    ``DocumentStore`` and publishes every change to subscribers (see
+    ``subscribe()``), which back the SSE progress endpoint. Embedding runs
+    on the shared ``embedder``; batches that fail are retried
+    ``max_retries`` times with exponential backoff before the document is
+    marked as ``error``. Stored chunks are also added to ``lexical_index``.
+    With ``parse_workers`` set, long PDFs are parsed in page ranges on a
+    process pool shared by all jobs.
+    """
+
+    def __init__(
+        self,
+        store,
+        vectorstore,
+        embedder,
+        workers: int = 2,
+        max_retries: int = 3,
+        retry_backoff_seconds: float = 2.0,
+        page_batch_size: int = 32,
+        parse_workers: int = 0,
+        lexical_index=None,
+        collection_version=None,
+    ):
+        self._store = store
+        self._vectorstore = vectorstore
+        self._embedder = embedder
+        self._lexical_index = lexical_index
+        self._collection_version = collection_version
+        self.max_retries = max_retries
+        self.retry_backoff_seconds = retry_backoff_seconds
+        self.page_batch_size = max(page_batch_size, 1)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(workers, 1), thread_name_prefix="ingest"
+        )
+        # Spawned rather than forked: the server process runs many threads
+        self._parse_pool = (
+            ProcessPoolExecutor(
+                max_workers=parse_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            if parse_workers > 0
+            else None
+        )
+        self._subscribers: dict[str, list[tuple]] = {}
+        self._lock = threading.Lock()
+
+    # ----- jobs -----
+
+    def submit(self, doc_id: str) -> None:
+        """Queue a stored document for ingestion."""
+        self._update(doc_id, status="processing", progress={"stage": "queued"})
+        self._executor.submit(self._run, doc_id)
+
+    def resume_pending(self) -> int:
+        """Re-queue documents left unfinished by a previous process."""
+        pending = [
+            doc
+            for doc in self._store.list_all()
+            if doc["status"] == "processing" and os.path.exists(doc.get("file_path") or "")
+        ]
+        for doc in pending:
+            self.submit(doc["id"])
+        if pending:
+            logger.info("[ingest] Resumed %d unfinished documents", len(pending))
+        return len(pending)
+
+    def _run(self, doc_id: str) -> None:
+        doc = self._store.get(doc_id)
+        if not doc:
+            return  # Deleted while queued
+
+        def progress(stage: str, **counts) -> None:
+            self._update(doc_id, progress={"stage": stage, **counts})
+
+        try:
+            chunk_count = ingest_document(
+                file_path=doc["file_path"],
+                document_id=doc_id,
+                filename=doc["filename"],
+                file_type=doc["file_type"],
+                vectorstore=self._vectorstore,
+                progress=progress,
+                embedder=self._embedder,
+                max_retries=self.max_retries,
+                retry_backoff_seconds=self.retry_backoff_seconds,
+                page_batch_size=self.page_batch_size,
+                parse_pool=self._parse_pool,
+                lexical_index=self._lexical_index,
+                collection_version=self._collection_version,
+            )
+        except Exception as e:
+            logger.warning("[ingest] Document %s failed: %s", doc_id, e)
+            last = (self._store.get(doc_id) or {}).get("progress") or {}
+            self._update(
+                doc_id,
+                status="error",
+                error_message=str(e),
+                progress={**last, "stage": "error"},
+            )
+            return
+
+        doc = self._store.get(doc_id)
+        if doc is None:
+            # Deleted while ingesting: drop the chunks that were just stored
+            delete_document_chunks(
+                self._vectorstore, doc_id, self._lexical_index, self._collection_version
+            )
+            return
+        self._update(
+            doc_id,
+            status="ready",
+            chunk_count=chunk_count,
+            progress={**(doc.get("progress") or {}), "stage": "ready"},
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._parse_pool is not None:
+            self._parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    # ----- progress notifications -----
+
+    def _update(self, doc_id: str, **fields) -> None:
+        doc = self._store.update(doc_id, **fields)
+        if doc is None:
+            return
+        with self._lock:
+            subscribers = list(self._subscribers.get(doc_id, ()))
+        for loop, queue in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, doc)
+
+    def subscribe(self, doc_id: str) -> asyncio.Queue:
+        """Queue receiving a snapshot of the document on every update.
+
+        Must be called from the event loop; pair with ``unsubscribe()``.
+        """
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(doc_id, []).append(
+                (asyncio.get_running_loop(), queue)
+            )
+        return queue
+
+    def unsubscribe(self, doc_id: str, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(doc_id, [])
+            self._subscribers[doc_id] = [s for s in subscribers if s[1] is not queue]
+            if not self._subscribers[doc_id]:
+                del self._subscribers[doc_id]
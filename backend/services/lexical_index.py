@@ -0,0 +1,149 @@
+import json
+import logging
+import re
+import sqlite3
+import threading
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# Words, plus compound identifiers such as ABC-123 or v2.1.0
+_TOKEN = re.compile(r"\w+(?:[-./:]\w+)*")
+
+
+def match_expression(query: str) -> str | None:
+    """FTS5 query OR-ing the terms of ``query``.
+
+    Compound identifiers become phrases, so ``ABC-123`` matches those
+    tokens adjacent and in order. Returns None if there are no terms.
+    """
+    terms = dict.fromkeys(
+        '"' + " ".join(re.findall(r"\w+", token)) + '"'
+        for token in _TOKEN.findall(query.lower())
+    )
+    return " OR ".join(terms) or None
+
+
+class LexicalIndex:
+    """BM25 keyword index over the stored document chunks.
+
+    Complements vector search for exact identifiers, codes and rare terms
+    that embeddings blur. Chunks live in a SQLite file with an FTS5
+    full-text index kept in sync by triggers, so adding and deleting
+    chunks is incremental. Chunk text and metadata are stored alongside,
+    so search results need no vectorstore round-trip.
+    """
+
+    def __init__(self, path: str = "lexical_index.db"):
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS chunks (
+                rowid INTEGER PRIMARY KEY,
+                id TEXT NOT NULL UNIQUE,
+                document_id TEXT NOT NULL,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS chunks_document_id ON chunks (document_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts
+                USING fts5(text, content='chunks', content_rowid='rowid');
+            CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, text)
+                VALUES ('delete', old.rowid, old.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE OF text ON chunks BEGIN
+                INSERT INTO chunks_fts (chunks_fts, rowid, text)
+                VALUES ('delete', old.rowid, old.text);
+                INSERT INTO chunks_fts (rowid, text) VALUES (new.rowid, new.text);
+            END;
+            """
+        )
+        self._lock = threading.Lock()
+
+    def upsert(self, ids: list[str], chunks: list[Document]) -> None:
+        """Add chunks, replacing any already indexed under the same ids."""
+        rows = [
+            (
+                chunk_id,
+                chunk.metadata.get("document_id", ""),
+                chunk.page_content,
+                json.dumps(chunk.metadata),
+            )
+            for chunk_id, chunk in zip(ids, chunks)
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks (id, document_id, text, metadata) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET document_id = excluded.document_id, "
+                "text = excluded.text, metadata = excluded.metadata",
+                rows,
+            )
+            self._conn.commit()
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE chunks SET metadata = ? WHERE id = ?",
+                [(json.dumps(metadata), chunk_id) for chunk_id, metadata in zip(ids, metadatas)],
+            )
+            self._conn.commit()
+
+    def delete(self, ids: list[str]) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(i,) for i in ids])
+            self._conn.commit()
+
+    def delete_document(self, document_id: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks WHERE document_id = ?", (document_id,))
+            self._conn.commit()
+
+    def search(
+        self,
+        query: str,
+        k: int,
+        document_ids: list[str] | None = None,
+        filename: str | None = None,
+    ) -> list[Document]:
+        """The ``k`` best BM25 matches for ``query``, best first.
+
+        ``document_ids`` and ``filename`` restrict the matches to those
+        documents / that file.
+        """
+        expression = match_expression(query)
+        if not expression or k <= 0 or document_ids == []:
+            return []
+        sql = (
+            "SELECT chunks.id, chunks.text, chunks.metadata FROM chunks_fts "
+            "JOIN chunks ON chunks.rowid = chunks_fts.rowid "
+            "WHERE chunks_fts MATCH ?"
+        )
+        params: list = [expression]
+        if document_ids is not None:
+            sql += f" AND chunks.document_id IN ({','.join('?' * len(document_ids))})"
+            params += document_ids
+        if filename:
+            sql += " AND json_extract(chunks.metadata, '$.filename') = ?"
+            params.append(filename)
+        sql += " ORDER BY rank LIMIT ?"
+        params.append(k)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            Document(id=chunk_id, page_content=text, metadata=json.loads(metadata))
+            for chunk_id, text, metadata in rows
+        ]
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -1,10 +1,654 @@
+import asyncio
+import json
+import logging
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any
+
+from langchain_core.messages import HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+)
 from langgraph.checkpoint.memory import MemorySaver
+from sqlalchemy import (
+    Column,
+    Float,
+    Integer,
+    LargeBinary,
+    MetaData,
+    String,
+    Table,
+    Text,
+    and_,
+    create_engine,
+    delete,
+    event,
+    func,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.engine import make_url
+
+logger = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+_checkpoints = Table(
+    "checkpoints",
+    _metadata,
+    Column("thread_id", String(255), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("checkpoint_id", String(255), primary_key=True),
+    Column("parent_checkpoint_id", String(255)),
+    Column("type", String(64)),
+    Column("checkpoint", LargeBinary),
+    Column("metadata_type", String(64)),
+    Column("metadata", LargeBinary),
+    # JSON {channel: version}; lets pruning find unreferenced blobs cheaply
+    Column("channel_versions", Text),
+    Column("created_at", Float, index=True),
+)
+
+_blobs = Table(
+    "checkpoint_blobs",
+    _metadata,
+    Column("thread_id", String(255), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("channel", String(255), primary_key=True),
+    Column("version", String(255), primary_key=True),
+    Column("type", String(64)),
+    Column("blob", LargeBinary),
+)
+
+_writes = Table(
+    "checkpoint_writes",
+    _metadata,
+    Column("thread_id", String(255), primary_key=True),
+    Column("checkpoint_ns", String(255), primary_key=True),
+    Column("checkpoint_id", String(255), primary_key=True),
+    Column("task_id", String(255), primary_key=True),
+    Column("idx", Integer, primary_key=True),
+    Column("channel", String(255)),
+    Column("type", String(64)),
+    Column("blob", LargeBinary),
+    Column("task_path", String(1024), default=""),
+)
+
+
+class SQLCheckpointSaver(BaseCheckpointSaver[str]):
+    """LangGraph checkpointer stored in a SQL database via SQLAlchemy.
+
+    Works with any SQLAlchemy URL (SQLite file by default, Postgres for
+    deployments running several workers). Storage is bounded:
+
+    - only the latest ``max_checkpoints`` checkpoints of each thread are
+      kept; older ones, their pending writes and any channel blobs no
+      longer referenced are deleted on every ``put``;
+    - threads idle for more than ``retention_days`` are deleted;
+    - a background compactor shortens ``ToolMessage`` contents (SQL results,
+      retrieved chunks) that are older than the last ``keep_recent_turns``
+      user turns to ``compact_max_chars`` characters.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_checkpoints: int = 20,
+        retention_days: float = 0,
+        compact_interval_seconds: int = 600,
+        keep_recent_turns: int = 2,
+        compact_max_chars: int = 2000,
+    ):
+        super().__init__()
+        self.max_checkpoints = max(max_checkpoints, 1)
+        self.retention_days = retention_days
+        self.keep_recent_turns = keep_recent_turns
+        self.compact_max_chars = compact_max_chars
+        self._engine = self._create_engine(url)
+        _metadata.create_all(self._engine)
+        # Threads written since the last compaction pass
+        self._dirty: set[tuple[str, str]] = set()
+        self._dirty_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._compactor = None
+        if compact_interval_seconds > 0:
+            self._compactor = threading.Thread(
+                target=self._compact_loop,
+                args=(compact_interval_seconds,),
+                name="checkpoint-compactor",
+                daemon=True,
+            )
+            self._compactor.start()
+
+    @staticmethod
+    def _create_engine(url: str):
+        if make_url(url).get_backend_name() != "sqlite":
+            return create_engine(url, pool_pre_ping=True)
+
+        engine = create_engine(url, connect_args={"timeout": 30})
+
+        @event.listens_for(engine, "connect")
+        def _on_connect(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+        return engine
+
+    def close(self) -> None:
+        """Stop the compactor and release database connections."""
+        self._stop.set()
+        self._engine.dispose()
+
+    # ----- reads -----
+
+    def _load_blobs(
+        self, connection, thread_id: str, checkpoint_ns: str, versions: ChannelVersions
+    ) -> dict[str, Any]:
+        if not versions:
+            return {}
+        rows = connection.execute(
+            select(_blobs.c.channel, _blobs.c.type, _blobs.c.blob).where(
+                _blobs.c.thread_id == thread_id,
+                _blobs.c.checkpoint_ns == checkpoint_ns,
+                tuple_(_blobs.c.channel, _blobs.c.version).in_(
+                    [(channel, str(version)) for channel, version in versions.items()]
+                ),
+            )
+        )
+        return {
+            channel: self.serde.loads_typed((type_, blob))
+            for channel, type_, blob in rows
+            if type_ != "empty"
+        }
+
+    def _to_tuple(self, connection, row) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = (
+            row.thread_id,
+            row.checkpoint_ns,
+            row.checkpoint_id,
+        )
+        checkpoint = self.serde.loads_typed((row.type, row.checkpoint))
+        writes = connection.execute(
+            select(_writes.c.task_id, _writes.c.channel, _writes.c.type, _writes.c.blob)
+            .where(
+                _writes.c.thread_id == thread_id,
+                _writes.c.checkpoint_ns == checkpoint_ns,
+                _writes.c.checkpoint_id == checkpoint_id,
+            )
+            .order_by(_writes.c.task_id, _writes.c.idx)
+        )
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_blobs(
+                    connection, thread_id, checkpoint_ns, checkpoint["channel_versions"]
+                ),
+            },
+            metadata=self.serde.loads_typed((row.metadata_type, row.metadata)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": row.parent_checkpoint_id,
+                    }
+                }
+                if row.parent_checkpoint_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((type_, blob)))
+                for task_id, channel, type_, blob in writes
+            ],
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        configurable = config["configurable"]
+        query = select(_checkpoints).where(
+            _checkpoints.c.thread_id == configurable["thread_id"],
+            _checkpoints.c.checkpoint_ns == configurable.get("checkpoint_ns", ""),
+        )
+        if checkpoint_id := get_checkpoint_id(config):
+            query = query.where(_checkpoints.c.checkpoint_id == checkpoint_id)
+        else:
+            query = query.order_by(_checkpoints.c.checkpoint_id.desc()).limit(1)
+
+        with self._engine.connect() as connection:
+            row = connection.execute(query).first()
+            return self._to_tuple(connection, row) if row else None
+
+    def list(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> Iterator[CheckpointTuple]:
+        query = select(_checkpoints).order_by(_checkpoints.c.checkpoint_id.desc())
+        if config:
+            configurable = config["configurable"]
+            query = query.where(_checkpoints.c.thread_id == configurable["thread_id"])
+            if configurable.get("checkpoint_ns") is not None:
+                query = query.where(
+                    _checkpoints.c.checkpoint_ns == configurable["checkpoint_ns"]
+                )
+            if checkpoint_id := get_checkpoint_id(config):
+                query = query.where(_checkpoints.c.checkpoint_id == checkpoint_id)
+        if before and (before_id := get_checkpoint_id(before)):
+            query = query.where(_checkpoints.c.checkpoint_id < before_id)
+
+        with self._engine.connect() as connection:
+            rows = connection.execute(query).all()
+            for row in rows:
+                if limit is not None and limit <= 0:
+                    break
+                item = self._to_tuple(connection, row)
+                if filter and not all(
+                    item.metadata.get(key) == value for key, value in filter.items()
+                ):
+                    continue
+                if limit is not None:
+                    limit -= 1
+                yield item
+
+    # ----- writes -----
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        c = checkpoint.copy()
+        values: dict[str, Any] = c.pop("channel_values")  # type: ignore[misc]
+        type_, payload = self.serde.dumps_typed(c)
+        metadata_type, metadata_payload = self.serde.dumps_typed(
+            get_checkpoint_metadata(config, metadata)
+        )
+
+        with self._engine.begin() as connection:
+            for channel, version in new_versions.items():
+                blob_type, blob = (
+                    self.serde.dumps_typed(values[channel])
+                    if channel in values
+                    else ("empty", b"")
+                )
+                key = and_(
+                    _blobs.c.thread_id == thread_id,
+                    _blobs.c.checkpoint_ns == checkpoint_ns,
+                    _blobs.c.channel == channel,
+                    _blobs.c.version == str(version),
+                )
+                connection.execute(delete(_blobs).where(key))
+                connection.execute(
+                    _blobs.insert().values(
+                        thread_id=thread_id,
+                        checkpoint_ns=checkpoint_ns,
+                        channel=channel,
+                        version=str(version),
+                        type=blob_type,
+                        blob=blob,
+                    )
+                )
+            connection.execute(
+                delete(_checkpoints).where(
+                    _checkpoints.c.thread_id == thread_id,
+                    _checkpoints.c.checkpoint_ns == checkpoint_ns,
+                    _checkpoints.c.checkpoint_id == checkpoint["id"],
+                )
+            )
+            connection.execute(
+                _checkpoints.insert().values(
+                    thread_id=thread_id,
+                    checkpoint_ns=checkpoint_ns,
+                    checkpoint_id=checkpoint["id"],
+                    parent_checkpoint_id=configurable.get("checkpoint_id"),
+                    type=type_,
+                    checkpoint=payload,
+                    metadata_type=metadata_type,
+                    metadata=metadata_payload,
+                    channel_versions=json.dumps(
+                        {k: str(v) for k, v in checkpoint["channel_versions"].items()}
+                    ),
+                    created_at=time.time(),
+                )
+            )
+            self._prune(connection, thread_id, checkpoint_ns)
+
+        with self._dirty_lock:
+            self._dirty.add((thread_id, checkpoint_ns))
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable["checkpoint_id"]
+
+        with self._engine.begin() as connection:
+            existing = {
+                idx
+                for (idx,) in connection.execute(
+                    select(_writes.c.idx).where(
+                        _writes.c.thread_id == thread_id,
+                        _writes.c.checkpoint_ns == checkpoint_ns,
+                        _writes.c.checkpoint_id == checkpoint_id,
+                        _writes.c.task_id == task_id,
+                    )
+                )
+            }
+            for idx, (channel, value) in enumerate(writes):
+                idx = WRITES_IDX_MAP.get(channel, idx)
+                if idx in existing:
+                    # Regular writes are only recorded once; special
+                    # channels (errors, interrupts) are overwritten
+                    if idx >= 0:
+                        continue
+                    connection.execute(
+                        delete(_writes).where(
+                            _writes.c.thread_id == thread_id,
+                            _writes.c.checkpoint_ns == checkpoint_ns,
+                            _writes.c.checkpoint_id == checkpoint_id,
+                            _writes.c.task_id == task_id,
+                            _writes.c.idx == idx,
+                        )
+                    )
+                type_, blob = self.serde.dumps_typed(value)
+                connection.execute(
+                    _writes.insert().values(
+                        thread_id=thread_id,
+                        checkpoint_ns=checkpoint_ns,
+                        checkpoint_id=checkpoint_id,
+                        task_id=task_id,
+                        idx=idx,
+                        channel=channel,
+                        type=type_,
+                        blob=blob,
+                        task_path=task_path,
+                    )
+                )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._engine.begin() as connection:
+            for table in (_checkpoints, _blobs, _writes):
+                connection.execute(delete(table).where(table.c.thread_id == thread_id))
+
+    def get_next_version(self, current: str | None, channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # ----- async API (thread offload) -----
+
+    async def aget_tuple(self, config: RunnableConfig) -> CheckpointTuple | None:
+        return await asyncio.to_thread(self.get_tuple, config)
+
+    async def alist(
+        self,
+        config: RunnableConfig | None,
+        *,
+        filter: dict[str, Any] | None = None,
+        before: RunnableConfig | None = None,
+        limit: int | None = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        items = await asyncio.to_thread(
+            lambda: list(self.list(config, filter=filter, before=before, limit=limit))
+        )
+        for item in items:
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return await asyncio.to_thread(self.put, config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        await asyncio.to_thread(self.put_writes, config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        await asyncio.to_thread(self.delete_thread, thread_id)
+
+    # ----- retention and compaction -----
+
+    def _prune(self, connection, thread_id: str, checkpoint_ns: str) -> None:
+        """Keep the latest ``max_checkpoints`` checkpoints and their blobs."""
+        scope = and_(
+            _checkpoints.c.thread_id == thread_id,
+            _checkpoints.c.checkpoint_ns == checkpoint_ns,
+        )
+        kept = connection.execute(
+            select(_checkpoints.c.checkpoint_id, _checkpoints.c.channel_versions)
+            .where(scope)
+            .order_by(_checkpoints.c.checkpoint_id.desc())
+            .limit(self.max_checkpoints)
+        ).all()
+        if len(kept) < self.max_checkpoints:
+            return
+        oldest_kept = kept[-1].checkpoint_id
+        removed = connection.execute(
+            delete(_checkpoints).where(scope, _checkpoints.c.checkpoint_id < oldest_kept)
+        ).rowcount
+        if not removed:
+            return
+
+        connection.execute(
+            delete(_writes).where(
+                _writes.c.thread_id == thread_id,
+                _writes.c.checkpoint_ns == checkpoint_ns,
+                _writes.c.checkpoint_id < oldest_kept,
+            )
+        )
+        referenced = {
+            (channel, version)
+            for row in kept
+            for channel, version in json.loads(row.channel_versions or "{}").items()
+        }
+        blob_scope = and_(
+            _blobs.c.thread_id == thread_id, _blobs.c.checkpoint_ns == checkpoint_ns
+        )
+        stale = [
+            key
+            for key in connection.execute(
+                select(_blobs.c.channel, _blobs.c.version).where(blob_scope)
+            ).all()
+            if tuple(key) not in referenced
+        ]
+        for channel, version in stale:
+            connection.execute(
+                delete(_blobs).where(
+                    blob_scope, _blobs.c.channel == channel, _blobs.c.version == version
+                )
+            )
+
+    def _expire_threads(self) -> int:
+        if not self.retention_days:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        with self._engine.connect() as connection:
+            expired = [
+                thread_id
+                for (thread_id,) in connection.execute(
+                    select(_checkpoints.c.thread_id)
+                    .group_by(_checkpoints.c.thread_id)
+                    .having(func.max(_checkpoints.c.created_at) < cutoff)
+                )
+            ]
+        for thread_id in expired:
+            self.delete_thread(thread_id)
+        return len(expired)
+
+    def _compact_messages(self, messages: list) -> tuple[list, int, bool]:
+        """Shorten old tool outputs.
+
+        Returns:
+            The new message list, characters saved and whether anything changed.
+        """
+        human_turns = [i for i, m in enumerate(messages) if isinstance(m, HumanMessage)]
+        if len(human_turns) <= self.keep_recent_turns:
+            return messages, 0, False
+        boundary = human_turns[-self.keep_recent_turns] if self.keep_recent_turns else len(messages)
+
+        saved, changed = 0, False
+        compacted = list(messages)
+        for i, msg in enumerate(messages[:boundary]):
+            if not isinstance(msg, ToolMessage) or not isinstance(msg.content, str):
+                continue
+            content = msg.content
+            if len(content) > self.compact_max_chars:
+                shortened = (
+                    f"{content[: self.compact_max_chars]}\n"
+                    f"[... {len(content) - self.compact_max_chars} characters compacted]"
+                )
+                if len(shortened) < len(content):
+                    content = shortened
+            if content is msg.content and msg.artifact is None:
+                continue
+            saved += len(msg.content) - len(content)
+            changed = True
+            compacted[i] = msg.model_copy(update={"content": content, "artifact": None})
+        return compacted, saved, changed
+
+    def compact_thread(self, thread_id: str, checkpoint_ns: str = "") -> int:
+        """Compact tool outputs in the latest ``messages`` blob of a thread.
+
+        Returns:
+            Number of characters removed.
+        """
+        with self._engine.begin() as connection:
+            row = connection.execute(
+                select(_checkpoints.c.channel_versions)
+                .where(
+                    _checkpoints.c.thread_id == thread_id,
+                    _checkpoints.c.checkpoint_ns == checkpoint_ns,
+                )
+                .order_by(_checkpoints.c.checkpoint_id.desc())
+                .limit(1)
+            ).first()
+            version = json.loads(row.channel_versions or "{}").get("messages") if row else None
+            if version is None:
+                return 0
+            key = and_(
+                _blobs.c.thread_id == thread_id,
+                _blobs.c.checkpoint_ns == checkpoint_ns,
+                _blobs.c.channel == "messages",
+                _blobs.c.version == version,
+            )
+            blob = connection.execute(select(_blobs.c.type, _blobs.c.blob).where(key)).first()
+            if blob is None or blob.type == "empty":
+                return 0
+            messages, saved, changed = self._compact_messages(
+                self.serde.loads_typed(tuple(blob))
+            )
+            if changed:
+                type_, payload = self.serde.dumps_typed(messages)
+                connection.execute(update(_blobs).where(key).values(type=type_, blob=payload))
+        return saved
+
+    def compact(self) -> dict:
+        """Run one retention and compaction pass over recently written threads."""
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        saved = 0
+        for thread_id, checkpoint_ns in dirty:
+            try:
+                saved += self.compact_thread(thread_id, checkpoint_ns)
+            except Exception as e:
+                logger.warning("[checkpoints] Compaction of %s failed: %s", thread_id, e)
+        expired = self._expire_threads()
+        if saved or expired:
+            logger.info(
+                "[checkpoints] Compacted %d threads (%d chars), expired %d threads",
+                len(dirty),
+                saved,
+                expired,
+            )
+        return {"threads": len(dirty), "chars_saved": saved, "expired": expired}
+
+    def _compact_loop(self, interval: int) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.compact()
+            except Exception as e:
+                logger.warning("[checkpoints] Compaction pass failed: %s", e)
 
 
-def create_memory():
-    """Create an in-memory checkpointer for thread conversation history.
+def create_memory(
+    url: str | None = "sqlite:///checkpoints.db",
+    max_checkpoints: int = 20,
+    retention_days: float = 0,
+    compact_interval_seconds: int = 600,
+    keep_recent_turns: int = 2,
+    compact_max_chars: int = 2000,
+):
+    """Create the checkpointer for thread conversation history.
 
-    For production, replace with SqliteSaver or PostgresSaver
-    for persistence across restarts.
+    Args:
+        url: SQLAlchemy URL of the checkpoint database (SQLite file, Postgres,
+            ...). Empty or ``"memory"`` keeps history in process memory.
+        max_checkpoints: Checkpoints kept per thread.
+        retention_days: Delete threads idle for longer than this (0 = never).
+        compact_interval_seconds: Seconds between compaction passes (0 = off).
+        keep_recent_turns: User turns whose tool outputs are never compacted.
+        compact_max_chars: Length old tool outputs are shortened to.
     """
-    return MemorySaver()
+    if not url or url == "memory":
+        return MemorySaver()
+    return SQLCheckpointSaver(
+        url,
+        max_checkpoints=max_checkpoints,
+        retention_days=retention_days,
+        compact_interval_seconds=compact_interval_seconds,
+        keep_recent_turns=keep_recent_turns,
+        compact_max_chars=compact_max_chars,
+    )
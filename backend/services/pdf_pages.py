@@ -0,0 +1,46 @@
+from typing import Iterator
+
+from langchain_core.documents import Document
+
+
+def _page_documents(reader, file_path: str, start: int, stop: int) -> list[Document]:
+    total = len(reader.pages)
+    labels = reader.page_labels
+    return [
+        Document(
+            page_content=reader.pages[page].extract_text().strip(),
+            metadata={
+                "source": file_path,
+                "total_pages": total,
+                "page": page,
+                "page_label": labels[page],
+            },
+        )
+        for page in range(start, min(stop, total))
+    ]
+
+
+def count_pdf_pages(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(file_path).pages)
+
+
+def read_pdf_pages(file_path: str, start: int, stop: int) -> list[Document]:
+    """Extract pages ``[start, stop)`` of a PDF, one Document per page.
+
+    Opens the file itself so it can run in a worker process; metadata
+    matches ``iter_pdf_pages``.
+    """
+    from pypdf import PdfReader
+
+    return _page_documents(PdfReader(file_path), file_path, start, stop)
+
+
+def iter_pdf_pages(file_path: str, batch_size: int) -> Iterator[list[Document]]:
+    """Yield the pages of a PDF in batches of ``batch_size``, parsing lazily."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(file_path)
+    for start in range(0, len(reader.pages), batch_size):
+        yield _page_documents(reader, file_path, start, start + batch_size)
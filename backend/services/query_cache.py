@@ -0,0 +1,112 @@
+import logging
+import re
+from typing import Callable
+
+from core.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+_LITERAL_OR_TOKEN = re.compile(r"""('(?:[^']|'')*'|"(?:[^"]|"")*")|(\s+)|([^'"\s]+)""")
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_$#@]*")
+_CACHEABLE_PREFIXES = ("select", "with")
+
+
+def normalize_sql(query: str) -> str:
+    """Canonical cache key for a query.
+
+    Collapses whitespace, lower-cases everything outside string literals and
+    quoted identifiers, and drops trailing semicolons, so cosmetic
+    differences in the agent's SQL still hit the same entry.
+    """
+    parts = []
+    for literal, space, token in _LITERAL_OR_TOKEN.findall(query.strip().rstrip(";")):
+        if literal:
+            parts.append(literal)
+        elif space:
+            parts.append(" ")
+        else:
+            parts.append(token.lower())
+    return "".join(parts).strip()
+
+
+def _entry_bytes(entry) -> int:
+    result, table, _ = entry
+    size = len(result.encode("utf-8"))
+    if table:
+        size += sum(len(repr(row)) for row in table["rows"])
+    return size
+
+
+class QueryResultCache:
+    """Cache of ``sql_db_query`` results keyed on normalized SQL text.
+
+    Each entry holds the tool result text and, for streamed results, the
+    full ``{"columns", "rows"}`` table so cache hits can be replayed to the
+    client. Bounded by the total size of cached results in bytes. Each entry's TTL
+    is the shortest TTL among the tables the query references, falling back
+    to ``default_ttl_seconds``. Entries can be invalidated per table, e.g.
+    after an ETL load, or wholesale when the schema changes.
+    """
+
+    def __init__(
+        self,
+        table_names: Callable[[], list[str]],
+        max_bytes: int = 64 * 1024 * 1024,
+        default_ttl_seconds: int = 300,
+        table_ttls: dict[str, int] | None = None,
+    ):
+        self._table_names = table_names
+        self.default_ttl_seconds = default_ttl_seconds
+        self.table_ttls = {name.lower(): ttl for name, ttl in (table_ttls or {}).items()}
+        self._entries = TTLCache(
+            max_size=None,
+            ttl_seconds=default_ttl_seconds,
+            max_weight=max_bytes,
+            weigher=_entry_bytes,
+        )
+
+    def referenced_tables(self, query: str) -> set[str]:
+        """Known table names mentioned in the query (lower-cased)."""
+        identifiers = {token.lower() for token in _IDENTIFIER.findall(query)}
+        return identifiers & {name.lower() for name in self._table_names()}
+
+    def get(self, query: str) -> tuple[str, dict | None] | None:
+        """Return ``(result, table)`` for a cached query, else None."""
+        entry = self._entries.get(normalize_sql(query))
+        return entry[:2] if entry else None
+
+    def set(self, query: str, result: str, table: dict | None = None) -> bool:
+        """Cache a result if the query is a read and the result is not an error."""
+        key = normalize_sql(query)
+        if not key.startswith(_CACHEABLE_PREFIXES) or result.startswith("Error:"):
+            return False
+
+        tables = self.referenced_tables(query)
+        ttl = min(
+            (self.table_ttls.get(table, self.default_ttl_seconds) for table in tables),
+            default=self.default_ttl_seconds,
+        )
+        if ttl <= 0:
+            return False
+        return self._entries.set(key, (result, table, frozenset(tables)), ttl_seconds=ttl)
+
+    def invalidate(self, tables: list[str] | None = None) -> int:
+        """Drop entries touching any of ``tables``, or everything if None.
+
+        Returns:
+            Number of entries removed.
+        """
+        if tables is None:
+            count = len(self._entries)
+            self._entries.clear()
+        else:
+            wanted = {table.lower() for table in tables}
+            stale = [key for key, (_, _, used) in self._entries.items() if used & wanted]
+            for key in stale:
+                self._entries.pop(key)
+            count = len(stale)
+        logger.info("[query-cache] Invalidated %d entries (tables=%s)", count, tables)
+        return count
+
+    def stats(self) -> dict:
+        return self._entries.stats()
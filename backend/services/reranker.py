@@ -0,0 +1,131 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import lru_cache
+
+from langchain_core.documents import Document
+
+logger = logging.getLogger(__name__)
+
+# After a failed model load, reranking is skipped this long before retrying
+_LOAD_RETRY_SECONDS = 300.0
+
+
+@lru_cache(maxsize=None)
+def _load_cross_encoder(model_name: str):
+    """Load a cross-encoder once per process (CPU)."""
+    from sentence_transformers import CrossEncoder
+
+    started = time.perf_counter()
+    model = CrossEncoder(model_name, device="cpu")
+    logger.info(
+        "[rerank] Loaded %s in %.1fs", model_name, time.perf_counter() - started
+    )
+    return model
+
+
+class CrossEncoderReranker:
+    """Reorders retrieved chunks by a cross-encoder relevance score.
+
+    A cross-encoder reads the query and each chunk together, which ranks
+    far better than embedding distance but costs a model pass per chunk,
+    so it is applied to a small candidate set. Scoring runs on a dedicated
+    thread; if it does not finish within ``timeout_seconds`` (or the model
+    is unavailable) the candidates are returned in their original order.
+    A failed model load is remembered, so an offline deploy does not retry
+    the download on every query; it is attempted again after
+    ``_LOAD_RETRY_SECONDS``.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        batch_size: int = 32,
+        timeout_seconds: float = 0.5,
+    ):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.timeout_seconds = timeout_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+        self.reranked = 0
+        self.fallbacks = 0
+        self._failed_at: float | None = None
+
+    def warm_up(self) -> None:
+        """Start loading the model in the background."""
+        self._executor.submit(self._load)
+
+    @property
+    def available(self) -> bool:
+        """False while a failed model load is within its retry backoff."""
+        return (
+            self._failed_at is None
+            or time.monotonic() - self._failed_at >= _LOAD_RETRY_SECONDS
+        )
+
+    def _load(self):
+        if not self.available:
+            return None
+        try:
+            model = _load_cross_encoder(self.model_name)
+        except Exception as e:
+            self._failed_at = time.monotonic()
+            logger.warning(
+                "[rerank] Could not load %s, reranking off for %.0fs: %s",
+                self.model_name,
+                _LOAD_RETRY_SECONDS,
+                e,
+            )
+            return None
+        self._failed_at = None
+        return model
+
+    def _score(self, query: str, docs: list[Document]) -> list[float] | None:
+        model = self._load()
+        if model is None:
+            return None
+        return model.predict(
+            [(query, doc.page_content) for doc in docs],
+            batch_size=self.batch_size,
+            show_progress_bar=False,
+        ).tolist()
+
+    def rerank(
+        self, query: str, docs: list[Document], top_k: int
+    ) -> tuple[list[Document], bool]:
+        """The ``top_k`` most relevant of ``docs``, best first.
+
+        Returns:
+            (documents, whether they are final). Only a timeout gives
+            False: the model is busy or still loading and a later call may
+            rescore the same candidates. When the model is unavailable the
+            retrieval order is final.
+        """
+        if not self.available:
+            self.fallbacks += 1
+            return docs[:top_k], True
+
+        future = self._executor.submit(self._score, query, docs)
+        try:
+            scores = future.result(timeout=self.timeout_seconds)
+        except TimeoutError:
+            future.cancel()  # Still queued behind another request: drop it
+            logger.warning(
+                "[rerank] Over the %.0f ms budget, keeping retrieval order",
+                self.timeout_seconds * 1000,
+            )
+            self.fallbacks += 1
+            return docs[:top_k], False
+        except Exception as e:
+            logger.warning("[rerank] Scoring failed, keeping retrieval order: %s", e)
+            scores = None
+
+        if scores is None:
+            self.fallbacks += 1
+            return docs[:top_k], True
+        self.reranked += 1
+        order = sorted(range(len(docs)), key=lambda i: scores[i], reverse=True)
+        return [docs[i] for i in order[:top_k]], True
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
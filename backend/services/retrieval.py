@@ -0,0 +1,183 @@
+import logging
+import sqlite3
+from datetime import date, datetime
+
+from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from services.lexical_index import LexicalIndex
+from services.reranker import CrossEncoderReranker
+from services.retrieval_cache import RetrievalCache
+
+logger = logging.getLogger(__name__)
+
+# Damping constant from the original RRF paper; keeps one list's top hit
+# from outweighing agreement between lists
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Document]], k: int = RRF_K
+) -> list[Document]:
+    """Merge ranked result lists by reciprocal rank fusion.
+
+    Each chunk scores ``sum(1 / (k + rank))`` over the lists it appears in;
+    ties keep the order of the earlier list.
+    """
+    scores: dict[str, float] = {}
+    docs: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or doc.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            docs.setdefault(key, doc)
+    return [docs[key] for key in sorted(scores, key=scores.get, reverse=True)]
+
+
+def scope_documents(
+    documents: list[dict],
+    document_ids: list[str] | None = None,
+    file_types: list[str] | None = None,
+    uploaded_from: date | None = None,
+    uploaded_to: date | None = None,
+) -> list[str] | None:
+    """Ids of the ``documents`` (DocumentStore records) retrieval may use.
+
+    Returns None when nothing is filtered, meaning the whole collection.
+    ``uploaded_from`` / ``uploaded_to`` are inclusive upload dates.
+    """
+    if document_ids is None and not file_types and not uploaded_from and not uploaded_to:
+        return None
+    wanted = set(document_ids) if document_ids is not None else None
+    types = {t.lower().lstrip(".") for t in file_types or ()}
+    scope = []
+    for doc in documents:
+        uploaded = datetime.fromisoformat(doc["created_at"]).date()
+        if (
+            (wanted is None or doc["id"] in wanted)
+            and (not types or doc["file_type"] in types)
+            and (uploaded_from is None or uploaded >= uploaded_from)
+            and (uploaded_to is None or uploaded <= uploaded_to)
+        ):
+            scope.append(doc["id"])
+    return scope
+
+
+def chroma_where(
+    document_ids: list[str] | None = None, filename: str | None = None
+) -> dict | None:
+    """Chroma ``where`` clause for a document scope and/or a filename."""
+    conditions = []
+    if document_ids is not None:
+        conditions.append({"document_id": {"$in": document_ids}})
+    if filename:
+        conditions.append({"filename": filename})
+    if len(conditions) > 1:
+        return {"$and": conditions}
+    return conditions[0] if conditions else None
+
+
+class HybridRetriever:
+    """Chunk retrieval behind the ``retrieve_context`` tool.
+
+    Fetches ``vector_k`` candidates by embedding similarity and
+    ``lexical_k`` by BM25 keyword match and fuses the two rankings with
+    reciprocal rank fusion. With a ``reranker``, the best ``rerank_k``
+    fused candidates are rescored by the cross-encoder; either way the
+    best ``top_k`` are returned. Without a lexical index (or with
+    ``lexical_k`` 0) candidates come from similarity search alone.
+
+    ``document_ids`` / ``filename`` filters are pushed down into both
+    searches (a Chroma ``where`` clause and the keyword query). Results go
+    through ``cache`` when given; only results whose reranking timed out
+    are not stored, since a later search may still rescore them.
+    """
+
+    def __init__(
+        self,
+        vectorstore: Chroma,
+        lexical_index: LexicalIndex | None = None,
+        top_k: int = 3,
+        vector_k: int = 10,
+        lexical_k: int = 10,
+        reranker: CrossEncoderReranker | None = None,
+        rerank_k: int = 20,
+        cache: RetrievalCache | None = None,
+    ):
+        self.vectorstore = vectorstore
+        self.lexical_index = lexical_index if lexical_k > 0 else None
+        self.top_k = top_k
+        self.vector_k = max(vector_k, top_k)
+        self.lexical_k = lexical_k
+        self.reranker = reranker
+        self.rerank_k = max(rerank_k, top_k)
+        self.cache = cache
+
+    def search(
+        self,
+        query: str,
+        document_ids: list[str] | None = None,
+        filename: str | None = None,
+    ) -> list[Document]:
+        if document_ids == []:
+            return []  # Scoped to no documents
+        if self.cache is None:
+            return self._search(query, document_ids, filename)[0]
+
+        key = self.cache.key(query, document_ids, filename)
+        docs = self.cache.get(key)
+        if docs is not None:
+            return docs
+        vector = None
+        if self.cache.similarity_threshold > 0:
+            vector = self.vectorstore.embeddings.embed_query(query)
+            docs = self.cache.nearest(key, vector)
+            if docs is not None:
+                return docs
+
+        docs, complete = self._search(query, document_ids, filename, vector)
+        if complete:
+            self.cache.set(key, docs, vector)
+        return docs
+
+    def _search(
+        self,
+        query: str,
+        document_ids: list[str] | None,
+        filename: str | None,
+        vector: list[float] | None = None,
+    ) -> tuple[list[Document], bool]:
+        """Results plus whether they are final (reranking did not time out)."""
+        if self.reranker is None:
+            return self._candidates(query, self.top_k, document_ids, filename, vector), True
+        candidates = self._candidates(query, self.rerank_k, document_ids, filename, vector)
+        if len(candidates) <= 1:
+            return candidates, True
+        return self.reranker.rerank(query, candidates, self.top_k)
+
+    def _candidates(
+        self,
+        query: str,
+        k: int,
+        document_ids: list[str] | None,
+        filename: str | None,
+        vector: list[float] | None = None,
+    ) -> list[Document]:
+        where = chroma_where(document_ids, filename)
+        if self.lexical_index is None:
+            return self._similar(query, k, where, vector)
+
+        vector_docs = self._similar(query, max(self.vector_k, k), where, vector)
+        try:
+            lexical_docs = self.lexical_index.search(
+                query, self.lexical_k, document_ids, filename
+            )
+        except sqlite3.Error as e:
+            logger.warning("[retrieval] Keyword search failed, using vectors only: %s", e)
+            lexical_docs = []
+        return reciprocal_rank_fusion([vector_docs, lexical_docs])[:k]
+
+    def _similar(self, query: str, k: int, where: dict | None, vector) -> list[Document]:
+        if vector is not None:
+            return self.vectorstore.similarity_search_by_vector(vector, k=k, filter=where)
+        return self.vectorstore.similarity_search(query, k=k, filter=where)
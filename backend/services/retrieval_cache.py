@@ -0,0 +1,78 @@
+import logging
+
+from langchain_core.documents import Document
+
+from core.cache import TTLCache, most_similar
+from services.vectorstore import CollectionVersion
+
+logger = logging.getLogger(__name__)
+
+
+def _normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class RetrievalCache:
+    """Cache of ``retrieve_context`` results.
+
+    Keys combine the normalized query, the search scope (document ids and
+    filename) and the ``CollectionVersion``, so any ingest or delete makes
+    every earlier entry unreachable; they are dropped on the next lookup.
+    Exact hits skip query embedding and the vectorstore entirely. With
+    ``similarity_threshold`` above 0, a miss is compared by cosine
+    similarity against cached queries of the same scope (this needs the
+    query embedding, which the caller then reuses for the search).
+    """
+
+    def __init__(
+        self,
+        version: CollectionVersion,
+        max_size: int = 1024,
+        ttl_seconds: float | None = 600,
+        similarity_threshold: float = 0.0,
+    ):
+        self.version = version
+        self.similarity_threshold = similarity_threshold
+        self._entries = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._seen_version = version.value
+        self.semantic_hits = 0
+
+    def key(
+        self,
+        query: str,
+        document_ids: list[str] | None = None,
+        filename: str | None = None,
+    ) -> tuple:
+        """Cache key for a search against the current collection."""
+        version = self.version.value
+        if version != self._seen_version:
+            self._seen_version = version
+            self._entries.clear()
+            logger.info("[retrieval-cache] Collection changed, cleared")
+        scope = tuple(sorted(document_ids)) if document_ids is not None else None
+        return (version, scope, filename or None, _normalize_query(query))
+
+    def get(self, key: tuple) -> list[Document] | None:
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+
+    def nearest(self, key: tuple, vector) -> list[Document] | None:
+        """Results of the most similar cached query with the same scope."""
+        docs = most_similar(
+            [entry for cached_key, entry in self._entries.items() if cached_key[:3] == key[:3]],
+            vector,
+            self.similarity_threshold,
+        )
+        if docs is not None:
+            self.semantic_hits += 1
+        return docs
+
+    def set(self, key: tuple, docs: list[Document], vector=None) -> None:
+        self._entries.set(key, (docs, vector))
+
+    def stats(self) -> dict:
+        return {
+            **self._entries.stats(),
+            "semantic_hits": self.semantic_hits,
+            "collection_version": self.version.value,
+        }
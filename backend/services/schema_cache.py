@@ -0,0 +1,272 @@
+import logging
+import threading
+import time
+
+from sqlalchemy import MetaData, Table, inspect, select, text
+from sqlalchemy.engine.reflection import ObjectKind
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.types import NullType
+
+logger = logging.getLogger(__name__)
+
+# Dialects whose column catalog can be read with a single
+# INFORMATION_SCHEMA.COLUMNS query.
+_INFORMATION_SCHEMA_DIALECTS = {"mssql", "postgresql", "mysql"}
+
+
+class SchemaCache:
+    """In-memory snapshot of the database catalog.
+
+    Serves the table list and per-table schema to the agent's SQL tools and
+    to ``GET /database/schema`` without hitting the catalog on every call.
+
+    ``refresh()`` loads the column catalog of all usable tables in one pass
+    (a single ``INFORMATION_SCHEMA.COLUMNS`` query where supported). Full
+    table reflection (keys, ``CREATE TABLE`` text for ``sql_db_schema``) and
+    sample rows happen per table on first use and are kept until the next
+    refresh. Once ``refresh_interval_seconds`` has
+    elapsed, the next access triggers a background refresh while the stale
+    snapshot keeps being served; ``version`` only changes when the catalog
+    does.
+    """
+
+    def __init__(
+        self,
+        db,
+        refresh_interval_seconds: int = 900,
+        sample_rows: int = 3,
+    ):
+        self._db = db
+        self.refresh_interval_seconds = refresh_interval_seconds
+        self.sample_rows = sample_rows
+        self._columns: dict[str, list[dict]] = {}
+        self._tables: dict[str, Table] = {}
+        self._info: dict[str, str] = {}
+        self._samples: dict[str, dict] = {}
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._listeners: list = []
+        self.refreshed_at = 0.0
+        self.version = 0
+
+    # ----- refresh -----
+
+    def _usable_table_names(self, inspector) -> list[str]:
+        schema = self._db._schema
+        names = set(inspector.get_table_names(schema=schema))
+        if self._db._view_support:
+            names.update(inspector.get_view_names(schema=schema))
+        include = self._db._include_tables
+        ignore = self._db._ignore_tables
+        if include:
+            names &= include
+        elif ignore:
+            names -= ignore
+        if self._db.dialect == "sqlite":
+            names = {n for n in names if not n.startswith("sqlite_")}
+        return sorted(names)
+
+    def _load_columns(self, inspector, names: list[str]) -> dict[str, list[dict]]:
+        wanted = set(names)
+        columns: dict[str, list[dict]] = {name: [] for name in names}
+
+        if self._db.dialect in _INFORMATION_SCHEMA_DIALECTS:
+            query = text(
+                "SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE, IS_NULLABLE "
+                "FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = :schema "
+                "ORDER BY TABLE_NAME, ORDINAL_POSITION"
+            )
+            schema = self._db._schema or inspector.default_schema_name
+            with self._db._engine.connect() as connection:
+                for table, column, data_type, nullable in connection.execute(
+                    query, {"schema": schema}
+                ):
+                    if table in wanted:
+                        columns[table].append(
+                            {"name": column, "type": data_type, "nullable": nullable == "YES"}
+                        )
+            return columns
+
+        reflected = inspector.get_multi_columns(
+            schema=self._db._schema, filter_names=names, kind=ObjectKind.ANY
+        )
+        for (_, table), table_columns in reflected.items():
+            if table in wanted:
+                columns[table] = [
+                    {"name": c["name"], "type": str(c["type"]), "nullable": c["nullable"]}
+                    for c in table_columns
+                ]
+        return columns
+
+    def refresh(self, force: bool = False) -> None:
+        """Reload the column catalog and drop sample rows.
+
+        Only tables whose columns changed lose their reflection; ``version``
+        is bumped and listeners are notified only when something changed.
+        ``force`` treats every table as changed.
+        """
+        started = time.perf_counter()
+        inspector = inspect(self._db._engine)
+        names = self._usable_table_names(inspector)
+        columns = self._load_columns(inspector, names)
+
+        with self._lock:
+            changed = [
+                name
+                for name in sorted(set(columns) | set(self._columns))
+                if columns.get(name) != self._columns.get(name)
+            ]
+            self._columns = columns
+            if force:
+                self._tables = {}
+            for name in changed:
+                self._tables.pop(name, None)
+            self._info = {}
+            self._samples = {}
+            self.refreshed_at = time.monotonic()
+            if force or changed:
+                self.version += 1
+            self._refreshing = False
+
+        logger.info(
+            "[schema] Loaded catalog for %d tables in %.2fs (version %d, %d changed)",
+            len(columns), time.perf_counter() - started, self.version, len(changed),
+        )
+        if force or changed:
+            for listener in self._listeners:
+                listener(None if force else changed)
+
+    def add_listener(self, callback) -> None:
+        """Call ``callback(tables)`` after a refresh that changed the catalog.
+
+        ``tables`` lists the added, removed or altered tables, or is None
+        after a forced refresh (treat everything as changed).
+        """
+        self._listeners.append(callback)
+
+    def invalidate(self) -> None:
+        """Refresh immediately, e.g. after a migration."""
+        self.refresh(force=True)
+
+    def _refresh_if_stale(self) -> None:
+        if not self.refresh_interval_seconds:
+            return
+        age = time.monotonic() - self.refreshed_at
+        with self._lock:
+            if age < self.refresh_interval_seconds or self._refreshing:
+                return
+            self._refreshing = True
+
+        def _run():
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception("[schema] Background refresh failed")
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=_run, name="schema-refresh", daemon=True).start()
+
+    # ----- lookups -----
+
+    def table_names(self) -> list[str]:
+        self._refresh_if_stale()
+        return sorted(self._columns)
+
+    def _get_table(self, table_name: str) -> Table:
+        """Return the fully reflected table, reflecting it on first use."""
+        if table_name not in self._columns:
+            raise ValueError(f"Table '{table_name}' not found in database")
+        table = self._tables.get(table_name)
+        if table is None:
+            table = Table(
+                table_name,
+                MetaData(),
+                schema=self._db._schema,
+                autoload_with=self._db._engine,
+            )
+            self._tables[table_name] = table
+        return table
+
+    def columns(self, table_name: str) -> list[dict]:
+        """Column summaries from the bulk catalog load (no database round-trip)."""
+        self._refresh_if_stale()
+        if table_name not in self._columns:
+            raise ValueError(f"Table '{table_name}' not found in database")
+        return self._columns[table_name]
+
+    def describe(self, table_name: str) -> dict:
+        """Full metadata for one table: columns, primary and foreign keys."""
+        table = self._get_table(table_name)
+        return {
+            "name": table_name,
+            "columns": self.columns(table_name),
+            "primary_key": [column.name for column in table.primary_key.columns],
+            "foreign_keys": [
+                {
+                    "columns": [element.parent.name for element in fk.elements],
+                    "referred_table": fk.referred_table.name,
+                    "referred_columns": [element.column.name for element in fk.elements],
+                }
+                for fk in table.foreign_key_constraints
+            ],
+        }
+
+    def get_sample_rows(self, table_name: str) -> dict:
+        """Return ``{"columns": [...], "rows": [[...]]}``, fetched once per refresh."""
+        table = self._get_table(table_name)
+        cached = self._samples.get(table_name)
+        if cached is not None:
+            return cached
+
+        columns = [column.name for column in table.columns]
+        try:
+            with self._db._engine.connect() as connection:
+                result = connection.execute(select(table).limit(self.sample_rows))
+                rows = [[str(value)[:100] for value in row] for row in result]
+        # in some dialects when there are no rows in the table a
+        # 'ProgrammingError' is returned
+        except ProgrammingError:
+            rows = []
+
+        sample = {"columns": columns, "rows": rows}
+        self._samples[table_name] = sample
+        return sample
+
+    def _render_table_info(self, table_name: str) -> str:
+        table = self._get_table(table_name)
+        for column in list(table.columns):
+            if type(column.type) is NullType:
+                table._columns.remove(column)
+
+        info = str(CreateTable(table).compile(self._db._engine)).rstrip()
+        if self.sample_rows:
+            sample = self.get_sample_rows(table_name)
+            header = "\t".join(sample["columns"])
+            rows = "\n".join("\t".join(row) for row in sample["rows"])
+            info += (
+                f"\n\n/*\n{self.sample_rows} rows from {table_name} table:\n"
+                f"{header}\n{rows}\n*/"
+            )
+        return info
+
+    def get_table_info(self, table_names: list[str]) -> str:
+        """Drop-in replacement for ``SQLDatabase.get_table_info``.
+
+        Raises:
+            ValueError: If any of the requested tables is unknown.
+        """
+        self._refresh_if_stale()
+        missing = set(table_names) - set(self._columns)
+        if missing:
+            raise ValueError(f"table_names {missing} not found in database")
+
+        parts = []
+        for name in table_names:
+            info = self._info.get(name)
+            if info is None:
+                info = self._render_table_info(name)
+                self._info[name] = info
+            parts.append(info)
+        return "\n\n".join(sorted(parts))
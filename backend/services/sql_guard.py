@@ -0,0 +1,218 @@
+import json
+import logging
+import re
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(
+    r"""
+    (?P<comment>--[^\n]*|/\*.*?\*/)
+    |(?P<literal>'(?:[^']|'')*')
+    |(?P<quoted>"(?:[^"]|"")*"|\[[^\]]*\]|`[^`]*`)
+    |(?P<word>[A-Za-z_][A-Za-z0-9_$#@]*)
+    |(?P<number>\d+(?:\.\d+)?)
+    |(?P<space>\s+)
+    |(?P<other>.)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+# Anything that writes, changes schema, runs code or changes session state.
+_FORBIDDEN = frozenset(
+    {
+        "insert", "update", "delete", "merge", "upsert", "drop", "alter",
+        "create", "truncate", "rename", "grant", "revoke", "deny", "exec",
+        "execute", "call", "into", "bulk", "openrowset", "opendatasource",
+        "openquery", "backup", "restore", "dbcc", "kill", "shutdown", "use",
+        "set", "declare", "attach", "detach", "pragma", "vacuum", "copy", "lock",
+    }
+)
+_SET_OPERATORS = frozenset({"union", "intersect", "except"})
+
+
+class SQLGuardError(ValueError):
+    """Raised when a query is rejected before execution."""
+
+
+@dataclass
+class _Token:
+    kind: str
+    value: str
+    start: int
+    end: int
+    depth: int
+
+    @property
+    def word(self) -> str:
+        return self.value.lower() if self.kind == "word" else ""
+
+
+def _strip_comments(query: str) -> str:
+    return "".join(
+        " " if match.lastgroup == "comment" else match.group()
+        for match in _TOKEN.finditer(query)
+    ).strip()
+
+
+def _tokenize(query: str) -> list[_Token]:
+    tokens, depth = [], 0
+    for match in _TOKEN.finditer(query):
+        kind, value = match.lastgroup, match.group()
+        if kind == "space":
+            continue
+        if value == ")":
+            depth -= 1
+        tokens.append(_Token(kind, value, match.start(), match.end(), depth))
+        if value == "(":
+            depth += 1
+    return tokens
+
+
+class SQLGuard:
+    """Pre-execution checks for agent-generated SQL.
+
+    ``check()`` accepts a single read-only statement (``SELECT`` or
+    ``WITH ... SELECT``), rejects anything that could write or change state,
+    and caps the number of returned rows at ``max_rows``: a ``TOP``/``LIMIT``
+    (``FETCH NEXT`` after an ``OFFSET`` on SQL Server) is injected when
+    missing and lowered when larger; ``TOP n PERCENT`` becomes ``TOP n``. ``estimate_cost()``
+    asks the database for the estimated plan cost so expensive queries can
+    be refused when ``max_cost`` is set (units are the dialect's own
+    optimizer cost units).
+    """
+
+    def __init__(self, db, max_rows: int = 200, max_cost: float = 0.0):
+        self._db = db
+        self.max_rows = max_rows
+        self.max_cost = max_cost
+
+    # ----- static checks and rewrite -----
+
+    def check(self, query: str) -> str:
+        """Validate ``query`` and return the (possibly rewritten) SQL.
+
+        Raises:
+            SQLGuardError: If the statement is not a single read-only query.
+        """
+        sql = _strip_comments(query).rstrip(";").strip()
+        tokens = _tokenize(sql)
+        if not tokens:
+            raise SQLGuardError("Empty query.")
+        if any(t.value == ";" for t in tokens):
+            raise SQLGuardError("Only a single SQL statement is allowed.")
+        if tokens[0].word not in ("select", "with"):
+            raise SQLGuardError("Only SELECT queries are allowed.")
+
+        forbidden = sorted({t.word for t in tokens} & _FORBIDDEN)
+        if forbidden:
+            raise SQLGuardError(
+                f"Statement contains forbidden keyword(s): {', '.join(forbidden).upper()}. "
+                "Only read-only SELECT queries are allowed."
+            )
+
+        if self.max_rows:
+            sql = self._limit_rows(sql, tokens)
+        return sql
+
+    def _limit_rows(self, sql: str, tokens: list[_Token]) -> str:
+        top_level = [t for t in tokens if t.depth == 0]
+        words = [t.word for t in top_level]
+
+        # Existing LIMIT n / FETCH NEXT n / TOP n at the outermost level
+        for i, token in enumerate(top_level[:-1]):
+            following = top_level[i + 1]
+            if token.word == "limit":
+                # MySQL ``LIMIT offset, count``
+                if i + 3 < len(top_level) and top_level[i + 2].value == ",":
+                    following = top_level[i + 3]
+                return self._cap(sql, following)
+            if token.word in ("next", "first") and i and words[i - 1] == "fetch":
+                return self._cap(sql, following)
+            if token.word == "top":
+                # TOP n PERCENT is unbounded in rows: replace it with a plain cap
+                close = i + 2 if following.value != "(" else i + 3
+                if close < len(top_level) and words[close] == "percent":
+                    end = top_level[close].end
+                    return f"{sql[: token.end]} {self.max_rows}{sql[end:]}"
+                if following.value == "(":
+                    following = next(
+                        (t for t in tokens if t.start > following.start and t.kind == "number"),
+                        following,
+                    )
+                return self._cap(sql, following)
+
+        offset = next((t for t in top_level if t.word == "offset"), None)
+        if self._db.dialect != "mssql":
+            if offset is not None:
+                return f"{sql[: offset.start]}LIMIT {self.max_rows} {sql[offset.start:]}"
+            return f"{sql} LIMIT {self.max_rows}"
+
+        # SQL Server: TOP cannot be combined with OFFSET, and a set operation
+        # needs one cap over the whole result rather than on a branch. A
+        # constant ORDER BY makes OFFSET/FETCH legal without wrapping the query
+        # in a derived table, which would fail on unnamed columns.
+        fetch = f"OFFSET 0 ROWS FETCH NEXT {self.max_rows} ROWS ONLY"
+        if offset is not None:
+            return f"{sql} FETCH NEXT {self.max_rows} ROWS ONLY"
+        if _SET_OPERATORS & set(words):
+            if "order" in words:
+                return f"{sql} {fetch}"
+            return f"{sql} ORDER BY (SELECT NULL) {fetch}"
+        select = max(i for i, word in enumerate(words) if word == "select")
+        insert_after = top_level[select]
+        if select + 1 < len(top_level) and words[select + 1] in ("distinct", "all"):
+            insert_after = top_level[select + 1]
+        return f"{sql[: insert_after.end]} TOP {self.max_rows}{sql[insert_after.end:]}"
+
+    def _cap(self, sql: str, token: _Token) -> str:
+        if token.kind != "number" or int(float(token.value)) <= self.max_rows:
+            return sql
+        return f"{sql[: token.start]}{self.max_rows}{sql[token.end:]}"
+
+    # ----- cost estimation -----
+
+    def estimate_cost(self, query: str) -> float | None:
+        """Estimated plan cost from the database optimizer, if available."""
+        dialect = self._db.dialect
+        try:
+            with self._db._engine.connect() as connection:
+                if dialect == "mssql":
+                    connection.execute(text("SET SHOWPLAN_XML ON"))
+                    try:
+                        plan = connection.execute(text(query)).scalar()
+                    finally:
+                        connection.execute(text("SET SHOWPLAN_XML OFF"))
+                    match = re.search(r'StatementSubTreeCost="([0-9.Ee+-]+)"', plan or "")
+                    return float(match.group(1)) if match else None
+
+                if dialect == "postgresql":
+                    plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}")).scalar()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    return float(plan[0]["Plan"]["Total Cost"])
+
+                if dialect == "mysql":
+                    plan = connection.execute(text(f"EXPLAIN FORMAT=JSON {query}")).scalar()
+                    return float(json.loads(plan)["query_block"]["cost_info"]["query_cost"])
+        except Exception as e:
+            logger.warning("[sql-guard] Cost estimation failed: %s", e)
+        return None
+
+    def enforce_cost(self, query: str) -> None:
+        """Raise if the estimated cost of ``query`` is above ``max_cost``.
+
+        Raises:
+            SQLGuardError: If the plan is too expensive to run.
+        """
+        if not self.max_cost:
+            return
+        cost = self.estimate_cost(query)
+        if cost is not None and cost > self.max_cost:
+            raise SQLGuardError(
+                f"Query rejected: estimated cost {cost:.2f} exceeds the limit of "
+                f"{self.max_cost:.2f}. Add selective filters, aggregate, or query "
+                "fewer rows."
+            )
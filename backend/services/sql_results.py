@@ -0,0 +1,144 @@
+import datetime
+import decimal
+import logging
+from typing import Iterator
+
+from sqlalchemy import text
+
+logger = logging.getLogger(__name__)
+
+
+def _jsonable(value):
+    """Coerce a database value into something ``json.dumps`` accepts."""
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return f"<{len(value)} bytes>"
+    return str(value)
+
+
+def iter_query_batches(db, query: str, batch_size: int = 500) -> Iterator[tuple[list[str], list[list]]]:
+    """Execute ``query`` on a server-side cursor, yielding ``(columns, rows)`` batches.
+
+    Rows are converted to JSON-friendly lists. Only one batch is held in
+    memory at a time.
+    """
+    with db._engine.connect() as connection:
+        result = connection.execution_options(
+            stream_results=True, max_row_buffer=batch_size
+        ).execute(text(query))
+        columns = list(result.keys())
+        for partition in result.partitions(batch_size):
+            yield columns, [[_jsonable(value) for value in row] for row in partition]
+
+
+class ResultSummary:
+    """Bounded digest of a query result for the agent's context.
+
+    Keeps the total row count, the first ``preview_rows`` rows, and per
+    column null counts plus min/max/mean for numeric columns or a capped
+    distinct count for everything else.
+    """
+
+    _DISTINCT_CAP = 50
+
+    def __init__(self, columns: list[str], preview_rows: int = 20):
+        self.columns = columns
+        self.preview_rows = preview_rows
+        self.row_count = 0
+        self.preview: list[list] = []
+        self._stats = [
+            {"nulls": 0, "numeric": True, "min": None, "max": None, "sum": 0.0, "distinct": set()}
+            for _ in columns
+        ]
+
+    def add(self, rows: list[list]) -> None:
+        for row in rows:
+            if len(self.preview) < self.preview_rows:
+                self.preview.append(row)
+            for value, stats in zip(row, self._stats):
+                if value is None:
+                    stats["nulls"] += 1
+                    continue
+                if stats["numeric"] and isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stats["min"] = value if stats["min"] is None else min(stats["min"], value)
+                    stats["max"] = value if stats["max"] is None else max(stats["max"], value)
+                    stats["sum"] += value
+                else:
+                    stats["numeric"] = False
+                if len(stats["distinct"]) <= self._DISTINCT_CAP:
+                    stats["distinct"].add(value)
+        self.row_count += len(rows)
+
+    def _column_stats(self, name: str, stats: dict) -> str:
+        parts = [f"nulls={stats['nulls']}"]
+        non_null = self.row_count - stats["nulls"]
+        if stats["numeric"] and non_null:
+            parts.append(
+                f"min={stats['min']}, max={stats['max']}, mean={stats['sum'] / non_null:.4g}"
+            )
+        else:
+            distinct = len(stats["distinct"])
+            parts.append(
+                f"distinct={'>' if distinct > self._DISTINCT_CAP else ''}"
+                f"{min(distinct, self._DISTINCT_CAP)}"
+            )
+        return f"{name}: {', '.join(parts)}"
+
+    def render(self) -> str:
+        lines = [f"Rows returned: {self.row_count}", f"Columns: {', '.join(self.columns)}"]
+        if self.preview:
+            shown = len(self.preview)
+            lines.append(f"First {shown} rows:")
+            lines.extend(str(tuple(row)) for row in self.preview)
+        if self.row_count > len(self.preview):
+            lines.append("Column stats:")
+            lines.extend(
+                self._column_stats(name, stats)
+                for name, stats in zip(self.columns, self._stats)
+            )
+            lines.append(
+                "(Full result was streamed to the user; only this summary is shown here.)"
+            )
+        return "\n".join(lines)
+
+
+def run_streaming_query(
+    db,
+    query: str,
+    on_batch,
+    batch_size: int = 50,
+    preview_rows: int = 20,
+    keep_rows: bool = False,
+) -> tuple[str, dict | None]:
+    """Stream ``query`` in batches to ``on_batch`` and summarize it.
+
+    ``on_batch`` receives ``{"columns", "rows", "offset"}`` per batch. Errors
+    are returned as ``"Error: ..."`` text, like ``SQLDatabase.run_no_throw``.
+
+    Returns:
+        The summary text for the agent and, if ``keep_rows``, the full
+        ``{"columns", "rows"}`` table (e.g. for the result cache).
+    """
+    summary = None
+    kept: list[list] = []
+    try:
+        for columns, rows in iter_query_batches(db, query, batch_size):
+            if summary is None:
+                summary = ResultSummary(columns, preview_rows)
+            on_batch({"columns": columns, "rows": rows, "offset": summary.row_count})
+            summary.add(rows)
+            if keep_rows:
+                kept.extend(rows)
+    except Exception as e:
+        logger.warning("[sql-stream] Query failed: %s", e)
+        return f"Error: {e}", None
+
+    if summary is None:
+        return "Rows returned: 0", ({"columns": [], "rows": []} if keep_rows else None)
+    table = {"columns": summary.columns, "rows": kept} if keep_rows else None
+    return summary.render(), table
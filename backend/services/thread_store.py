@@ -7,7 +7,8 @@ from pathlib import Path
 class ThreadStore:
     """Simple JSON-file-backed thread metadata store.
 
-    Stores thread metadata (id, title, mode, timestamps).
+    Stores thread metadata (id, title, mode, pinned document ids,
+    timestamps).
     Conversation messages are stored separately in LangGraph checkpoints.
     """
 
@@ -29,13 +30,19 @@ class ThreadStore:
             encoding="utf-8",
         )
 
-    def create(self, title: str | None = None, mode: str = "sql") -> dict:
+    def create(
+        self,
+        title: str | None = None,
+        mode: str = "sql",
+        document_ids: list[str] | None = None,
+    ) -> dict:
         thread_id = str(uuid.uuid4())
         now = datetime.now(timezone.utc).isoformat()
         thread = {
             "id": thread_id,
             "title": title or "New Chat",
             "mode": mode,
+            "document_ids": document_ids or [],
             "created_at": now,
             "updated_at": now,
         }
@@ -1,12 +1,37 @@
 import logging
+import threading
 
 import chromadb
 from langchain_chroma import Chroma
+from langchain_core.documents import Document
+
+from services.embedding_cache import CachedEmbeddings, EmbeddingCache
+from services.flat_vectorstore import FlatVectorStore
+from services.lexical_index import LexicalIndex
 
 logger = logging.getLogger(__name__)
 
 COLLECTION_NAME = "documents-qwen"
 
+# Ids per update/delete call; Chroma rejects very large batches
+_ID_BATCH = 1000
+
+
+class CollectionVersion:
+    """Counter of writes to the document collection.
+
+    Bumped by the write helpers in this module, so it changes whenever the
+    corpus does; the retrieval cache keys results on it.
+    """
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def bump(self) -> None:
+        with self._lock:
+            self.value += 1
+
 
 def create_embeddings(model_name: str):
     """Create an embeddings instance based on the model name.
@@ -59,19 +84,45 @@ def create_vectorstore(
     host: str,
     port: int,
     embedding_model: str,
-) -> Chroma:
-    """Create a LangChain Chroma vectorstore connected to Docker ChromaDB.
+    embedding_cache: EmbeddingCache | None = None,
+    backend: str = "http",
+    path: str = "vectorstore",
+) -> Chroma | FlatVectorStore:
+    """Create the document vectorstore.
 
     Args:
-        host: ChromaDB server host.
-        port: ChromaDB server port.
+        host: ChromaDB server host (``http`` backend).
+        port: ChromaDB server port (``http`` backend).
         embedding_model: Embedding model name (auto-detects provider).
+        embedding_cache: Optional cache consulted before embedding chunks
+            and queries.
+        backend: ``http`` for the Docker ChromaDB server, ``persistent``
+            for Chroma embedded in this process, or ``flat`` for the
+            in-process NumPy index.
+        path: Storage directory of the ``persistent`` and ``flat`` backends.
 
     Returns:
-        LangChain Chroma wrapper ready for similarity search and document add.
+        LangChain vectorstore ready for similarity search and document add.
+
+    Raises:
+        ValueError: If ``backend`` is unknown.
     """
-    client = chromadb.HttpClient(host=host, port=port)
+    if backend not in ("http", "persistent", "flat"):
+        raise ValueError(
+            f"Unknown vectorstore backend: {backend}. Must be one of: http, persistent, flat"
+        )
     embeddings = create_embeddings(embedding_model)
+    if embedding_cache is not None:
+        embeddings = CachedEmbeddings(embeddings, embedding_cache, embedding_model)
+
+    if backend == "flat":
+        logger.info("[vectorstore] Using flat index in %s", path)
+        return FlatVectorStore(embeddings, path)
+    if backend == "persistent":
+        logger.info("[vectorstore] Using embedded Chroma in %s", path)
+        client = chromadb.PersistentClient(path=path)
+    else:
+        client = chromadb.HttpClient(host=host, port=port)
 
     return Chroma(
         client=client,
@@ -80,19 +131,131 @@ def create_vectorstore(
     )
 
 
-def delete_document_chunks(vectorstore: Chroma, document_id: str) -> int:
+def upsert_chunks(
+    vectorstore: Chroma,
+    ids: list[str],
+    chunks: list,
+    embeddings: list[list[float]],
+    lexical_index: LexicalIndex | None = None,
+    version: CollectionVersion | None = None,
+) -> None:
+    """Insert or replace already-embedded chunks in the collection.
+
+    Args:
+        vectorstore: The Chroma vectorstore instance.
+        ids: Chunk ids (same length as ``chunks``).
+        chunks: LangChain Documents.
+        embeddings: One vector per chunk.
+        lexical_index: Optional keyword index to add the chunks to as well.
+        version: Optional collection version to bump.
+    """
+    vectorstore._collection.upsert(
+        ids=ids,
+        embeddings=embeddings,
+        documents=[chunk.page_content for chunk in chunks],
+        metadatas=[chunk.metadata for chunk in chunks],
+    )
+    if lexical_index is not None:
+        lexical_index.upsert(ids, chunks)
+    if version is not None:
+        version.bump()
+
+
+def get_document_chunk_ids(vectorstore: Chroma, document_id: str) -> list[str]:
+    """Ids of all chunks stored for a document."""
+    results = vectorstore._collection.get(where={"document_id": document_id}, include=[])
+    return results.get("ids", [])
+
+
+def update_chunk_metadata(
+    vectorstore: Chroma,
+    ids: list[str],
+    metadatas: list[dict],
+    lexical_index: LexicalIndex | None = None,
+    version: CollectionVersion | None = None,
+) -> None:
+    """Replace the metadata of stored chunks without re-embedding them."""
+    for start in range(0, len(ids), _ID_BATCH):
+        vectorstore._collection.update(
+            ids=ids[start : start + _ID_BATCH],
+            metadatas=metadatas[start : start + _ID_BATCH],
+        )
+    if lexical_index is not None:
+        lexical_index.update_metadata(ids, metadatas)
+    if version is not None:
+        version.bump()
+
+
+def delete_chunks(
+    vectorstore: Chroma,
+    ids: list[str],
+    lexical_index: LexicalIndex | None = None,
+    version: CollectionVersion | None = None,
+) -> None:
+    """Delete chunks by id."""
+    for start in range(0, len(ids), _ID_BATCH):
+        vectorstore._collection.delete(ids=ids[start : start + _ID_BATCH])
+    if lexical_index is not None:
+        lexical_index.delete(ids)
+    if version is not None:
+        version.bump()
+
+
+def delete_document_chunks(
+    vectorstore: Chroma,
+    document_id: str,
+    lexical_index: LexicalIndex | None = None,
+    version: CollectionVersion | None = None,
+) -> int:
     """Delete all vector chunks belonging to a specific document.
 
     Args:
         vectorstore: The Chroma vectorstore instance.
         document_id: UUID of the document whose chunks to delete.
+        lexical_index: Optional keyword index to remove the chunks from too.
+        version: Optional collection version to bump.
 
     Returns:
         Number of chunks deleted.
     """
+    if lexical_index is not None:
+        lexical_index.delete_document(document_id)
     collection = vectorstore._collection
-    results = collection.get(where={"document_id": document_id})
+    results = collection.get(where={"document_id": document_id}, include=[])
     ids = results.get("ids", [])
     if ids:
         collection.delete(ids=ids)
+        if version is not None:
+            version.bump()
     return len(ids)
+
+
+def backfill_lexical_index(vectorstore: Chroma, lexical_index: LexicalIndex) -> int:
+    """Index every stored chunk in an empty keyword index.
+
+    Used once when the lexical index is introduced to a collection that
+    already holds documents.
+
+    Returns:
+        Number of chunks indexed.
+    """
+    collection = vectorstore._collection
+    indexed = 0
+    while True:
+        results = collection.get(
+            limit=_ID_BATCH, offset=indexed, include=["documents", "metadatas"]
+        )
+        ids = results.get("ids", [])
+        if not ids:
+            break
+        lexical_index.upsert(
+            ids,
+            [
+                Document(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(results["documents"], results["metadatas"])
+            ],
+        )
+        indexed += len(ids)
+    if indexed:
+        logger.info("[lexical] Indexed %d existing chunks", indexed)
+    return indexed
@@ -0,0 +1,31 @@
+from langchain_core.messages import AIMessage, AIMessageChunk
+
+from core.agent import TokenTracker, _chunk_events, _message_events
+
+
+def events(msg) -> list[str]:
+    return [event.split("\n")[0] for event in _message_events(msg, TokenTracker())]
+
+
+def test_preamble_before_tool_call_resets_streamed_answer():
+    call = {"name": "sql_db_query", "args": {"query": "SELECT 1"}, "id": "c1"}
+    assert events(AIMessage("Let me check.", tool_calls=[call])) == [
+        "event: answer_reset",
+        "event: step",
+    ]
+    assert events(AIMessage("", tool_calls=[call])) == ["event: step"]
+    assert events(AIMessage("42")) == ["event: answer"]
+
+
+def test_only_agent_model_text_is_streamed():
+    model = {"langgraph_node": "model"}
+    deltas = [
+        (AIMessageChunk("Hel"), model),
+        (AIMessageChunk("lo"), model),
+        (AIMessageChunk("inner"), {"langgraph_node": "tools"}),
+    ]
+    streamed = [e for chunk in deltas for e in _chunk_events("messages", chunk, TokenTracker())]
+    assert [e.split("data: ")[1].strip() for e in streamed] == [
+        '{"type": "delta", "content": "Hel"}',
+        '{"type": "delta", "content": "lo"}',
+    ]
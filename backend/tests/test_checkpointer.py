@@ -0,0 +1,125 @@
+import asyncio
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from sqlalchemy import func, select
+
+from services.memory import SQLCheckpointSaver, _blobs, _checkpoints, _writes
+
+
+class State(TypedDict):
+    messages: Annotated[list, add_messages]
+
+
+def _answer(state: State) -> dict:
+    turn = sum(isinstance(m, HumanMessage) for m in state["messages"])
+    return {
+        "messages": [
+            ToolMessage(content="x" * 5000, tool_call_id=f"call-{turn}", artifact={"turn": turn}),
+            AIMessage(content=f"answer {turn}"),
+        ]
+    }
+
+
+@pytest.fixture
+def saver(tmp_path):
+    saver = SQLCheckpointSaver(
+        f"sqlite:///{tmp_path / 'checkpoints.db'}",
+        max_checkpoints=3,
+        compact_interval_seconds=0,
+        keep_recent_turns=1,
+        compact_max_chars=100,
+    )
+    yield saver
+    saver.close()
+
+
+def run_turns(saver, thread_id: str, turns: int):
+    graph = StateGraph(State)
+    graph.add_node("answer", _answer)
+    graph.add_edge(START, "answer")
+    app = graph.compile(checkpointer=saver)
+    config = {"configurable": {"thread_id": thread_id}}
+    for turn in range(turns):
+        app.invoke({"messages": [HumanMessage(content=f"question {turn}")]}, config)
+    return app, config
+
+
+def count(saver, table, thread_id):
+    with saver._engine.connect() as connection:
+        return connection.execute(
+            select(func.count()).select_from(table).where(table.c.thread_id == thread_id)
+        ).scalar()
+
+
+def test_put_and_get_round_trip(saver):
+    app, config = run_turns(saver, "t1", 2)
+    messages = app.get_state(config).values["messages"]
+    assert [m.content for m in messages if isinstance(m, AIMessage)] == ["answer 1", "answer 2"]
+    # The thread route reads state through the async API
+    assert asyncio.run(app.aget_state(config)).values["messages"] == messages
+    latest = saver.get_tuple(config)
+    assert latest.parent_config is not None
+    assert saver.get_tuple(latest.parent_config).checkpoint["id"] < latest.checkpoint["id"]
+
+
+def test_prune_keeps_latest_checkpoints_and_referenced_blobs(saver):
+    app, config = run_turns(saver, "t1", 4)
+    assert count(saver, _checkpoints, "t1") == 3
+    assert len(list(saver.list(config))) == 3
+
+    with saver._engine.connect() as connection:
+        kept_ids = {row.checkpoint_id for row in connection.execute(select(_checkpoints))}
+        write_ids = {row.checkpoint_id for row in connection.execute(select(_writes))}
+    assert write_ids <= kept_ids
+    # Only the message versions the kept checkpoints point at survive
+    referenced = {
+        tuple(item)
+        for t in saver.list(config)
+        for item in t.checkpoint["channel_versions"].items()
+        if item[0] == "messages"
+    }
+    with saver._engine.connect() as connection:
+        stored = {
+            (row.channel, row.version)
+            for row in connection.execute(select(_blobs).where(_blobs.c.channel == "messages"))
+        }
+    assert stored == {(channel, str(version)) for channel, version in referenced}
+    # History is intact
+    assert len(app.get_state(config).values["messages"]) == 12
+
+
+def test_compact_shortens_old_tool_outputs_only(saver):
+    app, config = run_turns(saver, "t1", 3)
+    result = saver.compact()
+    assert result["threads"] == 1
+    assert result["chars_saved"] > 0
+
+    tools = [m for m in app.get_state(config).values["messages"] if isinstance(m, ToolMessage)]
+    assert [len(m.content) < 5000 for m in tools] == [True, True, False]
+    assert tools[0].artifact is None
+    assert tools[-1].artifact == {"turn": 3}
+    # Nothing new to compact
+    assert saver.compact()["threads"] == 0
+
+
+def test_delete_thread_removes_all_rows(saver):
+    run_turns(saver, "t1", 2)
+    _, other = run_turns(saver, "t2", 1)
+    saver.delete_thread("t1")
+    for table in (_checkpoints, _blobs, _writes):
+        assert count(saver, table, "t1") == 0
+    assert saver.get_tuple({"configurable": {"thread_id": "t1"}}) is None
+    assert saver.get_tuple(other) is not None
+
+
+def test_retention_expires_idle_threads(saver):
+    run_turns(saver, "t1", 1)
+    saver.retention_days = 1
+    with saver._engine.begin() as connection:
+        connection.execute(_checkpoints.update().values(created_at=0))
+    assert saver.compact()["expired"] == 1
+    assert count(saver, _checkpoints, "t1") == 0
@@ -0,0 +1,64 @@
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+
+from core.context_window import _tokens, fit_to_budget
+
+BIG = "x" * 4000  # ~1000 tokens
+
+
+def turn(n: int, output: str = "ok") -> list:
+    return [
+        HumanMessage(f"question {n}"),
+        AIMessage("", tool_calls=[{"name": "search", "args": {}, "id": f"call-{n}"}]),
+        ToolMessage(output, tool_call_id=f"call-{n}"),
+        AIMessage(f"answer {n}"),
+    ]
+
+
+def shortened(msg: ToolMessage) -> bool:
+    return "tool output omitted" in msg.content
+
+
+def test_within_budget_is_untouched():
+    messages = turn(1) + turn(2)
+    assert fit_to_budget(messages, max_tokens=10_000) is messages
+
+
+def test_tool_outputs_are_cut_oldest_first():
+    messages = turn(1, BIG) + turn(2, BIG) + [HumanMessage("question 3")]
+    result = fit_to_budget(messages, max_tokens=1400, tool_max_tokens=50)
+    assert len(result) == len(messages)
+    assert shortened(result[2])
+    assert result[6] is messages[6]
+
+
+def test_turns_are_dropped_whole_after_cutting():
+    messages = turn(1) + turn(2) + turn(3)
+    budget = _tokens(turn(2) + turn(3))
+    # The summary before the first user turn always survives
+    summary = SystemMessage("Summary of the earlier conversation")
+    result = fit_to_budget([summary] + messages, max_tokens=budget + _tokens([summary]))
+    assert result == [summary] + messages[4:]
+
+
+def test_current_turn_cuts_answered_tool_outputs_only():
+    messages = [
+        HumanMessage("question"),
+        AIMessage("", tool_calls=[{"name": "search", "args": {}, "id": "call-1"}]),
+        ToolMessage(BIG, tool_call_id="call-1"),
+        AIMessage("", tool_calls=[{"name": "search", "args": {}, "id": "call-2"}]),
+        ToolMessage(BIG, tool_call_id="call-2"),
+    ]
+    result = fit_to_budget(messages, max_tokens=1200, tool_max_tokens=50)
+    assert shortened(result[2])
+    assert result[4] is messages[4]
+    assert _tokens(result) <= 1200
+
+
+def test_tool_calls_never_lose_their_results():
+    messages = turn(1, BIG) + turn(2) + turn(3, BIG) + turn(4)
+    for budget in range(50, _tokens(messages), 50):
+        result = fit_to_budget(messages, max_tokens=budget, tool_max_tokens=20)
+        assert isinstance(result[0], HumanMessage)
+        calls = {c["id"] for m in result if isinstance(m, AIMessage) for c in m.tool_calls}
+        results = {m.tool_call_id for m in result if isinstance(m, ToolMessage)}
+        assert calls == results
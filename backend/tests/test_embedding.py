@@ -0,0 +1,87 @@
+import threading
+import time
+
+import pytest
+
+from services.embedding import BatchEmbedder
+
+
+class FakeEmbeddings:
+    """Embeds ``"n"`` as ``[n]``; hooks run before each batch."""
+
+    def __init__(self, before=None):
+        self.before = before
+        self.batches: list[list[str]] = []
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.batches.append(list(texts))
+        if self.before:
+            self.before(texts)
+        return [[float(text)] for text in texts]
+
+
+def texts(n: int) -> list[str]:
+    return [str(i) for i in range(n)]
+
+
+@pytest.fixture
+def make_embedder():
+    embedders = []
+
+    def make(embeddings, **kwargs):
+        embedder = BatchEmbedder(embeddings, **kwargs)
+        embedders.append(embedder)
+        return embedder
+
+    yield make
+    for embedder in embedders:
+        embedder.shutdown()
+
+
+def test_batches_run_concurrently(make_embedder):
+    # Each batch waits for another one to be in flight at the same time
+    barrier = threading.Barrier(2, timeout=5)
+    embedder = make_embedder(
+        FakeEmbeddings(lambda _: barrier.wait()), batch_size=2, concurrency=2
+    )
+    results = list(embedder.embed_batches(texts(4)))
+    assert [start for start, _ in results] == [0, 2]
+    assert embedder.stats()["batches"] == 2
+
+
+def test_results_keep_input_order(make_embedder):
+    # Earlier batches finish last
+    def slow_first(batch):
+        time.sleep(0.05 * (3 - int(batch[0]) // 2))
+
+    embedder = make_embedder(FakeEmbeddings(slow_first), batch_size=2, concurrency=3)
+    results = list(embedder.embed_batches(texts(6)))
+    assert [start for start, _ in results] == [0, 2, 4]
+    assert [v[0] for _, vectors in results for v in vectors] == [0, 1, 2, 3, 4, 5]
+
+
+def test_failed_batch_is_retried_on_its_own(make_embedder):
+    failed = []
+
+    def fail_second_batch_once(batch):
+        if batch[0] == "2" and not failed:
+            failed.append(batch)
+            raise ConnectionError("rate limited")
+
+    embeddings = FakeEmbeddings(fail_second_batch_once)
+    embedder = make_embedder(embeddings, batch_size=2, concurrency=2)
+    results = list(embedder.embed_batches(texts(6), max_retries=1, retry_backoff_seconds=0.001))
+
+    assert [v[0] for _, vectors in results for v in vectors] == [0, 1, 2, 3, 4, 5]
+    assert sorted(map(tuple, embeddings.batches)) == [("0", "1"), ("2", "3"), ("2", "3"), ("4", "5")]
+
+
+def test_batch_failing_every_retry_raises(make_embedder):
+    def always_fail(batch):
+        raise ConnectionError("down")
+
+    embedder = make_embedder(FakeEmbeddings(always_fail), batch_size=2, concurrency=1)
+    with pytest.raises(ConnectionError):
+        list(embedder.embed_batches(texts(2), max_retries=2, retry_backoff_seconds=0.001))
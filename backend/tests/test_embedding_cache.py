@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+class Provider:
+    """Document vectors are ``[len, 0]``, query vectors ``[len, 1]``."""
+
+    def __init__(self):
+        self.documents: list[str] = []
+        self.queries: list[str] = []
+
+    def embed_documents(self, texts):
+        self.documents.extend(texts)
+        return [[float(len(text)), 0.0] for text in texts]
+
+    def embed_query(self, text):
+        self.queries.append(text)
+        return [float(len(text)), 1.0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "embeddings.db"), max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_documents_and_queries_are_cached_separately(cache):
+    provider = Provider()
+    embeddings = CachedEmbeddings(provider, cache, "model-a")
+    assert embeddings.embed_documents(["refund"]) == [[6.0, 0.0]]
+    assert embeddings.embed_query("refund") == [6.0, 1.0]
+    assert provider.documents == ["refund"]
+    assert provider.queries == ["refund"]
+    assert cache.key("model-a", "document", "refund") != cache.key("model-b", "document", "refund")
+
+
+def test_hits_skip_the_provider(cache):
+    provider = Provider()
+    embeddings = CachedEmbeddings(provider, cache, "model-a")
+    embeddings.embed_documents(["alpha", "bravo"])
+    assert embeddings.embed_documents(["bravo", "charlie", "alpha"]) == [
+        [5.0, 0.0],
+        [7.0, 0.0],
+        [5.0, 0.0],
+    ]
+    assert provider.documents == ["alpha", "bravo", "charlie"]
+    embeddings.embed_query("alpha")
+    embeddings.embed_query("alpha")
+    assert provider.queries == ["alpha"]
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (3, 4, 4)
+
+
+def test_vectors_survive_a_restart(tmp_path):
+    path = str(tmp_path / "embeddings.db")
+    first = EmbeddingCache(path)
+    CachedEmbeddings(Provider(), first, "m").embed_documents(["alpha"])
+    first.close()
+
+    reopened = EmbeddingCache(path)
+    provider = Provider()
+    assert CachedEmbeddings(provider, reopened, "m").embed_documents(["alpha"]) == [[5.0, 0.0]]
+    assert provider.documents == []
+    reopened.close()
+
+
+def test_least_recently_used_vectors_are_evicted(cache, monkeypatch):
+    clock = iter(range(1, 100))
+    monkeypatch.setattr("services.embedding_cache.time", SimpleNamespace(time=lambda: next(clock)))
+    keys = [cache.key("m", "document", str(i)) for i in range(11)]
+    for key in keys[:10]:
+        cache.put_many([key], [[1.0]])
+    cache.get_many([keys[0]])  # Recently used again
+
+    cache.put_many([keys[10]], [[1.0]])
+    # Over max_entries: back down to 90%, oldest last_used first
+    assert cache.stats()["size"] == 9
+    assert cache.stats()["evictions"] == 2
+    present = [vector is not None for vector in cache.get_many(keys)]
+    assert present == [True, False, False] + [True] * 8
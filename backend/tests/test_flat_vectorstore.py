@@ -0,0 +1,110 @@
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.flat_vectorstore import FlatCollection, FlatVectorStore, matches_where
+
+META = [
+    {"document_id": "a", "filename": "a.txt", "chunk_index": 0},
+    {"document_id": "a", "filename": "a.txt", "chunk_index": 1},
+    {"document_id": "b", "filename": "b.pdf", "chunk_index": 0},
+]
+
+
+@pytest.fixture
+def collection():
+    collection = FlatCollection()
+    collection.upsert(
+        ids=["a-0", "a-1", "b-0"],
+        embeddings=[[0.0, 0.0], [1.0, 0.0], [0.0, 5.0]],
+        documents=["zero", "one", "five"],
+        metadatas=META,
+    )
+    return collection
+
+
+@pytest.mark.parametrize(
+    ("where", "expected"),
+    [
+        (None, True),
+        ({"document_id": "a"}, True),
+        ({"document_id": "b"}, False),
+        ({"document_id": {"$in": ["a", "c"]}}, True),
+        ({"document_id": {"$nin": ["a"]}}, False),
+        ({"chunk_index": {"$gte": 1}}, True),
+        ({"chunk_index": {"$lt": 1}}, False),
+        ({"missing": {"$gt": 0}}, False),
+        ({"$and": [{"document_id": "a"}, {"filename": "a.txt"}]}, True),
+        ({"$and": [{"document_id": "a"}, {"filename": "b.pdf"}]}, False),
+        ({"$or": [{"document_id": "b"}, {"chunk_index": {"$ne": 0}}]}, True),
+    ],
+)
+def test_matches_where(where, expected):
+    assert matches_where(META[1], where) is expected
+
+
+def test_get_by_ids_where_and_paging(collection):
+    assert collection.get(ids=["b-0", "missing", "a-0"])["ids"] == ["b-0", "a-0"]
+    assert collection.get(where={"document_id": "a"}, include=[]) == {"ids": ["a-0", "a-1"]}
+    page = collection.get(limit=2, offset=1)
+    assert page["ids"] == ["a-1", "b-0"]
+    assert page["documents"] == ["one", "five"]
+    assert page["metadatas"][1]["filename"] == "b.pdf"
+    assert collection.get(ids=["a-1"], include=["embeddings"])["embeddings"] == [[1.0, 0.0]]
+
+
+def test_get_returns_copies(collection):
+    collection.get(ids=["a-0"])["metadatas"][0]["document_id"] = "changed"
+    assert collection.get(ids=["a-0"])["metadatas"][0]["document_id"] == "a"
+
+
+def test_upsert_replaces_existing_ids(collection):
+    collection.upsert(["a-1", "c-0"], [[2.0, 0.0], [9.0, 9.0]], ["two", "nine"], [{}, {}])
+    assert collection.count() == 4
+    assert collection.get(ids=["a-1"])["documents"] == ["two"]
+    assert collection.nearest([2.0, 0.0], 1) == [(1, 0.0)]
+
+
+def test_update_replaces_metadata(collection):
+    collection.update(["a-0", "missing"], [{"document_id": "a", "chunk_index": 5}, {}])
+    assert collection.get(ids=["a-0"])["metadatas"] == [{"document_id": "a", "chunk_index": 5}]
+
+
+def test_delete_by_ids_and_where(collection):
+    collection.delete(ids=["a-0"])
+    assert collection.get()["ids"] == ["a-1", "b-0"]
+    collection.delete(where={"document_id": "b"})
+    assert collection.get()["ids"] == ["a-1"]
+    assert collection.nearest([0.0, 0.0], 5) == [(0, 1.0)]
+    collection.delete(ids=["missing"])
+    assert collection.count() == 1
+
+
+def test_nearest_orders_by_distance_within_filter(collection):
+    assert collection.nearest([0.9, 0.0], 3) == [
+        (1, pytest.approx(0.01)),
+        (0, pytest.approx(0.81)),
+        (2, pytest.approx(25.81)),
+    ]
+    assert [row for row, _ in collection.nearest([0.9, 0.0], 3, {"document_id": "b"})] == [2]
+    assert collection.nearest([0.9, 0.0], 3, {"document_id": "c"}) == []
+    assert FlatCollection().nearest([0.0], 3) == []
+
+
+def test_store_persists_on_close(tmp_path):
+    embeddings = DeterministicFakeEmbedding(size=8)
+    store = FlatVectorStore(embeddings, str(tmp_path))
+    store.add_texts(["alpha", "bravo"], [{"document_id": "a"}, {"document_id": "b"}], ["1", "2"])
+    store.close()
+
+    reopened = FlatVectorStore(embeddings, str(tmp_path))
+    assert reopened._collection.count() == 2
+    hits = reopened.similarity_search("bravo", k=1, filter={"document_id": "b"})
+    assert [(d.id, d.page_content) for d in hits] == [("2", "bravo")]
+    # Writes on top of the memory-mapped snapshot
+    reopened.add_texts(["bravo two"], [{"document_id": "b"}], ["2"])
+    reopened._collection.delete(ids=["1"])
+    reopened.add_texts(["charlie"], [{"document_id": "c"}], ["3"])
+    reopened.close()
+    final = FlatVectorStore(embeddings, str(tmp_path))._collection.get()
+    assert final["ids"] == ["2", "3"]
+    assert final["documents"] == ["bravo two", "charlie"]
@@ -0,0 +1,126 @@
+import uuid
+
+import chromadb
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.embedding import BatchEmbedder
+from services.ingestion import ingest_document
+from services.lexical_index import LexicalIndex
+from services.vectorstore import CollectionVersion, get_document_chunk_ids
+
+
+class CountingEmbedding(DeterministicFakeEmbedding):
+    embedded: list[str] = []
+
+    def embed_documents(self, texts):
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+def paragraph(word: str) -> str:
+    return f"{word} " + " ".join(f"{word}{i}" for i in range(60))
+
+
+@pytest.fixture
+def env(tmp_path):
+    embeddings = CountingEmbedding(size=8, embedded=[])
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"test-{uuid.uuid4().hex[:8]}",
+        embedding_function=embeddings,
+    )
+    embedder = BatchEmbedder(embeddings, batch_size=4, concurrency=1)
+    lexical_index = LexicalIndex(str(tmp_path / "lexical.db"))
+    version = CollectionVersion()
+    yield tmp_path, vectorstore, embeddings, embedder, lexical_index, version
+    embedder.shutdown()
+    lexical_index.close()
+
+
+def ingest(env, words: list[str]) -> tuple[int, dict]:
+    tmp_path, vectorstore, _, embedder, lexical_index, version = env
+    path = tmp_path / "doc.txt"
+    path.write_text("\n\n".join(paragraph(word) for word in words))
+    progress = {}
+    count = ingest_document(
+        str(path),
+        "doc",
+        "doc.txt",
+        "txt",
+        vectorstore,
+        embedder,
+        progress=lambda stage, **counts: progress.update(counts),
+        lexical_index=lexical_index,
+        collection_version=version,
+    )
+    return count, progress
+
+
+def stored(vectorstore) -> dict[str, dict]:
+    result = vectorstore._collection.get(where={"document_id": "doc"})
+    return dict(zip(result["ids"], result["metadatas"]))
+
+
+def test_reingest_only_embeds_changed_chunks(env):
+    _, vectorstore, embeddings, _, lexical_index, version = env
+    first, _ = ingest(env, ["alpha", "bravo", "charlie"])
+    before = stored(vectorstore)
+    assert first == len(before) == len(embeddings.embedded) == 3
+    # One upsert, then the closing total_chunks pass
+    assert version.value == 2
+
+    embeddings.embedded.clear()
+    count, progress = ingest(env, ["alpha", "delta", "charlie", "echo"])
+    after = stored(vectorstore)
+
+    assert count == len(after) == 4
+    assert [text.split()[0] for text in embeddings.embedded] == ["delta", "echo"]
+    assert progress["chunks_unchanged"] == 2
+    assert progress["chunks_to_embed"] == 2
+    assert progress["chunks_removed"] == 1
+    # Unchanged chunks keep their ids and are renumbered in document order
+    kept = set(before) & set(after)
+    assert len(kept) == 2
+    order = sorted(after.values(), key=lambda m: m["chunk_index"])
+    assert [m["chunk_index"] for m in order] == [0, 1, 2, 3]
+    assert not any("bravo" in chunk_id for chunk_id in after)
+    # The keyword index follows the same diff
+    assert lexical_index.count() == 4
+    assert lexical_index.search("bravo", k=5) == []
+    delta = [chunk_id for chunk_id, meta in after.items() if meta["chunk_index"] == 1]
+    assert [doc.id for doc in lexical_index.search("delta", k=5)] == delta
+
+
+def test_unchanged_reingest_embeds_nothing(env):
+    _, vectorstore, embeddings, _, _, version = env
+    ingest(env, ["alpha", "bravo"])
+    ids = get_document_chunk_ids(vectorstore, "doc")
+    embeddings.embedded.clear()
+    writes = version.value
+
+    count, progress = ingest(env, ["alpha", "bravo"])
+    assert count == 2
+    assert embeddings.embedded == []
+    assert progress["chunks_removed"] == 0
+    assert sorted(get_document_chunk_ids(vectorstore, "doc")) == sorted(ids)
+    # Only the chunk metadata refresh touched the collection
+    assert version.value == writes + 1
+
+
+def test_repeated_paragraphs_get_distinct_ids(env):
+    _, vectorstore, _, _, _, _ = env
+    count, _ = ingest(env, ["alpha", "alpha", "bravo"])
+    ids = get_document_chunk_ids(vectorstore, "doc")
+    assert count == len(set(ids)) == 3
+
+
+def test_reingest_keeps_chunk_index_and_total_consistent(env):
+    _, vectorstore, _, _, lexical_index, _ = env
+    ingest(env, ["alpha", "bravo", "charlie"])
+    ingest(env, ["delta", "alpha", "charlie", "echo"])
+    metadata = sorted(stored(vectorstore).values(), key=lambda m: m["chunk_index"])
+    assert [m["chunk_index"] for m in metadata] == [0, 1, 2, 3]
+    assert {m["total_chunks"] for m in metadata} == {4}
+    assert lexical_index.search("echo", k=1)[0].metadata["total_chunks"] == 4
@@ -0,0 +1,130 @@
+import time
+import uuid
+from pathlib import Path
+
+import chromadb
+import pytest
+from langchain_chroma import Chroma
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from services.document_store import DocumentStore
+from services.embedding import BatchEmbedder
+from services.ingestion_queue import TERMINAL_STATUSES, IngestionQueue
+
+
+class FlakyEmbedding(DeterministicFakeEmbedding):
+    """Fails the first ``failures`` embedding calls."""
+
+    failures: int = 0
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ConnectionError("provider unavailable")
+        return super().embed_documents(texts)
+
+
+class RecordingStore(DocumentStore):
+    def __init__(self, path):
+        super().__init__(path)
+        self.stages: list[str] = []
+
+    def update(self, doc_id, **fields):
+        if "progress" in fields:
+            self.stages.append(fields["progress"]["stage"])
+        return super().update(doc_id, **fields)
+
+
+@pytest.fixture
+def env(tmp_path):
+    store = RecordingStore(str(tmp_path / "documents.json"))
+    vectorstore = Chroma(
+        client=chromadb.EphemeralClient(),
+        collection_name=f"test-{uuid.uuid4().hex[:8]}",
+        embedding_function=DeterministicFakeEmbedding(size=8),
+    )
+    queues = []
+
+    def make_queue(failures: int = 0, max_retries: int = 2):
+        embeddings = FlakyEmbedding(size=8, failures=failures)
+        embedder = BatchEmbedder(embeddings, batch_size=2, concurrency=1)
+        queue = IngestionQueue(
+            store, vectorstore, embedder, workers=1, max_retries=max_retries,
+            retry_backoff_seconds=0.001,
+        )
+        queues.append((queue, embedder))
+        return queue, embeddings
+
+    yield tmp_path, store, make_queue
+    for queue, embedder in queues:
+        queue.shutdown()
+        embedder.shutdown()
+
+
+def add_document(tmp_path, store, status=None, paragraphs: int = 3) -> str:
+    path = tmp_path / f"{uuid.uuid4().hex}.txt"
+    path.write_text("\n\n".join(f"paragraph {i} " + "word " * 80 for i in range(paragraphs)))
+    doc = store.create("doc.txt", "txt", path.stat().st_size, str(path))
+    if status:
+        store.update(doc["id"], status=status)
+    return doc["id"]
+
+
+def wait(store, doc_id: str) -> dict:
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        doc = store.get(doc_id)
+        if doc["status"] in TERMINAL_STATUSES and doc["progress"]["stage"] in TERMINAL_STATUSES:
+            return doc
+        time.sleep(0.01)
+    raise AssertionError(f"document {doc_id} did not finish")
+
+
+def test_job_reports_each_stage(env):
+    tmp_path, store, make_queue = env
+    queue, _ = make_queue()
+    doc_id = add_document(tmp_path, store)
+    queue.submit(doc_id)
+    doc = wait(store, doc_id)
+
+    assert doc["status"] == "ready"
+    assert doc["chunk_count"] == 3
+    assert list(dict.fromkeys(store.stages)) == ["queued", "loading", "embedding", "ready"]
+    assert doc["progress"]["chunks_embedded"] == 3
+
+
+def test_failed_batch_is_retried(env):
+    tmp_path, store, make_queue = env
+    queue, embeddings = make_queue(failures=1)
+    doc_id = add_document(tmp_path, store)
+    queue.submit(doc_id)
+    assert wait(store, doc_id)["status"] == "ready"
+    # One failed attempt, then two successful batches of two and one chunks
+    assert embeddings.calls == 3
+
+
+def test_batch_failing_every_retry_marks_document_failed(env):
+    tmp_path, store, make_queue = env
+    queue, embeddings = make_queue(failures=100, max_retries=2)
+    doc_id = add_document(tmp_path, store, paragraphs=1)
+    queue.submit(doc_id)
+    doc = wait(store, doc_id)
+    assert doc["status"] == "error"
+    assert doc["progress"]["stage"] == "error"
+    assert "provider unavailable" in doc["error_message"]
+    assert embeddings.calls == 3
+
+
+def test_resume_pending_requeues_unfinished_documents(env):
+    tmp_path, store, make_queue = env
+    unfinished = add_document(tmp_path, store)  # still "processing"
+    done = add_document(tmp_path, store, status="ready")
+    missing_file = add_document(tmp_path, store)
+    Path(store.get(missing_file)["file_path"]).unlink()
+
+    queue, _ = make_queue()
+    assert queue.resume_pending() == 1
+    assert wait(store, unfinished)["status"] == "ready"
+    assert store.get(done)["status"] == "ready"
+    assert store.get(missing_file)["status"] == "processing"
@@ -0,0 +1,83 @@
+import asyncio
+
+from core.intent_classifier import IntentCache, aclassify_intent, classify_intent
+
+AMBIGUOUS = "Who is the best support rep?"
+
+
+class Model:
+    def __init__(self, label: str = "rag"):
+        self.label = label
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return self.label
+
+    async def ainvoke(self, prompt):
+        return self.invoke(prompt)
+
+
+class Embeddings:
+    """Maps questions to fixed vectors; unknown text raises."""
+
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+
+    def embed_query(self, text):
+        if text not in self.vectors:
+            raise ConnectionError("embedding provider down")
+        return self.vectors[text]
+
+    async def aembed_query(self, text):
+        return self.embed_query(text)
+
+
+def test_exact_hits_ignore_case_and_punctuation():
+    cache = IntentCache()
+    model = Model()
+    assert classify_intent(AMBIGUOUS, model, cache=cache) == "rag"
+    assert classify_intent("who is the BEST support rep", model, cache=cache) == "rag"
+    assert model.calls == 1
+
+
+def test_semantic_hit_reuses_label_of_similar_question():
+    rephrased = "Which support rep is the best one?"
+    cache = IntentCache(
+        Embeddings({AMBIGUOUS: [1.0, 0.0], rephrased: [0.99, 0.05]}),
+        similarity_threshold=0.9,
+    )
+    model = Model()
+    classify_intent(AMBIGUOUS, model, cache=cache)
+    assert classify_intent(rephrased, model, cache=cache) == "rag"
+    assert model.calls == 1
+    assert cache.stats()["semantic_hits"] == 1
+
+
+def test_dissimilar_question_goes_to_the_llm():
+    other = "Who approved the travel budget?"
+    cache = IntentCache(
+        Embeddings({AMBIGUOUS: [1.0, 0.0], other: [0.0, 1.0]}), similarity_threshold=0.9
+    )
+    model = Model()
+    classify_intent(AMBIGUOUS, model, cache=cache)
+    classify_intent(other, model, cache=cache)
+    assert model.calls == 2
+
+
+def test_embedding_failure_still_asks_the_llm():
+    model = Model("hybrid")
+    cache = IntentCache(Embeddings({}))
+    assert classify_intent(AMBIGUOUS, model, cache=cache) == "hybrid"
+    assert asyncio.run(aclassify_intent("Who signed off on it?", model, cache=cache)) == "hybrid"
+    assert model.calls == 2
+    # Cached without a vector, so the exact path still works
+    assert cache.get(AMBIGUOUS) == "hybrid"
+
+
+def test_llm_failure_defaults_to_sql():
+    class Broken:
+        def invoke(self, prompt):
+            raise TimeoutError
+
+    assert classify_intent(AMBIGUOUS, Broken(), cache=IntentCache()) == "sql"
@@ -0,0 +1,65 @@
+import pytest
+
+from core.intent_classifier import LocalIntentRouter, classify_intent
+
+THRESHOLD = 0.6
+
+
+@pytest.fixture
+def router():
+    return LocalIntentRouter()
+
+
+@pytest.mark.parametrize(
+    ("question", "label"),
+    [
+        ("How many customers are in the database?", "sql"),
+        ("Show me top 10 products by revenue", "sql"),
+        ("Total revenue per country", "sql"),
+        ("List all customers from Brazil", "sql"),
+        ("Summarize the employee handbook", "rag"),
+        ("What does the uploaded contract say about termination?", "rag"),
+        ("Do customer counts match what's in the board report?", "hybrid"),
+        ("Compare total sales against the figures in the Q4 report", "hybrid"),
+    ],
+)
+def test_confident_routes(router, question, label):
+    routed, confidence = router.score(question)
+    assert routed == label
+    assert confidence >= THRESHOLD
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        # Database and document terms without a cue word are ambiguous
+        "total revenue per country in the report",
+        "Summarize the sales report",
+        # Too little evidence either way
+        "What does the privacy policy cover?",
+        "Who is the best support rep?",
+        "hello",
+    ],
+)
+def test_ambiguous_questions_escalate(router, question):
+    _, confidence = router.score(question)
+    assert confidence < THRESHOLD
+
+
+def test_example_words_alone_do_not_signal_hybrid(router):
+    for question in ("Revenue per customer for Q4", "Top customers by board members"):
+        label, _ = router.score(question)
+        assert label == "sql"
+
+
+def test_escalates_to_llm_below_threshold():
+    class Model:
+        calls = 0
+
+        def invoke(self, prompt):
+            Model.calls += 1
+            return "hybrid"
+
+    assert classify_intent("total revenue per country in the report", Model()) == "hybrid"
+    assert classify_intent("How many customers are in the database?", Model()) == "sql"
+    assert Model.calls == 1
@@ -0,0 +1,84 @@
+import pytest
+
+from services.query_cache import QueryResultCache, normalize_sql
+
+TABLES = ["Invoice", "Customer", "Artist"]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr("core.cache.time.monotonic", lambda: now[0])
+    return now
+
+
+def make_cache(**kwargs) -> QueryResultCache:
+    return QueryResultCache(lambda: TABLES, **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("a", "b"),
+    [
+        ("SELECT * FROM Invoice", "select  *\n  from invoice;"),
+        ("SELECT Name FROM Artist WHERE Name = 'AC/DC'", "select name from artist where name = 'AC/DC'"),
+        ('SELECT "Total" FROM Invoice', 'select  "Total"  from INVOICE ;'),
+    ],
+)
+def test_equivalent_queries_normalize_alike(a, b):
+    assert normalize_sql(a) == normalize_sql(b)
+
+
+@pytest.mark.parametrize(
+    ("a", "b"),
+    [
+        ("SELECT * FROM Artist WHERE Name = 'Queen'", "SELECT * FROM Artist WHERE Name = 'queen'"),
+        ("SELECT * FROM Artist WHERE Name = 'A  B'", "SELECT * FROM Artist WHERE Name = 'A B'"),
+        ('SELECT "Total" FROM Invoice', 'SELECT "total" FROM Invoice'),
+    ],
+)
+def test_literals_and_quoted_identifiers_are_kept(a, b):
+    assert normalize_sql(a) != normalize_sql(b)
+
+
+def test_hits_and_uncacheable_results():
+    cache = make_cache()
+    assert cache.set("SELECT COUNT(*) FROM Invoice", "412")
+    assert cache.get("select count(*)  from invoice;") == ("412", None)
+    assert not cache.set("SELECT * FROM Nope", "Error: no such table")
+    assert not cache.set("PRAGMA table_info(Invoice)", "...")
+    assert cache.get("SELECT * FROM Nope") is None
+
+
+def test_shortest_table_ttl_applies(clock):
+    cache = make_cache(default_ttl_seconds=50, table_ttls={"Invoice": 10, "customer": 100})
+    joined = "SELECT * FROM Invoice JOIN Customer USING (CustomerId)"
+    cache.set(joined, "joined")
+    cache.set("SELECT * FROM Customer", "customers")
+    cache.set("SELECT 1", "constant")
+
+    clock[0] = 11
+    assert cache.get(joined) is None
+    assert cache.get("SELECT * FROM Customer") is not None
+    assert cache.get("SELECT 1") is not None
+    clock[0] = 51
+    assert cache.get("SELECT 1") is None
+    assert cache.get("SELECT * FROM Customer") is not None
+
+
+def test_zero_ttl_table_is_never_cached():
+    cache = make_cache(table_ttls={"Invoice": 0})
+    assert not cache.set("SELECT * FROM Invoice", "rows")
+    assert cache.set("SELECT * FROM Artist", "rows")
+
+
+def test_invalidation_is_per_table():
+    cache = make_cache()
+    cache.set("SELECT * FROM Invoice JOIN Customer USING (CustomerId)", "joined")
+    cache.set("SELECT * FROM Customer", "customers")
+    cache.set("SELECT * FROM Artist", "artists")
+
+    assert cache.invalidate(["CUSTOMER"]) == 2
+    assert cache.get("SELECT * FROM Artist") == ("artists", None)
+    assert cache.get("SELECT * FROM Customer") is None
+    assert cache.invalidate() == 1
+    assert cache.stats()["size"] == 0
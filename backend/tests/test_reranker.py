@@ -0,0 +1,60 @@
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+
+from services import reranker as reranker_module
+from services.reranker import CrossEncoderReranker
+
+DOCS = [Document(page_content=text) for text in ("alpha", "bravo", "charlie")]
+
+
+class Model:
+    def predict(self, pairs, batch_size, show_progress_bar):
+        return np.array([len(text) for _, text in pairs], dtype=float)
+
+
+def test_reorders_by_score(monkeypatch):
+    monkeypatch.setattr(reranker_module, "_load_cross_encoder", lambda name: Model())
+    reranker = CrossEncoderReranker("model")
+    docs, final = reranker.rerank("q", DOCS, 2)
+    assert [d.page_content for d in docs] == ["charlie", "alpha"]
+    assert final
+    reranker.shutdown()
+
+
+def test_failed_load_is_not_retried_per_query(monkeypatch):
+    attempts = []
+
+    def fail(name):
+        attempts.append(name)
+        raise OSError("offline")
+
+    monkeypatch.setattr(reranker_module, "_load_cross_encoder", fail)
+    reranker = CrossEncoderReranker("model")
+    for _ in range(5):
+        docs, final = reranker.rerank("q", DOCS, 2)
+        assert docs == DOCS[:2]
+        assert final
+    assert len(attempts) == 1
+    assert not reranker.available
+
+    monkeypatch.setattr(reranker_module, "_LOAD_RETRY_SECONDS", 0)
+    reranker.rerank("q", DOCS, 2)
+    assert len(attempts) == 2
+    reranker.shutdown()
+
+
+def test_timeout_keeps_retrieval_order(monkeypatch):
+    class Slow(Model):
+        def predict(self, *args, **kwargs):
+            time.sleep(0.3)
+            return super().predict(*args, **kwargs)
+
+    monkeypatch.setattr(reranker_module, "_load_cross_encoder", lambda name: Slow())
+    reranker = CrossEncoderReranker("model", timeout_seconds=0.05)
+    docs, final = reranker.rerank("q", DOCS, 2)
+    assert docs == DOCS[:2]
+    assert not final
+    assert reranker.fallbacks == 1
+    reranker.shutdown()
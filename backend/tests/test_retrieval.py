@@ -0,0 +1,161 @@
+from datetime import date
+
+import pytest
+from langchain_core.documents import Document
+
+from services.lexical_index import LexicalIndex, match_expression
+from services.retrieval import (
+    HybridRetriever,
+    chroma_where,
+    reciprocal_rank_fusion,
+    scope_documents,
+)
+
+
+def doc(chunk_id: str, text: str = "", **metadata) -> Document:
+    return Document(id=chunk_id, page_content=text or chunk_id, metadata=metadata)
+
+
+def ids(docs: list[Document]) -> list[str]:
+    return [d.id for d in docs]
+
+
+def test_rrf_rewards_agreement_between_rankings():
+    vector = [doc("a"), doc("b"), doc("c")]
+    lexical = [doc("c"), doc("d"), doc("b")]
+    # b and c appear in both lists, so they beat a list's lone top hit
+    assert ids(reciprocal_rank_fusion([vector, lexical])) == ["c", "b", "a", "d"]
+
+
+def test_rrf_ties_keep_earlier_list_order():
+    assert ids(reciprocal_rank_fusion([[doc("a")], [doc("b")]])) == ["a", "b"]
+
+
+def test_rrf_without_ids_falls_back_to_content():
+    fused = reciprocal_rank_fusion(
+        [[Document(page_content="same")], [Document(page_content="same")]]
+    )
+    assert len(fused) == 1
+
+
+def test_rrf_empty_input():
+    assert reciprocal_rank_fusion([[], []]) == []
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("refund policy", '"refund" OR "policy"'),
+        ("Error ABC-123 in v2.1.0?", '"error" OR "abc 123" OR "in" OR "v2 1 0"'),
+        ("policy POLICY policy", '"policy"'),
+        ("what's up", '"what" OR "s" OR "up"'),
+        ("?!", None),
+        ("", None),
+    ],
+)
+def test_match_expression(query, expected):
+    assert match_expression(query) == expected
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = LexicalIndex(str(tmp_path / "lexical.db"))
+    index.upsert(
+        ["a-0", "a-1", "b-0"],
+        [
+            doc("a-0", "Order ABC-123 was refunded", document_id="a", filename="a.txt"),
+            doc("a-1", "Shipping takes three days", document_id="a", filename="a.txt"),
+            doc("b-0", "ABC and 123 are unrelated here", document_id="b", filename="b.pdf"),
+        ],
+    )
+    yield index
+    index.close()
+
+
+def test_lexical_search_matches_identifiers_as_phrases(index):
+    assert ids(index.search("ABC-123", k=5)) == ["a-0"]
+    assert set(ids(index.search("abc", k=5))) == {"a-0", "b-0"}
+
+
+def test_lexical_search_filters(index):
+    assert ids(index.search("abc", k=5, document_ids=["b"])) == ["b-0"]
+    assert ids(index.search("abc", k=5, filename="a.txt")) == ["a-0"]
+    assert index.search("abc", k=5, document_ids=[]) == []
+
+
+def test_lexical_index_upsert_update_and_delete(index):
+    index.upsert(["a-1"], [doc("a-1", "Shipping takes a week", document_id="a")])
+    assert index.count() == 3
+    assert index.search("three", k=5) == []
+    index.update_metadata(["a-1"], [{"document_id": "a", "chunk_index": 7}])
+    assert index.search("week", k=1)[0].metadata["chunk_index"] == 7
+    index.delete(["b-0"])
+    index.delete_document("a")
+    assert index.count() == 0
+
+
+class StubVectorstore:
+    def __init__(self, docs: list[Document]):
+        self.docs = docs
+        self.calls: list[dict] = []
+
+    def similarity_search(self, query, k, filter=None):
+        self.calls.append({"k": k, "filter": filter})
+        return self.docs[:k]
+
+
+def test_hybrid_retriever_fuses_vector_and_keyword_hits(index):
+    vectorstore = StubVectorstore([doc("a-1"), doc("b-0"), doc("a-0")])
+    retriever = HybridRetriever(vectorstore, index, top_k=2, vector_k=3, lexical_k=2)
+    # a-0 is the only keyword match for the identifier and rises to the top
+    assert ids(retriever.search("ABC-123")) == ["a-0", "a-1"]
+
+
+def test_hybrid_retriever_without_keyword_search(index):
+    vectorstore = StubVectorstore([doc("a-1"), doc("b-0"), doc("a-0")])
+    retriever = HybridRetriever(vectorstore, index, top_k=2, lexical_k=0)
+    assert ids(retriever.search("ABC-123")) == ["a-1", "b-0"]
+    assert vectorstore.calls == [{"k": 2, "filter": None}]
+
+
+RECORDS = [
+    {"id": "d1", "file_type": "pdf", "created_at": "2026-01-10T09:00:00"},
+    {"id": "d2", "file_type": "txt", "created_at": "2026-02-01T23:59:00"},
+    {"id": "d3", "file_type": "pdf", "created_at": "2026-03-05T08:00:00"},
+]
+
+
+@pytest.mark.parametrize(
+    ("filters", "expected"),
+    [
+        ({}, None),
+        ({"document_ids": []}, []),
+        ({"document_ids": ["d3", "missing"]}, ["d3"]),
+        ({"file_types": [".PDF"]}, ["d1", "d3"]),
+        ({"uploaded_from": date(2026, 2, 1)}, ["d2", "d3"]),
+        ({"uploaded_to": date(2026, 2, 1)}, ["d1", "d2"]),
+        ({"document_ids": ["d1", "d2"], "file_types": ["pdf"]}, ["d1"]),
+        ({"file_types": ["docx"]}, []),
+    ],
+)
+def test_scope_documents(filters, expected):
+    assert scope_documents(RECORDS, **filters) == expected
+
+
+def test_chroma_where():
+    assert chroma_where() is None
+    assert chroma_where(["d1"]) == {"document_id": {"$in": ["d1"]}}
+    assert chroma_where(filename="a.txt") == {"filename": "a.txt"}
+    assert chroma_where(["d1"], "a.txt") == {
+        "$and": [{"document_id": {"$in": ["d1"]}}, {"filename": "a.txt"}]
+    }
+
+
+def test_scope_is_pushed_into_both_searches(index):
+    vectorstore = StubVectorstore([doc("b-0"), doc("a-0")])
+    retriever = HybridRetriever(vectorstore, index, top_k=2, vector_k=2, lexical_k=2)
+    retriever.search("ABC-123", document_ids=["b"])
+    assert vectorstore.calls[-1]["filter"] == {"document_id": {"$in": ["b"]}}
+    # Scoped to no documents: nothing is searched
+    assert retriever.search("ABC-123", document_ids=[]) == []
+    assert len(vectorstore.calls) == 1
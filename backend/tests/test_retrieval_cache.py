@@ -0,0 +1,94 @@
+from langchain_core.documents import Document
+
+from services.retrieval import HybridRetriever
+from services.retrieval_cache import RetrievalCache
+from services.vectorstore import CollectionVersion
+
+
+class StubEmbeddings:
+    def __init__(self, vectors: dict[str, list[float]]):
+        self.vectors = vectors
+        self.calls = 0
+
+    def embed_query(self, text):
+        self.calls += 1
+        return self.vectors[text]
+
+
+class StubVectorstore:
+    def __init__(self, embeddings=None):
+        self.embeddings = embeddings
+        self.searches = 0
+
+    def similarity_search(self, query, k, filter=None):
+        self.searches += 1
+        return [Document(id=f"{query}-{i}", page_content=query) for i in range(k)]
+
+    def similarity_search_by_vector(self, embedding, k, filter=None):
+        self.searches += 1
+        return [Document(id=f"vector-{i}", page_content="") for i in range(k)]
+
+
+class StubReranker:
+    def __init__(self, final: bool):
+        self.final = final
+
+    def rerank(self, query, docs, top_k):
+        return docs[:top_k], self.final
+
+
+def test_key_normalizes_query_and_scope():
+    cache = RetrievalCache(CollectionVersion())
+    assert cache.key("Refund  Policy", ["b", "a"]) == cache.key("refund policy", ["a", "b"])
+    assert cache.key("refund policy") != cache.key("refund policy", ["a"])
+    assert cache.key("refund policy") != cache.key("refund policy", filename="a.txt")
+
+
+def test_collection_change_clears_entries():
+    version = CollectionVersion()
+    cache = RetrievalCache(version)
+    key = cache.key("q")
+    cache.set(key, [Document(page_content="x")])
+    assert cache.get(key) is not None
+    version.bump()
+    new_key = cache.key("q")
+    assert new_key != key
+    assert cache.get(new_key) is None
+    assert cache.stats()["size"] == 0
+
+
+def test_retriever_serves_repeats_from_cache():
+    vectorstore = StubVectorstore()
+    cache = RetrievalCache(CollectionVersion())
+    retriever = HybridRetriever(vectorstore, top_k=2, cache=cache)
+    first = retriever.search("refund policy")
+    assert retriever.search("Refund policy") == first
+    assert vectorstore.searches == 1
+
+
+def test_semantic_hit_within_same_scope_only():
+    embeddings = StubEmbeddings({"q1": [1.0, 0.0], "q2": [0.99, 0.1]})
+    vectorstore = StubVectorstore(embeddings)
+    cache = RetrievalCache(CollectionVersion(), similarity_threshold=0.9)
+    retriever = HybridRetriever(vectorstore, top_k=2, cache=cache)
+    retriever.search("q1")
+    retriever.search("q2")
+    assert vectorstore.searches == 1
+    assert cache.stats()["semantic_hits"] == 1
+    retriever.search("q2", document_ids=["a"])
+    assert vectorstore.searches == 2
+
+
+def test_reranker_fallback_is_cached_unless_it_timed_out():
+    version = CollectionVersion()
+    for final, searches in ((True, 1), (False, 2)):
+        vectorstore = StubVectorstore()
+        retriever = HybridRetriever(
+            vectorstore,
+            top_k=2,
+            reranker=StubReranker(final),
+            cache=RetrievalCache(version),
+        )
+        retriever.search("q")
+        retriever.search("q")
+        assert vectorstore.searches == searches
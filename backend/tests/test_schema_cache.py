@@ -0,0 +1,70 @@
+from langchain_community.utilities import SQLDatabase
+from sqlalchemy import create_engine, text
+
+from services.schema_cache import SchemaCache
+
+
+def make_cache(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE artist (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("CREATE TABLE album (id INTEGER PRIMARY KEY, title TEXT)"))
+    cache = SchemaCache(SQLDatabase(engine), refresh_interval_seconds=0, sample_rows=0)
+    cache.refresh()
+    events = []
+    cache.add_listener(events.append)
+    return engine, cache, events
+
+
+def test_unchanged_catalog_keeps_version_and_listeners_quiet(tmp_path):
+    _, cache, events = make_cache(tmp_path)
+    version = cache.version
+    cache.refresh()
+    assert cache.version == version
+    assert events == []
+
+
+def test_changed_tables_are_reported(tmp_path):
+    engine, cache, events = make_cache(tmp_path)
+    cache.get_table_info(["artist", "album"])
+    version = cache.version
+    with engine.begin() as connection:
+        connection.execute(text("ALTER TABLE album ADD COLUMN year INTEGER"))
+        connection.execute(text("CREATE TABLE track (id INTEGER PRIMARY KEY)"))
+    cache.refresh()
+    assert cache.version == version + 1
+    assert events == [["album", "track"]]
+    assert [c["name"] for c in cache.columns("album")] == ["id", "title", "year"]
+    assert "year" in cache.get_table_info(["album"])
+
+
+def test_forced_refresh_invalidates_everything(tmp_path):
+    _, cache, events = make_cache(tmp_path)
+    version = cache.version
+    cache.invalidate()
+    assert cache.version == version + 1
+    assert events == [None]
+
+
+def test_schema_etag_covers_query_and_skips_samples(tmp_path):
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    from api.routes.database import router
+
+    _, cache, _ = make_cache(tmp_path)
+    app = FastAPI()
+    app.include_router(router)
+    app.state.schema_cache = cache
+    client = TestClient(app)
+
+    etag = client.get("/database/schema").headers["etag"]
+    assert client.get("/database/schema", headers={"If-None-Match": etag}).status_code == 304
+    filtered = client.get("/database/schema?name=art", headers={"If-None-Match": etag})
+    assert filtered.status_code == 200
+    assert [t["name"] for t in filtered.json()["tables"]] == ["artist"]
+
+    samples = client.get("/database/schema?include_samples=true", headers={"If-None-Match": etag})
+    assert samples.status_code == 200
+    assert "etag" not in samples.headers
+    assert samples.json()["tables"][0]["sample_rows"] == {"columns": ["id", "title"], "rows": []}
@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from services.sql_guard import SQLGuard, SQLGuardError
+
+
+def guard(dialect: str = "mssql", max_rows: int = 200) -> SQLGuard:
+    return SQLGuard(SimpleNamespace(dialect=dialect), max_rows=max_rows)
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "DELETE FROM Invoice",
+        "SELECT * INTO Backup FROM Invoice",
+        "SELECT 1; DROP TABLE Invoice",
+        "UPDATE Invoice SET Total = 0",
+        "WITH x AS (SELECT 1 AS a) INSERT INTO t SELECT a FROM x",
+        "EXEC sp_who",
+        "",
+        "-- only a comment",
+    ],
+)
+def test_rejects_non_read_only_statements(query):
+    with pytest.raises(SQLGuardError):
+        guard().check(query)
+
+
+def test_keywords_inside_literals_and_comments_are_allowed():
+    sql = guard().check("SELECT 'delete; drop' AS note /* update */ FROM Invoice")
+    assert sql.startswith("SELECT TOP 200 'delete; drop'")
+
+
+def test_trailing_semicolon_is_stripped():
+    assert guard().check("SELECT Name FROM Artist;") == "SELECT TOP 200 Name FROM Artist"
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("SELECT * FROM Invoice", "SELECT TOP 200 * FROM Invoice"),
+        ("SELECT DISTINCT Country FROM Customer", "SELECT DISTINCT TOP 200 Country FROM Customer"),
+        ("SELECT TOP 10 * FROM Invoice", "SELECT TOP 10 * FROM Invoice"),
+        ("SELECT TOP 5000 * FROM Invoice", "SELECT TOP 200 * FROM Invoice"),
+        ("SELECT TOP (5000) * FROM Invoice", "SELECT TOP (200) * FROM Invoice"),
+        (
+            "WITH t AS (SELECT TOP 5 * FROM Invoice) SELECT * FROM t",
+            "WITH t AS (SELECT TOP 5 * FROM Invoice) SELECT TOP 200 * FROM t",
+        ),
+        (
+            "SELECT * FROM Invoice ORDER BY Total OFFSET 5 ROWS",
+            "SELECT * FROM Invoice ORDER BY Total OFFSET 5 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+        (
+            "SELECT * FROM Invoice ORDER BY Total OFFSET 5 ROWS FETCH NEXT 9999 ROWS ONLY",
+            "SELECT * FROM Invoice ORDER BY Total OFFSET 5 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+        ("SELECT TOP 10 PERCENT * FROM Invoice", "SELECT TOP 200 * FROM Invoice"),
+        (
+            "SELECT TOP (50) PERCENT WITH TIES * FROM Invoice ORDER BY Total",
+            "SELECT TOP 200 WITH TIES * FROM Invoice ORDER BY Total",
+        ),
+        (
+            "SELECT City FROM Customer UNION SELECT City FROM Employee",
+            "SELECT City FROM Customer UNION SELECT City FROM Employee "
+            "ORDER BY (SELECT NULL) OFFSET 0 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+        (
+            "SELECT COUNT(*) FROM Customer UNION ALL SELECT COUNT(*) FROM Employee",
+            "SELECT COUNT(*) FROM Customer UNION ALL SELECT COUNT(*) FROM Employee "
+            "ORDER BY (SELECT NULL) OFFSET 0 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+        (
+            "WITH c AS (SELECT City FROM Customer) SELECT City FROM c EXCEPT SELECT City FROM Employee",
+            "WITH c AS (SELECT City FROM Customer) SELECT City FROM c EXCEPT SELECT City FROM Employee "
+            "ORDER BY (SELECT NULL) OFFSET 0 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+        (
+            "SELECT City FROM Customer UNION SELECT City FROM Employee ORDER BY City",
+            "SELECT City FROM Customer UNION SELECT City FROM Employee ORDER BY City "
+            "OFFSET 0 ROWS FETCH NEXT 200 ROWS ONLY",
+        ),
+    ],
+)
+def test_mssql_row_cap(query, expected):
+    assert guard("mssql").check(query) == expected
+
+
+@pytest.mark.parametrize(
+    ("query", "expected"),
+    [
+        ("SELECT * FROM invoice", "SELECT * FROM invoice LIMIT 200"),
+        ("SELECT * FROM invoice LIMIT 10", "SELECT * FROM invoice LIMIT 10"),
+        ("SELECT * FROM invoice LIMIT 5000", "SELECT * FROM invoice LIMIT 200"),
+        ("SELECT * FROM invoice LIMIT 5, 5000", "SELECT * FROM invoice LIMIT 5, 200"),
+        (
+            "SELECT * FROM invoice ORDER BY total OFFSET 5",
+            "SELECT * FROM invoice ORDER BY total LIMIT 200 OFFSET 5",
+        ),
+        (
+            "SELECT a FROM x UNION SELECT a FROM y",
+            "SELECT a FROM x UNION SELECT a FROM y LIMIT 200",
+        ),
+        (
+            "SELECT * FROM (SELECT * FROM invoice LIMIT 5000) AS s",
+            "SELECT * FROM (SELECT * FROM invoice LIMIT 5000) AS s LIMIT 200",
+        ),
+    ],
+)
+def test_limit_dialect_row_cap(query, expected):
+    assert guard("sqlite").check(query) == expected
+
+
+def test_zero_max_rows_disables_the_cap():
+    assert guard(max_rows=0).check("SELECT * FROM Invoice") == "SELECT * FROM Invoice"
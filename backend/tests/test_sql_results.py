@@ -0,0 +1,92 @@
+from typing import TypedDict
+
+import pytest
+from langchain_community.utilities import SQLDatabase
+from langgraph.graph import START, StateGraph
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import StaticPool
+
+from core.agent import _build_query_tool
+from services.query_cache import QueryResultCache
+from services.sql_results import ResultSummary, run_streaming_query
+
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False}
+    )
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE invoice (id INTEGER, country TEXT, total REAL)"))
+        connection.execute(
+            text("INSERT INTO invoice VALUES (:id, :country, :total)"),
+            [
+                {"id": i, "country": None if i % 10 == 0 else f"c{i % 3}", "total": float(i)}
+                for i in range(1, 101)
+            ],
+        )
+    return SQLDatabase(engine)
+
+
+def test_summary_is_bounded_with_column_stats():
+    summary = ResultSummary(["id", "country", "total"], preview_rows=5)
+    summary.add([[i, None if i % 10 == 0 else f"c{i % 3}", float(i)] for i in range(1, 61)])
+    summary.add([[i, f"x{i}", None] for i in range(61, 161)])
+    lines = summary.render().splitlines()
+
+    assert lines[:3] == ["Rows returned: 160", "Columns: id, country, total", "First 5 rows:"]
+    assert lines[3] == "(1, 'c1', 1.0)"
+    assert len(lines) == 3 + 5 + 1 + 3 + 1
+    assert lines[9:12] == [
+        "id: nulls=0, min=1, max=160, mean=80.5",
+        "country: nulls=6, distinct=>50",
+        "total: nulls=100, min=1.0, max=60.0, mean=30.5",
+    ]
+    assert lines[-1].startswith("(Full result was streamed")
+
+
+def test_small_result_has_no_stats():
+    summary = ResultSummary(["name"], preview_rows=5)
+    summary.add([["AC/DC"], ["Queen"]])
+    assert summary.render() == (
+        "Rows returned: 2\nColumns: name\nFirst 2 rows:\n('AC/DC',)\n('Queen',)"
+    )
+
+
+def test_streaming_query_batches_and_keeps_rows(db):
+    batches = []
+    summary, table = run_streaming_query(
+        db, "SELECT id FROM invoice", batches.append, batch_size=40, keep_rows=True
+    )
+    assert [(b["offset"], len(b["rows"])) for b in batches] == [(0, 40), (40, 40), (80, 20)]
+    assert summary.startswith("Rows returned: 100\n")
+    assert table["columns"] == ["id"]
+    assert [row[0] for row in table["rows"]] == list(range(1, 101))
+
+    assert run_streaming_query(db, "SELECT nope FROM invoice", batches.append)[0].startswith("Error:")
+
+
+class State(TypedDict):
+    query: str
+
+
+def streamed_chunks(tool, query: str) -> list[dict]:
+    graph = StateGraph(State)
+    graph.add_node("run", lambda state: tool.invoke({"query": state["query"]}) and {})
+    graph.add_edge(START, "run")
+    return list(graph.compile().stream({"query": query}, stream_mode="custom"))
+
+
+def test_cache_hit_replays_streamed_chunks(db):
+    cache = QueryResultCache(db.get_usable_table_names)
+    tool = _build_query_tool(
+        db, "Run SQL", query_cache=cache, streaming={"batch_size": 30, "preview_rows": 5}
+    )
+    query = "SELECT id, total FROM invoice"
+    first = streamed_chunks(tool, query)
+    replay = streamed_chunks(tool, query)
+
+    assert [c["offset"] for c in first] == [0, 30, 60, 90]
+    assert replay == first
+    assert all(c["type"] == "sql_result_chunk" for c in replay)
+    assert cache.stats()["hits"] == 1
@@ -0,0 +1,94 @@
+import asyncio
+from types import SimpleNamespace
+
+from langchain.agents.middleware import ModelRequest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from core.context_window import _tokens
+from core.summarizer import ConversationSummarizer
+
+
+def history(turns: int) -> list:
+    messages = []
+    for n in range(turns):
+        messages += [HumanMessage(f"question {n}", id=f"h{n}"), AIMessage(f"answer {n}", id=f"a{n}")]
+    return messages
+
+
+class Model:
+    def __init__(self):
+        self.prompts = []
+        self.release = asyncio.Event()
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        await self.release.wait()
+        return AIMessage("new summary")
+
+
+class Agent:
+    def __init__(self, values: dict):
+        self.values = values
+        self.updates = []
+
+    async def aget_state(self, config):
+        return SimpleNamespace(values=self.values)
+
+    async def aupdate_state(self, config, update):
+        self.updates.append(update)
+        self.values = {**self.values, **update}
+
+
+def test_pending_turns_keeps_recent_turns():
+    messages = history(5)
+    summarizer = ConversationSummarizer(None, trigger_tokens=1, keep_recent_turns=2)
+    turns = summarizer._pending_turns({"messages": messages})
+    assert [turn[0].id for turn in turns] == ["h0", "h1", "h2"]
+    # Already summarized messages are not folded in again
+    values = {"messages": messages, "summary": "s", "summary_through": "a2"}
+    assert summarizer._pending_turns(values) is None
+    values["messages"] = history(6)
+    assert [turn[0].id for turn in summarizer._pending_turns(values)] == ["h3"]
+
+
+def test_trigger_threshold():
+    messages = history(4)
+    size = _tokens(messages)
+    assert ConversationSummarizer(None, trigger_tokens=size)._pending_turns({"messages": messages}) is None
+    assert ConversationSummarizer(None, trigger_tokens=size - 1)._pending_turns({"messages": messages})
+
+
+def test_summary_replaces_summarized_messages_in_request():
+    messages = history(3)
+    request = ModelRequest(
+        model=None,
+        messages=messages,
+        system_message=SystemMessage("You are helpful."),
+        state={"messages": messages, "summary": "Asked twice.", "summary_through": "a1"},
+    )
+    condensed = ConversationSummarizer(None)._condense(request)
+    assert condensed.messages == messages[4:]
+    assert condensed.system_message.text == (
+        "You are helpful.\n\nSummary of the earlier conversation:\nAsked twice."
+    )
+    # Without a summary the request is sent as is
+    request = request.override(state={"messages": messages})
+    assert ConversationSummarizer(None)._condense(request) is request
+
+
+def test_one_summary_per_thread_at_a_time():
+    async def run():
+        model = Model()
+        agent = Agent({"messages": history(5)})
+        summarizer = ConversationSummarizer(model, trigger_tokens=1, keep_recent_turns=2)
+        first = asyncio.create_task(summarizer.asummarize(agent, "t1"))
+        await asyncio.sleep(0)
+        assert await summarizer.asummarize(agent, "t1") is False
+        model.release.set()
+        assert await first is True
+        return model, agent
+
+    model, agent = asyncio.run(run())
+    assert len(model.prompts) == 1
+    assert "question 2" in model.prompts[0] and "question 3" not in model.prompts[0]
+    assert agent.updates == [{"summary": "new summary", "summary_through": "a2"}]
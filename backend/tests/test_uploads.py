@@ -0,0 +1,156 @@
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.testclient import TestClient
+
+from api.routes.documents import router
+from api.uploads import receive_files
+from services.document_store import DocumentStore
+
+MB = 1024 * 1024
+
+
+class Queue:
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, doc_id):
+        self.submitted.append(doc_id)
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = FastAPI()
+    app.include_router(router)
+    app.state.settings = SimpleNamespace(
+        upload_dir=str(tmp_path / "uploads"),
+        max_file_size_mb=1,
+        allowed_file_types=("txt", "pdf"),
+    )
+    app.state.document_store = DocumentStore(str(tmp_path / "documents.json"))
+    app.state.ingestion_queue = Queue()
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return TestClient(app)
+
+
+def leftovers(app) -> list[str]:
+    return sorted(p.name for p in Path(app.state.settings.upload_dir).glob(".*.part"))
+
+
+def test_upload_is_stored_hashed_and_queued(app, client):
+    response = client.post("/documents", files={"file": ("notes.txt", b"hello")})
+    assert response.status_code == 202
+    doc = response.json()
+    assert doc["file_size"] == 5
+    assert app.state.ingestion_queue.submitted == [doc["id"]]
+    stored = app.state.document_store.get(doc["id"])
+    assert stored["content_hash"].startswith("2cf24dba")
+    assert open(stored["file_path"], "rb").read() == b"hello"
+
+
+def test_oversized_upload_is_rejected_from_content_length(app, client):
+    response = client.post("/documents", files={"file": ("big.txt", b"x" * (2 * MB))})
+    assert response.status_code == 413
+    assert app.state.document_store.list_all() == []
+    assert leftovers(app) == []
+
+
+def test_chunked_upload_stops_reading_past_the_limit(app):
+    boundary = "limit-test"
+    chunks = [
+        f'--{boundary}\r\nContent-Disposition: form-data; name="file"; '
+        'filename="big.txt"\r\n\r\n'.encode(),
+        *[b"x" * (MB // 2)] * 8,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ]
+    received = []
+
+    async def receive():
+        received.append(chunks[len(received)])
+        return {"type": "http.request", "body": received[-1], "more_body": len(received) < len(chunks)}
+
+    # No Content-Length, as with a chunked request
+    request = Request(
+        {
+            "type": "http",
+            "method": "POST",
+            "headers": [(b"content-type", f"multipart/form-data; boundary={boundary}".encode())],
+        },
+        receive,
+    )
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(receive_files(request, "file", app.state.settings, single=True))
+    assert error.value.status_code == 413
+    assert len(received) == 4
+    assert leftovers(app) == []
+
+
+def test_bulk_reports_rejected_files_and_keeps_the_rest(app, client):
+    response = client.post(
+        "/documents/bulk",
+        files=[
+            ("files", ("a.txt", b"alpha")),
+            ("files", ("big.txt", b"x" * (2 * MB))),
+            ("files", ("run.exe", b"MZ")),
+            ("files", ("b.pdf", b"%PDF-1.4")),
+        ],
+    )
+    assert response.status_code == 202
+    body = response.json()
+    assert [d["filename"] for d in body["documents"]] == ["a.txt", "b.pdf"]
+    assert [(e["filename"], e["detail"][:14]) for e in body["errors"]] == [
+        ("big.txt", "File too large"),
+        ("run.exe", "File type 'exe"),
+    ]
+    assert leftovers(app) == []
+
+
+def test_missing_file_field(client):
+    response = client.post("/documents", files={"other": ("a.txt", b"alpha")})
+    assert response.status_code == 422
+
+
+def test_reupload_of_identical_content_is_a_duplicate(app, client):
+    first = client.post("/documents", files={"file": ("notes.txt", b"hello")}).json()
+    again = client.post("/documents", files={"file": ("copy.txt", b"hello")})
+    assert again.status_code == 200
+    assert again.json()["duplicate"] is True
+    assert again.json()["id"] == first["id"]
+    assert app.state.ingestion_queue.submitted == [first["id"]]
+    assert len(app.state.document_store.list_all()) == 1
+    assert leftovers(app) == []
+
+
+def test_failed_document_with_same_content_is_ingested_again(app, client):
+    failed = client.post("/documents", files={"file": ("notes.txt", b"hello")}).json()
+    app.state.document_store.update(failed["id"], status="error")
+    retry = client.post("/documents", files={"file": ("notes.txt", b"hello")})
+    assert retry.status_code == 202
+    assert retry.json()["id"] != failed["id"]
+    assert app.state.ingestion_queue.submitted == [failed["id"], retry.json()["id"]]
+
+
+def test_put_with_identical_content_is_a_no_op(app, client):
+    doc = client.post("/documents", files={"file": ("notes.txt", b"hello")}).json()
+    store = app.state.document_store
+    store.update(doc["id"], status="ready")
+    before = store.get(doc["id"])
+
+    response = client.put(f"/documents/{doc['id']}", files={"file": ("notes.txt", b"hello")})
+    assert response.status_code == 200
+    assert response.json()["duplicate"] is True
+    assert store.get(doc["id"]) == before
+    assert app.state.ingestion_queue.submitted == [doc["id"]]
+    assert leftovers(app) == []
+
+    changed = client.put(f"/documents/{doc['id']}", files={"file": ("notes.txt", b"hello!")})
+    assert changed.status_code == 202
+    assert changed.json()["version"] == 2
+    assert app.state.ingestion_queue.submitted == [doc["id"], doc["id"]]
@@ -0,0 +1,22 @@
+import { NextRequest } from "next/server";
+import { BACKEND_URL } from "@/lib/config";
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  const { id } = await params;
+  const response = await fetch(`${BACKEND_URL}/documents/${id}/events`);
+  if (!response.ok) {
+    return Response.json({ error: "Document not found" }, { status: 404 });
+  }
+
+  // Pipe the SSE stream through to the client
+  return new Response(response.body, {
+    headers: {
+      "Content-Type": "text/event-stream",
+      "Cache-Control": "no-cache",
+      "Connection": "keep-alive",
+    },
+  });
+}
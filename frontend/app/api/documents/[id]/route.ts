@@ -14,6 +14,20 @@ export async function GET(
   return Response.json(data);
 }
 
+export async function PUT(
+  request: NextRequest,
+  { params }: { params: Promise<{ id: string }> }
+) {
+  const { id } = await params;
+  const formData = await request.formData();
+  const response = await fetch(`${BACKEND_URL}/documents/${id}`, {
+    method: "PUT",
+    body: formData,
+  });
+  const data = await response.json().catch(() => ({ detail: "Upload failed" }));
+  return Response.json(data, { status: response.status });
+}
+
 export async function DELETE(
   request: NextRequest,
   { params }: { params: Promise<{ id: string }> }
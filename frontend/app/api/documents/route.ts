@@ -21,5 +21,5 @@ export async function POST(request: NextRequest) {
   }
 
   const data = await response.json();
-  return Response.json(data, { status: 201 });
+  return Response.json(data, { status: response.status });
 }
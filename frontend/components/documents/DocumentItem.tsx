@@ -2,7 +2,7 @@
 
 import { FileText, Trash2, Loader2, AlertCircle, CheckCircle2 } from "lucide-react";
 import { useDocumentStore } from "@/lib/stores/document-store";
-import type { Document } from "@/lib/types";
+import type { Document, DocumentProgress } from "@/lib/types";
 
 interface DocumentItemProps {
   document: Document;
@@ -14,6 +14,21 @@ function formatFileSize(bytes: number): string {
   return `${(bytes / (1024 * 1024)).toFixed(1)} MB`;
 }
 
+function progressLabel(progress?: DocumentProgress | null): string {
+  if (!progress) return "";
+  if (progress.stage !== "embedding") return ` - ${progress.stage}`;
+  // Pages stream in while earlier ones are embedded
+  const { pages_loaded = 0, pages_total } = progress;
+  if (pages_total && pages_loaded < pages_total) {
+    return ` - page ${pages_loaded}/${pages_total}`;
+  }
+  const total = progress.chunks_to_embed ?? progress.chunks_total;
+  if (total) {
+    return ` - embedding ${progress.chunks_embedded ?? 0}/${total}`;
+  }
+  return ` - ${progress.stage}`;
+}
+
 function StatusIcon({ status }: { status: string }) {
   switch (status) {
     case "processing":
@@ -44,6 +59,7 @@ export function DocumentItem({ document }: DocumentItemProps) {
         <p className="text-[10px] text-muted-foreground">
           {formatFileSize(document.file_size)}
           {document.status === "ready" && ` - ${document.chunk_count} chunks`}
+          {document.status === "processing" && progressLabel(document.progress)}
         </p>
       </div>
       <StatusIcon status={document.status} />
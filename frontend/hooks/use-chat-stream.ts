@@ -88,16 +88,39 @@ export function useChatStream() {
                       data.type === "sql_query"
                     ) {
                       return { ...msg, sqlQuery: data.content };
+                    } else if (
+                      currentEvent === "step" &&
+                      data.type === "sql_result_chunk"
+                    ) {
+                      // Streamed rows: start a new table at offset 0
+                      const header =
+                        data.offset === 0 ? `${data.columns.join("\t")}\n` : "";
+                      const previous =
+                        data.offset === 0 ? "" : msg.sqlResult || "";
+                      const rows = data.rows
+                        .map((row: unknown[]) => row.join("\t"))
+                        .join("\n");
+                      return {
+                        ...msg,
+                        sqlResult: `${previous}${header}${rows}\n`,
+                      };
                     } else if (
                       currentEvent === "step" &&
                       data.type === "sql_result"
                     ) {
+                      // Streamed results already rendered their rows
+                      if (data.streamed && msg.sqlResult) return msg;
                       return { ...msg, sqlResult: data.content };
                     } else if (
                       currentEvent === "step" &&
                       data.type === "source"
                     ) {
                       return { ...msg, sources: data.content };
+                    } else if (currentEvent === "answer_delta") {
+                      return { ...msg, content: msg.content + data.content };
+                    } else if (currentEvent === "answer_reset") {
+                      // Streamed text was preamble to a tool call
+                      return { ...msg, content: "" };
                     } else if (currentEvent === "answer") {
                       return { ...msg, content: data.content };
                     }
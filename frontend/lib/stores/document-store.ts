@@ -8,9 +8,10 @@ interface DocumentStore {
   fetchDocuments: () => Promise<void>;
   uploadDocument: (file: File) => Promise<Document>;
   deleteDocument: (id: string) => Promise<void>;
+  watchDocument: (id: string) => void;
 }
 
-export const useDocumentStore = create<DocumentStore>((set) => ({
+export const useDocumentStore = create<DocumentStore>((set, get) => ({
   documents: [],
   loading: false,
 
@@ -19,8 +20,11 @@ export const useDocumentStore = create<DocumentStore>((set) => ({
     try {
       const res = await fetch("/api/documents");
       if (res.ok) {
-        const documents = await res.json();
+        const documents: Document[] = await res.json();
         set({ documents, loading: false });
+        documents
+          .filter((d) => d.status === "processing")
+          .forEach((d) => get().watchDocument(d.id));
       } else {
         set({ loading: false });
       }
@@ -43,11 +47,28 @@ export const useDocumentStore = create<DocumentStore>((set) => ({
       throw new Error(err.detail || "Upload failed");
     }
 
-    const doc = await res.json();
-    set((state) => ({ documents: [doc, ...state.documents] }));
+    const doc: Document = await res.json();
+    // Duplicate uploads return the existing document
+    set((state) => ({
+      documents: [doc, ...state.documents.filter((d) => d.id !== doc.id)],
+    }));
+    if (doc.status === "processing") get().watchDocument(doc.id);
     return doc;
   },
 
+  watchDocument: (id: string) => {
+    // Ingestion runs in the background; follow its progress over SSE
+    const source = new EventSource(`/api/documents/${id}/events`);
+    source.addEventListener("progress", (e) => {
+      const doc: Document = JSON.parse((e as MessageEvent).data);
+      set((state) => ({
+        documents: state.documents.map((d) => (d.id === id ? doc : d)),
+      }));
+    });
+    source.addEventListener("done", () => source.close());
+    source.onerror = () => source.close();
+  },
+
   deleteDocument: async (id: string) => {
     await fetch(`/api/documents/${id}`, { method: "DELETE" });
     set((state) => ({
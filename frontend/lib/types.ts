@@ -2,6 +2,7 @@ export interface Thread {
   id: string;
   title: string;
   mode: "sql" | "rag" | "hybrid";
+  document_ids?: string[];
   created_at: string;
   updated_at: string;
 }
@@ -49,5 +50,16 @@ export interface Document {
   status: "processing" | "ready" | "error";
   chunk_count: number;
   error_message?: string;
+  progress?: DocumentProgress | null;
+  duplicate?: boolean;
   created_at: string;
 }
+
+export interface DocumentProgress {
+  stage: "queued" | "loading" | "embedding" | "ready" | "error";
+  pages_loaded?: number;
+  pages_total?: number;
+  chunks_total?: number;
+  chunks_to_embed?: number;
+  chunks_embedded?: number;
+}